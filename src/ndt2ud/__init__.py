@@ -1,45 +1,268 @@
 #!/usr/bin/env python3
 import argparse
+import json
 import logging
-import shutil
+import multiprocessing
 import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import grewpy
-from grewpy import GRS, Corpus, CorpusDraft
+from grewpy import Corpus, CorpusDraft
 
-from ndt2ud import utils
-from ndt2ud.morphological_features import convert_morphology
-from ndt2ud.parse_conllu import parse_conll_file, write_conll
+from ndt2ud import (
+    benchmark,
+    evaluation,
+    grew_profile,
+    treebank_diff,
+    utils,
+    validation,
+)
+from ndt2ud.grs_cache import load_grs
+from ndt2ud.incremental import STATE_DIR, convert_incremental
+from ndt2ud.metrics import measure_stage, write_metrics
+from ndt2ud.morphological_features import convert_morphology, feats_cache_info
+from ndt2ud.parse_conllu import (
+    filereadlines,
+    format_conll,
+    iter_conll_sentences,
+    parse_conll_lines,
+    split_conll_lines,
+)
+from ndt2ud.sentence_cache import (
+    MAX_CACHE_BYTES,
+    SENTENCE_CACHE_FILE,
+    SentenceCache,
+    convert_with_cache,
+)
+from ndt2ud.sentence_index import SentenceIndex
+from ndt2ud.validation_cache import VALIDATION_CACHE_FILE
 
 grewpy.set_config("ud")
 
 
-def convert_ndt_to_ud(
-    input_file: str, language: str, output_file: str, grs_path: str
-) -> None:
-    """Convert NDT treebank format to UD format."""
-    temp_dir = "tmp"
-    Path(temp_dir).mkdir(exist_ok=True)
-    logging.info("START converting NDT treebank to UD")
+def dump_stage(tmp_dir: str | Path | None, filename: str, conll: str) -> None:
+    """Write the output of a conversion stage to `tmp_dir`, if it is given."""
+    if tmp_dir is None:
+        return
+    Path(tmp_dir).mkdir(parents=True, exist_ok=True)
+    (Path(tmp_dir) / filename).write_text(conll)
 
-    logging.info("-01- Convert morphology: feats and pos-tags")
-    temp_file = f"{temp_dir}/01_convert_morph_output.conllu"
-    conllu_data = parse_conll_file(Path(input_file))
+
+def morphology_stage(conllu_data: dict, language: str, grs_path: str) -> str:
+    """Convert POS tags and feats, and format the treebank as a conllu string.
+
+    The sentences are read and converted one at a time, without a list of
+    parsed sentences, but the output is the whole treebank as one string,
+    since Grew loads the corpus from it in the next stage.
+    """
     morphdata = convert_morphology(conllu_data)
-    write_conll(morphdata, temp_file, drop_comments=False)
+    conll = format_conll(morphdata, drop_comments=False)
+    for invalid_line in conllu_data.get("invalid_lines", []):
+        logging.warning(f"Skipped invalid conll {invalid_line}")
+    logging.debug(f"Feats conversion cache: {feats_cache_info()}")
+    return conll
 
-    logging.info("-02- Add MISC annotation 'SpaceAfter=No'")
-    temp_out = f"{temp_dir}/02_udapy_spaceafter.conllu"
-    draft = CorpusDraft(temp_file)
+
+def spaceafter_stage(conll: str, language: str, grs_path: str) -> Corpus:
+    """Add SpaceAfter=No to the MISC column, and load the treebank into Grew."""
+    draft = CorpusDraft(conll)
     draft.map(utils.set_spaceafter_from_text, in_place=True)
-    conll = Corpus(draft).to_conll()
-    Path(temp_out).write_text(conll)  # type: ignore
-    temp_file = temp_out
+    return Corpus(draft)
+
+
+def deprel_stage(corpus: Corpus, language: str, grs_path: str) -> str:
+    """Apply the main Grew strategy for the language."""
+    grs = load_grs(grs_path)
+    corpus = grs.apply(corpus, strat=f"main_{language}")
+    return corpus.to_conll()  # type: ignore
+
+
+def udapi_stage(conll: str, language: str, grs_path: str) -> str:
+    """Apply the udapi fixes."""
+    return utils.udapi_fixes_conll(conll)
+
+
+def postprocess_stage(conll: str, language: str, grs_path: str) -> str:
+    """Apply the Grew postprocess strategy."""
+    grs = load_grs(grs_path)
+    corpus = Corpus(conll)
+    corpus = grs.apply(corpus, strat="postprocess")
+    return corpus.to_conll()  # type: ignore
+
 
-    logging.info("-03- Convert dependency relations")
-    temp_out = f"{temp_dir}/03_grew_transform_deprels.conllu"
-    corpus = Corpus(temp_file)
+def newpar_stage(conll: str, language: str, grs_path: str) -> str:
+    """Replace the newpar comment lines that come out of Grew garbled."""
+    return conll.replace("#  = # newpar", "# newpar")
+
+
+# Each conversion stage: (name of the debug dump, log message, stage function)
+STAGES = [
+    (
+        "01_convert_morph_output",
+        "Convert morphology: feats and pos-tags",
+        morphology_stage,
+    ),
+    ("02_udapy_spaceafter", "Add MISC annotation 'SpaceAfter=No'", spaceafter_stage),
+    ("03_grew_transform_deprels", "Convert dependency relations", deprel_stage),
+    ("04_udapy_fixpunct", "Fix punctuation with udapy", udapi_stage),
+    (
+        "05_grew_transform_postprocess",
+        "Fix errors introduced by udapy",
+        postprocess_stage,
+    ),
+    ("06_replace_newpar", "Replace invalid newpar lines", newpar_stage),
+]
+
+
+def run_stages(
+    conllu_data: dict,
+    language: str,
+    grs_path: str,
+    tmp_dir: str | Path | None = None,
+    metrics: list[dict] | None = None,
+    profile_dir: str | Path | None = None,
+    measure_memory: bool = False,
+) -> str:
+    """Run the conversion stages on parsed NDT data and return the UD conllu string.
+
+    The result of each stage is passed on to the next in memory.
+    Set `tmp_dir` to also write each intermediate stage output there for debugging.
+    The metrics record of each stage is appended to `metrics`, if it is given,
+    and each stage is profiled into `profile_dir`, if it is given.
+    With `measure_memory`, the peak memory of each stage is recorded too.
+    """
+    data = conllu_data
+    record = None
+    for number, (name, description, stage) in enumerate(STAGES, start=1):
+        logging.info(f"-{number:02}- {description}")
+        data, record = measure_stage(
+            name,
+            stage,
+            data,
+            language,
+            grs_path,
+            profile_dir,
+            previous=record,
+            measure_memory=measure_memory,
+        )
+        logging.info(
+            f"-{number:02}- done in {record['wall_seconds']:.2f} s "
+            f"(CPU {record['cpu_seconds']:.2f} s)"
+        )
+        if metrics is not None:
+            metrics.append(record)
+        if tmp_dir is not None:
+            conll = data if isinstance(data, str) else data.to_conll()
+            dump_stage(tmp_dir, f"{name}.conllu", conll)  # type: ignore
+    return data  # type: ignore
+
+
+def _convert_shard(
+    lines: list[str],
+    language: str,
+    grs_path: str,
+    tmp_dir: str | Path | None,
+    profile_dir: str | Path | None = None,
+    measure_memory: bool = False,
+) -> tuple[str, list[dict]]:
+    """Parse one shard of NDT conll lines and run the conversion stages on it.
+
+    Returns the converted shard and the metrics records of its stages.
+    """
+    metrics = []
+    conll = run_stages(
+        parse_conll_lines(lines),
+        language,
+        grs_path,
+        tmp_dir,
+        metrics,
+        profile_dir,
+        measure_memory,
+    )
+    return conll, metrics
+
+
+def _merge_shards(shard_outputs: list[str]) -> str:
+    """Concatenate converted shards, keeping only the first `# global.columns` header."""
+    merged = shard_outputs[:1]
+    for conll in shard_outputs[1:]:
+        while conll.startswith("# global.columns"):
+            conll = conll.split("\n", 1)[1] if "\n" in conll else ""
+        merged.append(conll)
+    return "".join(merged)
+
+
+def _convert_lines(
+    lines: list[str],
+    language: str,
+    grs_path: str,
+    tmp_dir: str | Path | None,
+    shards: int,
+    metrics: list[dict],
+    profile_dir: str | Path | None,
+    measure_memory: bool = False,
+) -> str:
+    """Convert NDT conll lines, in parallel shards if `shards` > 1."""
+    if shards <= 1:
+        return run_stages(
+            parse_conll_lines(lines),
+            language,
+            grs_path,
+            tmp_dir,
+            metrics,
+            profile_dir,
+            measure_memory,
+        )
+
+    shard_lines = split_conll_lines(lines, shards)
+    logging.info(f"Converting in {len(shard_lines)} shards")
+    tasks = []
+    for i, shard in enumerate(shard_lines, start=1):
+        shard_dir = None if tmp_dir is None else Path(tmp_dir) / f"shard_{i:03}"
+        shard_profile_dir = (
+            None if profile_dir is None else Path(profile_dir) / f"shard_{i:03}"
+        )
+        tasks.append(
+            (shard, language, grs_path, shard_dir, shard_profile_dir, measure_memory)
+        )
+    shard_outputs = []
+    for i, (shard_conll, shard_metrics) in enumerate(
+        _run_parallel(_convert_shard, tasks, len(tasks)), start=1
+    ):
+        shard_outputs.append(shard_conll)
+        metrics.extend({"shard": i, **record} for record in shard_metrics)
+    return _merge_shards(shard_outputs)
+
+
+def convert_ndt_to_ud(
+    input_file: str,
+    language: str,
+    output_file: str,
+    grs_path: str,
+    tmp_dir: str | Path | None = None,
+    shards: int = 1,
+    metrics_file: str | Path | None = None,
+    profile_dir: str | Path | None = None,
+    cache_file: str | Path | None = None,
+    cache_max_bytes: int = MAX_CACHE_BYTES,
+    incremental: bool = False,
+) -> None:
+    """Convert NDT treebank format to UD format.
+
+    With `shards` > 1, the input is split into that many shards of whole
+    sentences that are converted in parallel worker processes and merged
+    back in their original order.
+    Set `tmp_dir` to write each intermediate stage output there for debugging.
+    Set `metrics_file` to append a JSON metrics record per stage to it, and
+    `profile_dir` to write a cProfile and tracemalloc dump per stage there.
+    Set `cache_file` to reuse the output of sentences converted in earlier runs
+    from that sentence cache, and only convert new or changed sentences.
+    With `incremental`, the state of the conversion is stored next to the output,
+    and a re-run after a change in the Grew rules only converts the sentences
+    the changed rules can affect.
+    """
     if Path(grs_path).exists():
         logging.debug(f"Using Grew rules from {Path(grs_path)}")
     else:
@@ -48,43 +271,188 @@ def convert_ndt_to_ud(
             "Please ensure the rules are available in the specified path."
         )
         return
-    grs = GRS(str(grs_path))
+    logging.info("START converting NDT treebank to UD")
+    start = time.perf_counter()
+    metrics = []
+    measure_memory = metrics_file is not None or profile_dir is not None
 
-    corpus = grs.apply(corpus, strat=f"main_{language}")
-    conll = corpus.to_conll()  # type: ignore
-    Path(temp_out).write_text(conll)  # type: ignore
-    temp_file = temp_out
-
-    logging.info("-04- Fix punctuation with udapy")
-    temp_out = f"{temp_dir}/04_udapy_fixpunct.conllu"
-    utils.udapi_fixes(temp_file, temp_out)
-    temp_file = temp_out
-
-    logging.info("-05- Fix errors introduced by udapy")
-    temp_out = f"{temp_dir}/05_grew_transform_postprocess.conllu"
-    corpus = Corpus(temp_file)
-    grs = GRS(str(grs_path))
-    corpus = grs.apply(corpus, strat="postprocess")
-    conll = corpus.to_conll()  # type: ignore
-    Path(temp_out).write_text(conll)  # type: ignore
-    temp_file = temp_out
+    def convert_lines(lines: list[str]) -> str:
+        return _convert_lines(
+            lines,
+            language,
+            grs_path,
+            tmp_dir,
+            shards,
+            metrics,
+            profile_dir,
+            measure_memory,
+        )
 
-    logging.info("-06- Replace invalid newpar lines")
-    temp_out = f"{temp_dir}/06_replace_newpar.conllu"
-    with open(temp_file, "r") as infile, open(temp_out, "w") as outfile:
-        for line in infile:
-            outfile.write(line.replace("#  = # newpar", "# newpar"))
+    if incremental:
+        state_dir = Path(output_file).parent / STATE_DIR / Path(output_file).stem
+        conll = convert_incremental(input_file, language, grs_path, state_dir)
+    elif cache_file is not None:
+        cache = SentenceCache(grs_path, language, cache_file, cache_max_bytes)
+        try:
+            conll = convert_with_cache(filereadlines(input_file), cache, convert_lines)
+        finally:
+            cache.close()
+    elif shards > 1:
+        conll = convert_lines(filereadlines(input_file))
+    else:
+        invalid_lines = []
+        conllu_data = {
+            "file": Path(input_file).name,
+            "sentences": iter_conll_sentences(input_file, invalid_lines),
+            "invalid_lines": invalid_lines,
+        }
+        conll = run_stages(
+            conllu_data,
+            language,
+            grs_path,
+            tmp_dir,
+            metrics,
+            profile_dir,
+            measure_memory,
+        )
 
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy(temp_out, output_file)
+
+    def write_output(conll: str, language: str, grs_path: str) -> str:
+        output_path.write_text(conll)
+        return conll
+
+    _, record = measure_stage(
+        "07_write_output",
+        write_output,
+        conll,
+        language,
+        grs_path,
+        profile_dir,
+        measure_memory=measure_memory,
+    )
+    metrics.append(record)
     logging.info(f"UD treebank written to {output_file}")
 
+    metrics.append(_total_metrics(metrics, time.perf_counter() - start, input_file))
+    for record in metrics:
+        record["file"] = Path(input_file).name
+        logging.debug(f"Metrics: {json.dumps(record)}")
+    logging.info(
+        f"Converted {metrics[-1]['sentences']} sentences, "
+        f"{metrics[-1]['tokens']} tokens in {metrics[-1]['wall_seconds']:.2f} s"
+    )
+    if metrics_file is not None:
+        write_metrics(metrics_file, metrics)
+
+
+def _total_metrics(records: list[dict], wall_seconds: float, input_file) -> dict:
+    """Sum up the stage metrics records of a file into one record for the file."""
+
+    def peak(key):
+        values = [record[key] for record in records if record.get(key) is not None]
+        return max(values) if values else None
+
+    def total(key):
+        values = [record[key] for record in records if record.get(key) is not None]
+        return round(sum(values), 4) if values else None
+
+    return {
+        "stage": "total",
+        "wall_seconds": round(wall_seconds, 4),
+        "cpu_seconds": total("cpu_seconds"),
+        "backend_cpu_seconds": total("backend_cpu_seconds"),
+        "sentences": records[-1]["sentences"],
+        "tokens": records[-1]["tokens"],
+        "bytes_in": Path(input_file).stat().st_size,
+        "bytes_out": records[-1]["bytes_out"],
+        "peak_rss_mb": peak("peak_rss_mb"),
+        "backend_peak_rss_mb": peak("backend_peak_rss_mb"),
+    }
+
+
+class _LogBuffer(logging.Handler):
+    """Collect log messages in a worker process to replay them in the main process."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record.levelno, record.getMessage()))
+
+
+def _run_in_worker(func, args: tuple, log_level: int) -> tuple:
+    """Call `func(*args)` in a worker process.
+
+    Returns the result together with the log messages emitted during the call.
+    """
+    root_logger = logging.getLogger()
+    root_logger.setLevel(log_level)
+    buffer = _LogBuffer()
+    root_logger.addHandler(buffer)
+    try:
+        result = func(*args)
+    finally:
+        root_logger.removeHandler(buffer)
+    return result, buffer.records
+
+
+def _run_parallel(func, tasks: list[tuple], jobs: int) -> list:
+    """Call `func` on the arguments in each task in worker processes.
+
+    Workers are spawned, not forked, so each one starts its own grewpy backend
+    and loads its own GRS. Results are returned, and log messages replayed,
+    in the order of the tasks.
+    """
+    log_level = logging.getLogger().getEffectiveLevel()
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(tasks)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        for result, records in executor.map(
+            _run_in_worker,
+            [func] * len(tasks),
+            tasks,
+            [log_level] * len(tasks),
+        ):
+            for levelno, message in records:
+                logging.log(levelno, message)
+            results.append(result)
+    return results
+
+
+def convert_parallel(tasks: list[tuple], jobs: int) -> None:
+    """Convert several files concurrently in worker processes.
+
+    Each task holds the positional arguments to convert_ndt_to_ud.
+    """
+    _run_parallel(convert_ndt_to_ud, tasks, jobs)
+
 
 def convert(args):
     """Execute CLI subcommand to convert the NDT treebank to UD."""
+    if args.incremental:
+        unsupported = [
+            option
+            for option, used in (
+                ("--shards", args.shards > 1),
+                ("--cache", args.cache),
+                ("--tmp_dir", args.tmp_dir is not None),
+                ("--metrics", args.metrics is not None),
+                ("--profile", args.profile is not None),
+            )
+            if used
+        ]
+        if unsupported:
+            logging.error(
+                f"--incremental can't be combined with {', '.join(unsupported)}."
+            )
+            return
     if args.ndt_file.is_dir():
-        input_files = list(args.ndt_file.glob("*.conll*"))
+        input_files = sorted(args.ndt_file.glob("*.conll*"))
         if not input_files:
             logging.error(
                 "No .conll or .conllu files found in the specified directory."
@@ -97,11 +465,37 @@ def convert(args):
         input_files = [args.ndt_file]
 
     output_dir = args.output
-    generated_files = []
+    if args.metrics is not None and args.metrics.exists():
+        args.metrics.unlink()
+    tasks = []
     for file in input_files:
         output_file = output_dir / (file.stem + "_output.conllu")
-        generated_files.append(output_file)
-        convert_ndt_to_ud(file, args.language, output_file, args.grew_rules)
+        tmp_dir, profile_dir = args.tmp_dir, args.profile
+        if len(input_files) > 1:
+            tmp_dir = None if tmp_dir is None else tmp_dir / file.stem
+            profile_dir = None if profile_dir is None else profile_dir / file.stem
+        tasks.append(
+            (
+                file,
+                args.language,
+                output_file,
+                args.grew_rules,
+                tmp_dir,
+                args.shards,
+                args.metrics,
+                profile_dir,
+                args.cache_file if args.cache else None,
+                args.cache_size * 1024 * 1024,
+                args.incremental,
+            )
+        )
+    generated_files = [task[2] for task in tasks]
+
+    if args.jobs > 1 and len(tasks) > 1:
+        convert_parallel(tasks, args.jobs)
+    else:
+        for task in tasks:
+            convert_ndt_to_ud(*task)
     if args.validate:
         print("Run the validation on the output.")
         args.ud_path = generated_files
@@ -115,16 +509,135 @@ def _validate(args):
         report_file=args.report_file,
         validation_script=args.validation_script,
         summarize=args.summarize,
+        jobs=args.jobs,
+        cache_file=None if args.no_validation_cache else args.validation_cache,
+        details_file=args.error_details,
     )
 
 
+def _evaluate(args):
+    """Wrapper for the CLI call."""
+    pairs = evaluation.evaluation_pairs(args.system, args.gold)
+    if not pairs:
+        logging.error(f"No files in {args.system} with the same name in {args.gold}")
+        raise SystemExit(1)
+    reports = []
+    for system_file, gold_file in pairs:
+        result = evaluation.evaluate(
+            system_file, gold_file, universal_deprels=args.universal_deprels
+        )
+        reports.append(evaluation.format_report(result))
+        if args.confusion is not None:
+            evaluation.write_confusion_matrices(result, args.confusion)
+    report = "\n".join(reports)
+    if args.report_file is not None:
+        Path(args.report_file).write_text(report, encoding="utf-8")
+        logging.info(f"Evaluation report written to {args.report_file}")
+    print(report)
+
+
+def _diff(args):
+    """Wrapper for the CLI call."""
+    if args.old.is_dir() and not args.new.is_dir():
+        old_file = args.old / args.new.name
+        if not old_file.exists():
+            logging.error(f"No file in {args.old} with the same name as {args.new}")
+            raise SystemExit(1)
+        pairs = [(old_file, args.new)]
+    else:
+        pairs = evaluation.evaluation_pairs(args.old, args.new)
+    if not pairs:
+        logging.error(f"No files in {args.old} with the same name in {args.new}")
+        raise SystemExit(1)
+    diffs = [
+        treebank_diff.diff_treebanks(old_file, new_file, jobs=args.jobs)
+        for old_file, new_file in pairs
+    ]
+    report = "\n".join(
+        treebank_diff.format_report(diff, max_sentences=args.show) for diff in diffs
+    )
+    if args.report_file is not None:
+        Path(args.report_file).write_text(report, encoding="utf-8")
+        logging.info(f"Diff report written to {args.report_file}")
+    if args.json is not None:
+        Path(args.json).write_text(json.dumps(diffs, indent=2), encoding="utf-8")
+    print(report)
+
+
+def _benchmark(args):
+    """Wrapper for the CLI call."""
+    input_files = args.input_files or benchmark.BUNDLED_TREEBANKS
+    results = benchmark.run_benchmarks(
+        input_files,
+        grs_path=args.grew_rules,
+        output_file=args.output,
+        language=args.language,
+        repeat=args.repeat,
+    )
+    for result in results["results"]:
+        print(
+            f"{result['file']}: {result['sentences']} sentences, "
+            f"{result['tokens']} tokens"
+        )
+        stages = {**result["stages"], "end_to_end": result["end_to_end"]}
+        for name, metrics in stages.items():
+            print(
+                f"\t{name:<28} {metrics['seconds']:>8.3f} s "
+                f"{metrics['tokens_per_sec'] or 0:>10.0f} tokens/s"
+            )
+    if args.compare is not None:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = benchmark.compare_benchmarks(
+            baseline, results, tolerance=args.tolerance
+        )
+        for regression in regressions:
+            logging.error(f"Throughput regression: {regression}")
+        if regressions:
+            raise SystemExit(1)
+
+
+def _extract(args):
+    """Wrapper for the CLI call."""
+    sent_ids = list(args.sent_ids)
+    if args.id_file is not None:
+        sent_ids += [line.strip() for line in filereadlines(args.id_file) if line]
+    with SentenceIndex(args.input_file) as index:
+        if args.output is None:
+            print(index.subcorpus(sent_ids), end="")
+        else:
+            index.write_subcorpus(sent_ids, args.output)
+            logging.info(f"Sentences written to {args.output}")
+
+
+def _profile_grew(args):
+    """Wrapper for the CLI call."""
+    profile = grew_profile.profile_conversion(
+        args.ndt_file, args.language, args.grew_rules
+    )
+    report = grew_profile.format_report(profile, top=args.top)
+    Path(args.report_file).write_text(report, encoding="utf-8")
+    logging.info(f"Grew profile report written to {args.report_file}")
+    print(report)
+    if args.json is not None:
+        Path(args.json).write_text(json.dumps(profile, indent=2), encoding="utf-8")
+
+
 def validate(
     ud_path: Path | list[Path],
     report_file: Path,
     validation_script: str = "tools/validate.py",
     summarize: str | None = None,
+    jobs: int = 1,
+    cache_file: str | Path | None = VALIDATION_CACHE_FILE,
+    details_file: str | Path | None = None,
 ):
-    """Run the UD tools/validate.py script on a UD treebank"""
+    """Run the UD tools validator on a UD treebank.
+
+    The validator is run in-process, on `jobs` files in parallel, if the tools
+    repository has the udtools package. Otherwise the validation script is run
+    in a subprocess. In-process, only the sentences missing from the validation
+    cache in `cache_file` are validated; set it to None to validate all sentences.
+    """
     if not Path(validation_script).exists():
         logging.error(
             "Can't find the path to the validation script. "
@@ -140,27 +653,39 @@ def validate(
     else:
         input_files = [ud_path]
 
-    validation_process = subprocess.run(
-        [
-            "python",
+    try:
+        validation.validate_treebank(
+            input_files,
+            report_file,
             validation_script,
-            "--max-err",
-            "0",  # output all errors
-            "--lang",
-            "no",
-        ]
-        + input_files,
-        capture_output=True,
-        text=True,
-    )
-    with open(report_file, "w") as f:
-        f.write(validation_process.stderr)
+            jobs=jobs,
+            cache_file=cache_file,
+        )
+    except ImportError as err:
+        logging.info(f"Running the validation script in a subprocess: {err}")
+        validation_process = subprocess.run(
+            [
+                "python",
+                validation_script,
+                "--max-err",
+                "0",  # output all errors
+                "--lang",
+                "no",
+            ]
+            + input_files,
+            capture_output=True,
+            text=True,
+        )
+        with open(report_file, "w") as f:
+            f.write(validation_process.stderr)
     logging.info(
         "Validation report written to %s",
         report_file,
     )
     if summarize is not None:
-        utils.report_errors(report_file, output_file=summarize)
+        utils.report_errors(
+            report_file, output_file=summarize, details_file=details_file
+        )
 
 
 def main():
@@ -217,6 +742,74 @@ def main():
         type=Path,
         help="Grew GRS file with treebank conversion rules.",
     )
+    parser_convert.add_argument(
+        "--tmp_dir",
+        type=Path,
+        default=None,
+        help="Write the output of each conversion stage to this folder for debugging.",
+    )
+    parser_convert.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of input files to convert in parallel worker processes.",
+    )
+    parser_convert.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help=(
+            "Split each input file into this many sentence shards "
+            "that are converted in parallel worker processes."
+        ),
+    )
+    parser_convert.add_argument(
+        "--metrics",
+        type=Path,
+        default=None,
+        help="Write a JSON metrics record for each conversion stage to this file.",
+    )
+    parser_convert.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        help=(
+            "Profile each conversion stage with cProfile and tracemalloc, "
+            "and write the dumps to this folder."
+        ),
+    )
+    parser_convert.add_argument(
+        "--cache",
+        action="store_true",
+        help=(
+            "Reuse the output of sentences converted in earlier runs from the "
+            "sentence cache, and store the new ones in it."
+        ),
+    )
+    parser_convert.add_argument(
+        "--cache_file",
+        type=Path,
+        default=SENTENCE_CACHE_FILE,
+        help="SQLite file of the sentence cache, used with --cache.",
+    )
+    parser_convert.add_argument(
+        "--cache_size",
+        type=int,
+        default=MAX_CACHE_BYTES // (1024 * 1024),
+        help="Maximum size of the sentence cache in MB.",
+    )
+    parser_convert.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Store the conversion state in the output folder, under "
+            f"{STATE_DIR}/<output file stem>, and after a "
+            "change in the Grew rules only reconvert the sentences the change "
+            "affects. Can't be combined with --shards, --cache, --tmp_dir, "
+            "--metrics or --profile."
+        ),
+    )
     parser_convert.add_argument(
         "--validate",
         action="store_true",
@@ -227,6 +820,9 @@ def main():
         report_file=workspace_root / "validation-report.txt",
         validation_script=workspace_root / "tools" / "validate.py",
         summarize="validation_summary.txt",
+        validation_cache=VALIDATION_CACHE_FILE,
+        no_validation_cache=False,
+        error_details=None,
     )
 
     # Subcommand options for validation
@@ -263,8 +859,262 @@ def main():
         const="error_summary.txt",
         help="Sum up the error types in the validation report.",
     )
+    parser_validate.add_argument(
+        "--error_details",
+        type=Path,
+        default=None,
+        help=(
+            "With --summarize, also write every error to this CSV file, "
+            "or Parquet file if it ends with .parquet."
+        ),
+    )
+    parser_validate.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of files to validate in parallel worker processes.",
+    )
+    parser_validate.add_argument(
+        "--no_cache",
+        "--no-cache",
+        dest="no_validation_cache",
+        action="store_true",
+        help="Validate every sentence, without replaying the validation cache.",
+    )
+    parser_validate.add_argument(
+        "--cache_file",
+        dest="validation_cache",
+        type=Path,
+        default=VALIDATION_CACHE_FILE,
+        help="SQLite file with the validation results of earlier runs.",
+    )
     parser_validate.set_defaults(func=_validate)
 
+    # Subcommand options for benchmarking
+    parser_benchmark = subparsers.add_parser(
+        "benchmark",
+        parents=[parent_parser],
+        description="Time each conversion stage on NDT files",
+    )
+    parser_benchmark.add_argument(
+        "-i",
+        "--input_files",
+        nargs="*",
+        type=Path,
+        help="NDT files to benchmark. Defaults to the bundled treebanks.",
+    )
+    parser_benchmark.add_argument(
+        "-l",
+        "--language",
+        choices=["nb", "nn"],
+        default=None,
+        help="Language of the input files. Guessed from the file names by default.",
+    )
+    parser_benchmark.add_argument(
+        "-o",
+        "--output",
+        default=workspace_root / "benchmark.json",
+        type=Path,
+        help="JSON file where the benchmark results are written.",
+    )
+    parser_benchmark.add_argument(
+        "-g",
+        "--grew_rules",
+        default=src_root / "rules" / "NDT_to_UD.grs",
+        type=Path,
+        help="Grew GRS file with treebank conversion rules.",
+    )
+    parser_benchmark.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=1,
+        help="Run each stage this many times and keep the fastest run.",
+    )
+    parser_benchmark.add_argument(
+        "-c",
+        "--compare",
+        type=Path,
+        default=None,
+        help="Earlier benchmark JSON file to check for throughput regressions.",
+    )
+    parser_benchmark.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Allowed relative drop in tokens/sec before reporting a regression.",
+    )
+    parser_benchmark.set_defaults(func=_benchmark)
+
+    # Subcommand options for profiling the Grew rules
+    parser_profile = subparsers.add_parser(
+        "profile_grew",
+        parents=[parent_parser],
+        description="Time the Grew strategies step by step and rank the hot rules",
+    )
+    parser_profile.add_argument(
+        "-l",
+        "--language",
+        required=True,
+        choices=["nb", "nn"],
+        help="Language (must be nb or nn)",
+    )
+    parser_profile.add_argument(
+        "-i", "--ndt_file", required=True, type=Path, help="Input NDT file"
+    )
+    parser_profile.add_argument(
+        "-g",
+        "--grew_rules",
+        default=src_root / "rules" / "NDT_to_UD.grs",
+        type=Path,
+        help="Grew GRS file with treebank conversion rules.",
+    )
+    parser_profile.add_argument(
+        "-r",
+        "--report_file",
+        default=workspace_root / "grew-profile.txt",
+        type=Path,
+        help="Text report with the slowest steps and the hottest rules.",
+    )
+    parser_profile.add_argument(
+        "--json",
+        type=Path,
+        default=None,
+        help="Also write the full profile to this JSON file.",
+    )
+    parser_profile.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Number of rules in the hot rules report.",
+    )
+    parser_profile.set_defaults(func=_profile_grew)
+
+    # Subcommand options for evaluation
+    parser_evaluate = subparsers.add_parser(
+        "evaluate",
+        parents=[parent_parser],
+        description=(
+            "Score converted conllu files against reference files: "
+            "LAS, UAS, UPOS, FEATS and precision and recall per deprel"
+        ),
+    )
+    parser_evaluate.add_argument(
+        "-s",
+        "--system",
+        required=True,
+        type=Path,
+        help="Converted conllu file, or folder of files",
+    )
+    parser_evaluate.add_argument(
+        "-g",
+        "--gold",
+        default=workspace_root / "data" / "UD_official",
+        type=Path,
+        help="Reference conllu file, or folder with files of the same names",
+    )
+    parser_evaluate.add_argument(
+        "--universal_deprels",
+        "--universal-deprels",
+        action="store_true",
+        help="Compare deprels without their subtypes.",
+    )
+    parser_evaluate.add_argument(
+        "-r",
+        "--report_file",
+        type=Path,
+        default=None,
+        help="Also write the evaluation report to this file.",
+    )
+    parser_evaluate.add_argument(
+        "--confusion",
+        type=Path,
+        default=None,
+        help="Write UPOS and deprel confusion matrices as CSV files to this folder.",
+    )
+    parser_evaluate.set_defaults(func=_evaluate)
+
+    # Subcommand options for comparing converted output
+    parser_diff = subparsers.add_parser(
+        "diff",
+        parents=[parent_parser],
+        description=(
+            "Compare new converted output with the committed output "
+            "sentence by sentence, and count the changes by field"
+        ),
+    )
+    parser_diff.add_argument(
+        "-n",
+        "--new",
+        required=True,
+        type=Path,
+        help="New conllu file, or folder of files",
+    )
+    parser_diff.add_argument(
+        "--old",
+        default=workspace_root / "data" / "converted",
+        type=Path,
+        help="Old conllu file, or folder with files of the same names",
+    )
+    parser_diff.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes that compare the changed sentences.",
+    )
+    parser_diff.add_argument(
+        "--show",
+        type=int,
+        default=20,
+        help="Number of changed sentences to list per file in the report.",
+    )
+    parser_diff.add_argument(
+        "-r",
+        "--report_file",
+        type=Path,
+        default=None,
+        help="Also write the diff report to this file.",
+    )
+    parser_diff.add_argument(
+        "--json",
+        type=Path,
+        default=None,
+        help="Write all changes to this JSON file.",
+    )
+    parser_diff.set_defaults(func=_diff)
+
+    # Subcommand options for extracting sentences by id
+    parser_extract = subparsers.add_parser(
+        "extract",
+        parents=[parent_parser],
+        description=(
+            "Extract sentences by sent_id from a conllu file, "
+            "using a sentence index stored next to the file"
+        ),
+    )
+    parser_extract.add_argument(
+        "-i", "--input_file", required=True, type=Path, help="Input conllu file"
+    )
+    parser_extract.add_argument(
+        "sent_ids", nargs="*", default=[], help="Ids of the sentences to extract."
+    )
+    parser_extract.add_argument(
+        "--id_file",
+        type=Path,
+        default=None,
+        help="File with one sent_id per line, to extract as well.",
+    )
+    parser_extract.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="Write the sentences to this conllu file instead of printing them.",
+    )
+    parser_extract.set_defaults(func=_extract)
+
     args = parser.parse_args()
 
     log_levels = [logging.ERROR, logging.INFO, logging.DEBUG]
@@ -0,0 +1,175 @@
+"""Benchmark the conversion stages of convert_ndt_to_ud on CoNLL-U files.
+
+Each stage is timed on its own, and the full conversion end to end.
+Results are stored as JSON, so that runs can be compared to catch throughput
+regressions when the rules or the code change.
+"""
+
+import json
+import logging
+import platform
+import time
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+import ndt2ud
+from ndt2ud.grs_cache import grs_hash
+from ndt2ud.metrics import backend_pid, peak_rss_mb, reset_peak_rss
+from ndt2ud.parse_conllu import parse_conll_file
+
+DATA_DIR = Path(__file__).parents[2] / "data"
+
+BUNDLED_TREEBANKS = [
+    DATA_DIR / "ndt_aligned_with_ud" / "ndt_nb_dev.conllu",
+    DATA_DIR / "ndt_aligned_with_ud" / "ndt_nb_test.conllu",
+    DATA_DIR / "ndt_aligned_with_ud" / "ndt_nn_dev.conllu",
+    DATA_DIR / "ndt_aligned_with_ud" / "ndt_nn_test.conllu",
+    DATA_DIR / "gullkorpus" / "2019_gullkorpus_ndt.conllu",
+]
+
+
+def guess_language(input_file: str | Path) -> str:
+    """Guess the language (nb or nn) of a treebank from its file name."""
+    stem = Path(input_file).stem.lower()
+    return "nn" if "_nn" in stem or "nynorsk" in stem else "nb"
+
+
+def count_sentences_and_tokens(conllu_data: dict) -> tuple[int, int]:
+    sentences = [s for s in conllu_data["sentences"] if s["tokens"]]
+    return len(sentences), sum(len(s["tokens"]) for s in sentences)
+
+
+def measure(func, *args, n_sentences: int = 0, n_tokens: int = 0) -> tuple:
+    """Call func(*args) and measure wall time, throughput and peak memory.
+
+    Returns the result of the call and a dict with the metrics.
+    """
+    pid = backend_pid()
+    reset_peak_rss()
+    if pid is not None:
+        reset_peak_rss(pid)
+
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+
+    metrics = {
+        "seconds": round(seconds, 4),
+        "sentences_per_sec": round(n_sentences / seconds, 1) if seconds else None,
+        "tokens_per_sec": round(n_tokens / seconds, 1) if seconds else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "backend_peak_rss_mb": peak_rss_mb(pid) if pid is not None else None,
+    }
+    return result, metrics
+
+
+def _best(runs: list[dict]) -> dict:
+    """Keep the fastest of several measurements, with the highest peak memory."""
+    best = min(runs, key=lambda metrics: metrics["seconds"]).copy()
+    for key in ("peak_rss_mb", "backend_peak_rss_mb"):
+        values = [run[key] for run in runs if run[key] is not None]
+        best[key] = max(values) if values else None
+    return best
+
+
+def benchmark_file(
+    input_file: str | Path, language: str, grs_path: str | Path, repeat: int = 1
+) -> dict:
+    """Benchmark reading, each conversion stage and the full conversion of one file."""
+    input_file = Path(input_file)
+    logging.info(f"Benchmarking {input_file.name} ({language})")
+
+    _, load_metrics = measure(ndt2ud.load_grs, grs_path)
+    counts = count_sentences_and_tokens(parse_conll_file(input_file))
+    sizes = {"n_sentences": counts[0], "n_tokens": counts[1]}
+
+    stage_runs = {}
+    end_to_end_runs = []
+    for _ in range(repeat):
+        data, metrics = measure(parse_conll_file, input_file, **sizes)
+        stage_runs.setdefault("00_read", []).append(metrics)
+        for name, _, stage in ndt2ud.STAGES:
+            data, metrics = measure(stage, data, language, grs_path, **sizes)
+            stage_runs.setdefault(name, []).append(metrics)
+
+        def convert_file():
+            return ndt2ud.run_stages(parse_conll_file(input_file), language, grs_path)
+
+        _, metrics = measure(convert_file, **sizes)
+        end_to_end_runs.append(metrics)
+
+    return {
+        "file": input_file.name,
+        "language": language,
+        "sentences": counts[0],
+        "tokens": counts[1],
+        "load_grs": load_metrics,
+        "stages": {name: _best(runs) for name, runs in stage_runs.items()},
+        "end_to_end": _best(end_to_end_runs),
+    }
+
+
+def _package_version(package: str) -> str | None:
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return None
+
+
+def run_benchmarks(
+    input_files: list[Path],
+    grs_path: str | Path,
+    output_file: str | Path,
+    language: str | None = None,
+    repeat: int = 1,
+) -> dict:
+    """Benchmark a list of files and write the results to a JSON file."""
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ndt2ud": _package_version("ndt2ud"),
+        "grewpy": _package_version("grewpy"),
+        "udapi": _package_version("udapi"),
+        "rules_hash": grs_hash(grs_path),
+        "repeat": repeat,
+        "results": [
+            benchmark_file(
+                input_file, language or guess_language(input_file), grs_path, repeat
+            )
+            for input_file in input_files
+        ],
+    }
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    logging.info(f"Benchmark results written to {output_file}")
+    return results
+
+
+def compare_benchmarks(
+    baseline: dict, current: dict, tolerance: float = 0.1
+) -> list[str]:
+    """List the stages where the token throughput dropped by more than `tolerance`
+    compared to the baseline. Only files and stages present in both runs are compared.
+    """
+    baseline_files = {result["file"]: result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = baseline_files.get(result["file"])
+        if old is None:
+            continue
+        stages = {**result["stages"], "end_to_end": result["end_to_end"]}
+        old_stages = {**old["stages"], "end_to_end": old["end_to_end"]}
+        for name, metrics in stages.items():
+            if name not in old_stages:
+                continue
+            new_speed = metrics["tokens_per_sec"]
+            old_speed = old_stages[name]["tokens_per_sec"]
+            if new_speed and old_speed and new_speed < old_speed * (1 - tolerance):
+                regressions.append(
+                    f"{result['file']} {name}: {old_speed:.0f} -> {new_speed:.0f} "
+                    f"tokens/sec ({new_speed / old_speed - 1:+.0%})"
+                )
+    return regressions
@@ -0,0 +1,190 @@
+"""Store treebanks in a columnar format, as Parquet or Arrow files.
+
+A treebank is stored as a directory with two tables:
+
+- the token table, with one row per token and one column per conll field,
+  where ID and HEAD are integers and the other fields are dictionary-encoded;
+- the sentence table, with one row per sentence: the offset of its first token
+  in the token table, its `sent_id`, `text`, `newpar` and `newdoc`, and the
+  order of its metadata and any other metadata, as JSON.
+
+The name of the source file and its invalid lines are kept in the schema
+metadata of the sentence table, so that reading the directory gives back the
+same dict as `parse_conll_file`, and `write_conll` writes the same conllu.
+Needs pyarrow, from the `arrow` extra: `pip install ndt2ud[arrow]`.
+"""
+
+import json
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError as err:
+    raise ImportError(
+        "Columnar treebanks need pyarrow, install it with `pip install ndt2ud[arrow]`"
+    ) from err
+
+from ndt2ud.parse_conllu import CONLLFIELDS, Sentence, Token
+
+TOKEN_TABLE = "tokens"
+SENTENCE_TABLE = "sentences"
+SENTENCE_COLUMNS = ["sent_id", "text", "newpar", "newdoc"]
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+TOKEN_SCHEMA = pa.schema(
+    [
+        (field, pa.int32())
+        if field in ("ID", "HEAD")
+        else (field, pa.dictionary(pa.int32(), pa.string()))
+        for field in CONLLFIELDS
+    ]
+)
+SENTENCE_SCHEMA = pa.schema(
+    [
+        ("offset", pa.int64()),
+        ("sent_id", pa.string()),
+        ("text", pa.string()),
+        ("newpar", pa.bool_()),
+        ("newdoc", pa.bool_()),
+        ("metadata_order", pa.dictionary(pa.int32(), pa.string())),
+        ("metadata", pa.dictionary(pa.int32(), pa.string())),
+    ]
+)
+
+
+def _table_file(path: Path, table: str) -> Path:
+    for suffix in FORMATS.values():
+        if (path / f"{table}{suffix}").exists():
+            return path / f"{table}{suffix}"
+    raise FileNotFoundError(f"No {table} table in {path}")
+
+
+def _write_table(table: pa.Table, path: Path, file_format: str) -> None:
+    if file_format == "parquet":
+        pq.write_table(table, path)
+    else:
+        feather.write_feather(table, path, compression="uncompressed")
+
+
+def _read_table(path: Path, columns: list[str] | None = None) -> pa.Table:
+    if path.suffix == ".parquet":
+        return pq.read_table(path, columns=columns)
+    return feather.read_table(path, columns=columns, memory_map=True)
+
+
+def treebank_tables(data: dict) -> tuple[pa.Table, pa.Table]:
+    """Build the token table and the sentence table of a treebank dict."""
+    fields = {field: [] for field in CONLLFIELDS}
+    sentences = {name: [] for name in SENTENCE_SCHEMA.names}
+    offset = 0
+    for sentence in data["sentences"]:
+        tokens = sentence["tokens"]
+        for token in tokens:
+            for field, value in zip(CONLLFIELDS, token.values()):
+                fields[field].append(value)
+        meta = {key: value for key, value in sentence.items() if key != "tokens"}
+        sentences["offset"].append(offset)
+        sentences["sent_id"].append(meta.pop("sent_id", None))
+        sentences["text"].append(meta.pop("text", None))
+        sentences["newpar"].append(bool(meta.pop("newpar", False)))
+        sentences["newdoc"].append(bool(meta.pop("newdoc", False)))
+        sentences["metadata_order"].append(json.dumps(list(sentence)[1:]))
+        sentences["metadata"].append(json.dumps(meta, ensure_ascii=False))
+        offset += len(tokens)
+
+    token_table = pa.Table.from_pydict(fields, schema=TOKEN_SCHEMA)
+    sentence_table = pa.Table.from_pydict(
+        sentences,
+        schema=SENTENCE_SCHEMA.with_metadata(
+            {
+                "file": data.get("file", ""),
+                "invalid_lines": json.dumps(data.get("invalid_lines", [])),
+            }
+        ),
+    )
+    return token_table, sentence_table
+
+
+def write_treebank(data: dict, path: str | Path, file_format: str = "parquet"):
+    """Store a treebank dict in the directory `path`, as Parquet or Arrow files."""
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown format {file_format}, use one of {list(FORMATS)}")
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for table in (TOKEN_TABLE, SENTENCE_TABLE):
+        for suffix in FORMATS.values():
+            (path / f"{table}{suffix}").unlink(missing_ok=True)
+    token_table, sentence_table = treebank_tables(data)
+    suffix = FORMATS[file_format]
+    _write_table(token_table, path / f"{TOKEN_TABLE}{suffix}", file_format)
+    _write_table(sentence_table, path / f"{SENTENCE_TABLE}{suffix}", file_format)
+
+
+def read_token_table(path: str | Path, columns: list[str] | None = None) -> pa.Table:
+    """Read the token table of a stored treebank, or only some of its columns."""
+    return _read_table(_table_file(Path(path), TOKEN_TABLE), columns)
+
+
+def read_sentence_table(path: str | Path) -> pa.Table:
+    """Read the sentence table of a stored treebank."""
+    return _read_table(_table_file(Path(path), SENTENCE_TABLE))
+
+
+def _column_values(column: pa.ChunkedArray) -> list:
+    """The values of a column as a list, looking up each dictionary value once."""
+    if not pa.types.is_dictionary(column.type):
+        return column.to_pylist()
+    values = []
+    for chunk in column.chunks:
+        dictionary = chunk.dictionary.to_pylist()
+        values += [dictionary[i] for i in chunk.indices.to_pylist()]
+    return values
+
+
+def read_treebank(path: str | Path) -> dict:
+    """Read a stored treebank into the same dict as `parse_conll_file`."""
+    token_table = read_token_table(path)
+    sentence_table = read_sentence_table(path)
+    schema_metadata = sentence_table.schema.metadata or {}
+
+    rows = zip(*(_column_values(token_table.column(field)) for field in CONLLFIELDS))
+    tokens = [Token.from_fields(row) for row in rows]
+    columns = {
+        name: _column_values(sentence_table.column(name))
+        for name in sentence_table.column_names
+    }
+    offsets = columns["offset"] + [len(tokens)]
+    decoded = {}
+    sentences = []
+    for i, (order, metadata) in enumerate(
+        zip(columns["metadata_order"], columns["metadata"])
+    ):
+        for value in (order, metadata):
+            if value not in decoded:
+                decoded[value] = json.loads(value)
+        meta = decoded[metadata] | {name: columns[name][i] for name in SENTENCE_COLUMNS}
+        sentence = Sentence(tokens[offsets[i] : offsets[i + 1]])
+        sentence.meta = {key: meta[key] for key in decoded[order]}
+        sentences.append(sentence)
+
+    return {
+        "file": schema_metadata.get(b"file", b"").decode(),
+        "sentences": sentences,
+        "invalid_lines": json.loads(schema_metadata.get(b"invalid_lines", b"[]")),
+    }
+
+
+def value_counts(path: str | Path, field: str) -> dict[str, int]:
+    """Count the values of a token field in a stored treebank, most common first."""
+    column = read_token_table(path, [field]).column(field)
+    if pa.types.is_dictionary(column.type):
+        column = column.cast(column.type.value_type)
+    counts = column.value_counts().to_pylist()
+    return dict(
+        sorted(
+            ((count["values"], count["counts"]) for count in counts),
+            key=lambda item: -item[1],
+        )
+    )
@@ -0,0 +1,192 @@
+"""Evaluate a converted treebank against a reference treebank.
+
+The sentences of the two files are aligned by sent_id, or by their order if a
+file has sentences without a unique sent_id. Sentences whose tokens have
+different forms in the two files are left out and counted. The fields of the
+aligned tokens are compared as NumPy arrays, to compute the attachment scores
+(UAS and LAS), the UPOS and FEATS accuracy, precision and recall per deprel,
+and confusion matrices of the UPOS tags and deprels.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ndt2ud.parse_conllu import iter_conll_sentences
+
+EVALUATED_FIELDS = ["FORM", "UPOS", "FEATS", "HEAD", "DEPREL"]
+
+
+def _sent_ids(sentences: list) -> list | None:
+    """The sent_id of each sentence, or None if they are not unique."""
+    sent_ids = [sentence.get("sent_id") for sentence in sentences]
+    if None in sent_ids or len(set(sent_ids)) != len(sent_ids):
+        return None
+    return sent_ids
+
+
+def align_treebanks(system_file: str | Path, gold_file: str | Path) -> dict:
+    """Align the tokens of a system and a gold conllu file.
+
+    Returns the aligned fields of each file as arrays, with the keys
+    "system" and "gold", and the number of sentences that could not be aligned
+    under "unaligned_sentences".
+    """
+    system = list(iter_conll_sentences(system_file))
+    gold = list(iter_conll_sentences(gold_file))
+    system_keys, gold_keys = _sent_ids(system), _sent_ids(gold)
+    if system_keys is None or gold_keys is None:
+        system_keys, gold_keys = range(len(system)), range(len(gold))
+    gold_by_key = dict(zip(gold_keys, gold))
+
+    fields = {
+        name: {field: [] for field in EVALUATED_FIELDS} for name in ("system", "gold")
+    }
+    unaligned = len(gold_by_key.keys() - set(system_keys))
+    for key, system_sentence in zip(system_keys, system):
+        gold_sentence = gold_by_key.get(key)
+        if gold_sentence is None:
+            unaligned += 1
+            continue
+        system_tokens, gold_tokens = system_sentence.tokens, gold_sentence.tokens
+        if [token["FORM"] for token in system_tokens] != [
+            token["FORM"] for token in gold_tokens
+        ]:
+            unaligned += 1
+            continue
+        for name, tokens in (("system", system_tokens), ("gold", gold_tokens)):
+            for field in EVALUATED_FIELDS:
+                fields[name][field].extend(token[field] for token in tokens)
+
+    return {
+        name: {
+            field: np.array(values, dtype=int if field == "HEAD" else object)
+            for field, values in columns.items()
+        }
+        for name, columns in fields.items()
+    } | {"unaligned_sentences": unaligned}
+
+
+def _ratio(numerator, denominator) -> float:
+    return float(numerator / denominator) if denominator else 0.0
+
+
+def deprel_scores(
+    system_deprels: np.ndarray, gold_deprels: np.ndarray, correct: np.ndarray
+) -> pd.DataFrame:
+    """Precision, recall and F1 of each deprel, where a token is correct if
+    both its head and its deprel are correct."""
+    labels, codes = np.unique(
+        np.concatenate([system_deprels, gold_deprels]).astype(str), return_inverse=True
+    )
+    system_codes, gold_codes = np.split(codes, 2)
+    n_labels = len(labels)
+    system_counts = np.bincount(system_codes, minlength=n_labels)
+    gold_counts = np.bincount(gold_codes, minlength=n_labels)
+    correct_counts = np.bincount(gold_codes[correct], minlength=n_labels)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(system_counts, correct_counts / system_counts, 0.0)
+        recall = np.where(gold_counts, correct_counts / gold_counts, 0.0)
+        f1 = np.where(
+            precision + recall, 2 * precision * recall / (precision + recall), 0.0
+        )
+    return pd.DataFrame(
+        {
+            "gold": gold_counts,
+            "system": system_counts,
+            "correct": correct_counts,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+        },
+        index=pd.Index(labels, name="deprel"),
+    )
+
+
+def confusion_matrix(
+    system_labels: np.ndarray, gold_labels: np.ndarray
+) -> pd.DataFrame:
+    """Count each pair of gold (rows) and system (columns) labels."""
+    labels, codes = np.unique(
+        np.concatenate([gold_labels, system_labels]).astype(str), return_inverse=True
+    )
+    gold_codes, system_codes = np.split(codes, 2)
+    n_labels = len(labels)
+    counts = np.bincount(
+        gold_codes * n_labels + system_codes, minlength=n_labels * n_labels
+    ).reshape(n_labels, n_labels)
+    return pd.DataFrame(
+        counts,
+        index=pd.Index(labels, name="gold"),
+        columns=pd.Index(labels, name="system"),
+    )
+
+
+def evaluate(
+    system_file: str | Path, gold_file: str | Path, universal_deprels: bool = False
+) -> dict:
+    """Score a converted file against a reference file.
+
+    With `universal_deprels`, deprel subtypes like `nmod:poss` are compared as
+    their universal relation, like in the CoNLL shared tasks.
+    """
+    aligned = align_treebanks(system_file, gold_file)
+    system, gold = aligned["system"], aligned["gold"]
+    system_deprels, gold_deprels = system["DEPREL"], gold["DEPREL"]
+    if universal_deprels:
+        system_deprels = np.array([d.split(":")[0] for d in system_deprels], object)
+        gold_deprels = np.array([d.split(":")[0] for d in gold_deprels], object)
+
+    n_tokens = len(gold["HEAD"])
+    head_correct = system["HEAD"] == gold["HEAD"]
+    las_correct = head_correct & (system_deprels == gold_deprels)
+    return {
+        "system_file": str(system_file),
+        "gold_file": str(gold_file),
+        "tokens": n_tokens,
+        "unaligned_sentences": aligned["unaligned_sentences"],
+        "UAS": _ratio(head_correct.sum(), n_tokens),
+        "LAS": _ratio(las_correct.sum(), n_tokens),
+        "UPOS": _ratio((system["UPOS"] == gold["UPOS"]).sum(), n_tokens),
+        "FEATS": _ratio((system["FEATS"] == gold["FEATS"]).sum(), n_tokens),
+        "deprels": deprel_scores(system_deprels, gold_deprels, las_correct),
+        "upos_confusion": confusion_matrix(system["UPOS"], gold["UPOS"]),
+        "deprel_confusion": confusion_matrix(system_deprels, gold_deprels),
+    }
+
+
+def format_report(result: dict) -> str:
+    """Format the scores of an evaluation as a text report."""
+    lines = [
+        f"System: {result['system_file']}",
+        f"Gold: {result['gold_file']}",
+        f"Tokens: {result['tokens']}, "
+        f"unaligned sentences: {result['unaligned_sentences']}",
+    ]
+    lines += [
+        f"{metric}: {result[metric]:.2%}" for metric in ("LAS", "UAS", "UPOS", "FEATS")
+    ]
+    deprels = result["deprels"].sort_values("gold", ascending=False)
+    lines += ["", deprels.to_string(float_format=lambda value: f"{value:.3f}")]
+    return "\n".join(lines) + "\n"
+
+
+def evaluation_pairs(system_path: Path, gold_path: Path) -> list[tuple[Path, Path]]:
+    """Pair system and gold files. Two folders are paired by file name."""
+    if not (system_path.is_dir() and gold_path.is_dir()):
+        return [(system_path, gold_path)]
+    return [
+        (system_file, gold_path / system_file.name)
+        for system_file in sorted(system_path.glob("*.conllu"))
+        if (gold_path / system_file.name).exists()
+    ]
+
+
+def write_confusion_matrices(result: dict, output_dir: str | Path) -> None:
+    """Write the UPOS and deprel confusion matrices of an evaluation as CSV files."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    name = Path(result["system_file"]).stem
+    for matrix in ("upos_confusion", "deprel_confusion"):
+        result[matrix].to_csv(output_dir / f"{name}_{matrix}.csv")
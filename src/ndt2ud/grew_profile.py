@@ -0,0 +1,255 @@
+"""Profile a Grew strategy step by step on a corpus.
+
+A strategy like `main_nb` is a `Seq` of package applications and references to
+other strategies. The profiler expands nested `Seq` strategies into their steps,
+applies the steps one at a time, and records for each step the wall time and the
+number of graphs it changed. For each rule in a step, it also counts how often
+the rule's pattern matches the corpus right before the step. Grew does not report
+how often each rule fires, so these counts are used to share the step time
+between its rules in the hot rules report.
+"""
+
+import logging
+import re
+import time
+from pathlib import Path
+
+from grewpy import Corpus, Request
+from grewpy.grew import GrewError
+
+import ndt2ud
+from ndt2ud.parse_conllu import iter_conll_sentences
+
+STRATEGY_KEYWORDS = {"Seq", "Onf", "Alt", "Pick", "Iter", "If", "Try", "Empty"}
+IDENTIFIER = re.compile(r"[A-Za-z_][\w.]*")
+SEQUENCE = re.compile(r"^Seq\s*\((.*)\)$", re.DOTALL)
+
+
+def strip_comments(expression: str) -> str:
+    return re.sub(r"%[^\n]*", "", expression).strip()
+
+
+def split_arguments(arguments: str) -> list[str]:
+    """Split the arguments of a strategy operator on the top-level commas."""
+    parts, depth, current = [], 0, []
+    for char in arguments:
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        depth += (char == "(") - (char == ")")
+        current.append(char)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+def _get(decls: dict, path: tuple[str, ...]):
+    """Get the rule, package or strategy at `path` in the GRS declarations."""
+    node = {"decls": decls}
+    for name in path:
+        if not isinstance(node, dict) or "decls" not in node:
+            return None
+        node = node["decls"].get(name)
+        if node is None:
+            return None
+    return node
+
+
+def resolve(decls: dict, scope: tuple[str, ...], name: str):
+    """Resolve a (dotted) name used in the package `scope`, like Grew does:
+    in the package itself first, then in its enclosing packages.
+
+    Returns the full path of the declaration and the declaration, or None.
+    """
+    name_path = tuple(name.split("."))
+    for i in range(len(scope), -1, -1):
+        path = scope[:i] + name_path
+        node = _get(decls, path)
+        if node is not None:
+            return path, node
+    return None
+
+
+def _is_package(node) -> bool:
+    return isinstance(node, dict) and "decls" in node
+
+
+def _qualify(decls: dict, scope: tuple[str, ...], expression: str) -> str:
+    """Rewrite the names in a strategy expression to their full paths."""
+
+    def replace(match):
+        name = match.group(0)
+        if name in STRATEGY_KEYWORDS:
+            return name
+        resolved = resolve(decls, scope, name)
+        return ".".join(resolved[0]) if resolved else name
+
+    return IDENTIFIER.sub(replace, expression)
+
+
+def step_rules(
+    decls: dict, scope: tuple[str, ...], expression: str, _seen=None
+) -> list[tuple[str, dict]]:
+    """List the rules a strategy expression can apply, with their full names."""
+    seen = set() if _seen is None else _seen
+    rules = []
+    for name in IDENTIFIER.findall(expression):
+        if name in STRATEGY_KEYWORDS:
+            continue
+        resolved = resolve(decls, scope, name)
+        if resolved is None or resolved[0] in seen:
+            continue
+        path, node = resolved
+        seen.add(path)
+        if isinstance(node, str):
+            rules += step_rules(decls, path[:-1], strip_comments(node), seen)
+        elif _is_package(node):
+            rules += [
+                (".".join(path + (rule_name,)), rule)
+                for rule_name, rule in node["decls"].items()
+                if isinstance(rule, dict) and not _is_package(rule)
+            ]
+        else:
+            rules.append((".".join(path), node))
+    return rules
+
+
+def expand_strategy(
+    decls: dict, expression: str, scope: tuple[str, ...] = (), nested: bool = True
+) -> list[dict]:
+    """Expand a strategy into the steps of its (nested) `Seq` sequences.
+
+    Each step has a fully qualified strategy expression that can be applied on
+    its own, and the rules it can apply. With `nested` False, references to other
+    strategies are kept as single steps.
+    """
+    expression = strip_comments(expression)
+    sequence = SEQUENCE.match(expression)
+    if sequence:
+        return [
+            step
+            for argument in split_arguments(sequence.group(1))
+            for step in expand_strategy(decls, argument, scope, nested)
+        ]
+    resolved = resolve(decls, scope, expression)
+    if nested and resolved is not None and isinstance(resolved[1], str):
+        path, body = resolved
+        return expand_strategy(decls, body, path[:-1])
+    return [
+        {
+            "step": _qualify(decls, scope, expression),
+            "rules": step_rules(decls, scope, expression),
+        }
+    ]
+
+
+def count_matches(corpus: Corpus, rule: dict) -> int | None:
+    """Count the matches of a rule's pattern in the corpus, or None if Grew can't."""
+    try:
+        return corpus.count(Request.from_json(rule["request"]))
+    except (GrewError, KeyError, TypeError, ValueError) as err:
+        logging.debug(f"Could not count the matches of a rule: {err}")
+        return None
+
+
+def _split_graphs(conll: str) -> list[str]:
+    return conll.strip().split("\n\n")
+
+
+def profile_strategy(grs, corpus: Corpus, strat: str) -> list[dict]:
+    """Apply the strategy `strat` on the corpus one step at a time, and profile it.
+
+    The corpus is rewritten in place, as with `grs.apply`. Returns one record per
+    step with its wall time, the number of graphs it changed and the number of
+    pattern matches for each of its rules before the step.
+    """
+    decls = grs.json()["decls"]
+    if strat not in decls:
+        raise ValueError(f"No strategy {strat} in the GRS")
+    profile = []
+    before = _split_graphs(corpus.to_conll())
+    for number, step in enumerate(expand_strategy(decls, decls[strat]), start=1):
+        logging.info(f"Profiling step {number}: {step['step']}")
+        rules = [
+            {"rule": name, "matches": count_matches(corpus, rule)}
+            for name, rule in step["rules"]
+        ]
+        start = time.perf_counter()
+        grs.apply(corpus, strat=step["step"])
+        seconds = time.perf_counter() - start
+        after = _split_graphs(corpus.to_conll())
+        profile.append(
+            {
+                "strategy": strat,
+                "step": step["step"],
+                "seconds": round(seconds, 4),
+                "graphs_changed": sum(old != new for old, new in zip(before, after)),
+                "rules": rules,
+            }
+        )
+        before = after
+    return profile
+
+
+def hot_rules(profile: list[dict]) -> list[dict]:
+    """Rank the rules by their estimated share of the step times.
+
+    The time of a step is shared between its rules in proportion to their
+    pattern matches. Rules whose matches could not be counted are left out.
+    """
+    ranked = []
+    for step in profile:
+        counted = [rule for rule in step["rules"] if rule["matches"] is not None]
+        total_matches = sum(rule["matches"] for rule in counted)
+        for rule in counted:
+            share = rule["matches"] / total_matches if total_matches else 0
+            ranked.append(
+                {
+                    "rule": rule["rule"],
+                    "step": step["step"],
+                    "matches": rule["matches"],
+                    "seconds": round(step["seconds"] * share, 4),
+                }
+            )
+    return sorted(ranked, key=lambda rule: (-rule["seconds"], -rule["matches"]))
+
+
+def format_report(profile: list[dict], top: int = 20) -> str:
+    """Format a profile as a text report of the slowest steps and hottest rules."""
+    total = sum(step["seconds"] for step in profile) or 1
+    lines = ["Steps by time:"]
+    for step in sorted(profile, key=lambda step: -step["seconds"]):
+        lines.append(
+            f"{step['seconds']:>10.3f} s {step['seconds'] / total:>6.1%} "
+            f"{step['graphs_changed']:>7} graphs changed  "
+            f"{step['strategy']}: {step['step']}"
+        )
+    lines += ["", f"Top {top} rules by estimated time:"]
+    for rule in hot_rules(profile)[:top]:
+        lines.append(
+            f"{rule['seconds']:>10.3f} s {rule['matches']:>8} matches  {rule['rule']}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def profile_conversion(
+    input_file: str | Path, language: str, grs_path: str | Path
+) -> list[dict]:
+    """Profile the Grew strategies of the conversion on an NDT file.
+
+    The file is first converted up to the main Grew strategy, which is profiled,
+    and then through the udapi fixes, before the postprocess strategy is profiled.
+    """
+    invalid_lines = []
+    conllu_data = {
+        "file": Path(input_file).name,
+        "sentences": iter_conll_sentences(input_file, invalid_lines),
+        "invalid_lines": invalid_lines,
+    }
+    conll = ndt2ud.morphology_stage(conllu_data, language, str(grs_path))
+    corpus = ndt2ud.spaceafter_stage(conll, language, str(grs_path))
+    grs = ndt2ud.load_grs(grs_path)
+    profile = profile_strategy(grs, corpus, f"main_{language}")
+    conll = ndt2ud.udapi_stage(corpus.to_conll(), language, str(grs_path))
+    profile += profile_strategy(grs, Corpus(conll), "postprocess")
+    return profile
@@ -0,0 +1,105 @@
+"""Load Grew rule sets once per process and persist the parsed rules on disk.
+
+A loaded GRS is reused for every stage and file converted in the same process.
+Both the in-memory and the on-disk cache are keyed on a hash of the root GRS file
+and all the files it imports, so any change to the rules invalidates them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from grewpy import GRS, network
+from grewpy.grew import GrewError
+
+IMPORTPATTERN = re.compile(r'^\s*import\s+"(.+?)"', re.MULTILINE)
+
+GRS_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "ndt2ud" / "grs"
+)
+
+_loaded_grs: dict[tuple[str, str], GRS] = {}
+
+
+def grs_files(grs_path: str | Path) -> list[Path]:
+    """List a GRS file and all the files it imports, transitively."""
+    files = []
+    pending = [Path(grs_path).resolve()]
+    while pending:
+        path = pending.pop(0)
+        if path in files:
+            continue
+        files.append(path)
+        for name in IMPORTPATTERN.findall(path.read_text(encoding="utf-8")):
+            pending.append((path.parent / name).resolve())
+    return files
+
+
+def grs_hash(grs_path: str | Path) -> str:
+    """Hash the content of a GRS file and all the files it imports."""
+    root_dir = Path(grs_path).resolve().parent
+    digest = hashlib.sha256()
+    for path in grs_files(grs_path):
+        digest.update(os.path.relpath(path, root_dir).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _grewpy_version() -> str:
+    try:
+        return version("grewpy")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def load_grs_json(json_data: dict) -> GRS:
+    """Load a GRS into the grewpy backend from its JSON representation."""
+    grs = GRS.__new__(GRS)
+    grs.id = network.send_and_receive({"command": "load_grs", "json": json_data})[
+        "index"
+    ]
+    return grs
+
+
+def _write_cache_file(cache_file: Path, grs: GRS) -> None:
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    tmp_file.write_text(json.dumps(grs.json()), encoding="utf-8")
+    os.replace(tmp_file, cache_file)
+
+
+def load_grs(grs_path: str | Path, cache_dir: Path | None = GRS_CACHE_DIR) -> GRS:
+    """Load a GRS file, reusing an already loaded GRS when the rules are unchanged.
+
+    The parsed rules are also stored as JSON in `cache_dir`, so that later
+    processes can skip parsing the .grs files. Set `cache_dir` to None
+    to only cache in memory.
+    """
+    key = (str(Path(grs_path).resolve()), grs_hash(grs_path))
+    if key in _loaded_grs:
+        return _loaded_grs[key]
+
+    grs = None
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = Path(cache_dir) / f"{key[1]}-{_grewpy_version()}.json"
+    if cache_file is not None and cache_file.exists():
+        try:
+            grs = load_grs_json(json.loads(cache_file.read_text(encoding="utf-8")))
+            logging.debug(f"Loaded Grew rules from cache {cache_file}")
+        except (GrewError, ValueError, KeyError, TypeError) as err:
+            logging.debug(f"Could not load cached Grew rules {cache_file}: {err}")
+    if grs is None:
+        grs = GRS(str(grs_path))
+        if cache_file is not None:
+            try:
+                _write_cache_file(cache_file, grs)
+            except (GrewError, OSError) as err:
+                logging.debug(f"Could not cache Grew rules in {cache_file}: {err}")
+
+    _loaded_grs[key] = grs
+    return grs
@@ -0,0 +1,317 @@
+"""Reconvert only the sentences that a change in the Grew rules can affect.
+
+A conversion in incremental mode stores a state for each output file: the Grew
+rules it used, the output, and the corpus before each step of the Grew strategies.
+When only rules have changed since then, each step that uses a changed rule is
+applied with both the old and the new rules to the stored corpus before that step.
+The sentences where the results differ are converted again and merged into the
+previous output. All other sentences take the same path through the strategies
+as before, so their output is unchanged.
+
+Grew does not report which rules fire inside an `Onf`, and a rule may only match
+after other rules have rewritten a graph, so the patterns of the changed rules
+are searched only to report how often they match.
+A full conversion is run when the input, the strategies or the packages change.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from grewpy import Corpus
+from grewpy.grew import GrewError
+
+import ndt2ud
+from ndt2ud.grew_profile import count_matches, expand_strategy
+from ndt2ud.grs_cache import grs_hash, load_grs_json
+from ndt2ud.parse_conllu import parse_conll_lines, read_conll_line
+from ndt2ud.sentence_cache import split_conll_output, split_sentence_chunks
+
+STATE_DIR = ".ndt2ud_state"
+STATE_FILE = "state.json"
+RULES_FILE = "rules.json"
+OUTPUT_FILE = "output.conllu.gz"
+
+
+def _versions() -> dict:
+    versions = {}
+    for package in ("ndt2ud", "grewpy", "udapi"):
+        try:
+            versions[package] = version(package)
+        except PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def _is_package(node) -> bool:
+    return isinstance(node, dict) and "decls" in node
+
+
+def _is_rule(node) -> bool:
+    return isinstance(node, dict) and "decls" not in node
+
+
+def rules_diff(old_decls: dict, new_decls: dict, prefix: tuple = ()) -> set | None:
+    """List the full names of the rules that were changed, added or removed
+    between two versions of the GRS declarations.
+
+    Returns None if anything else than rules changed, like strategies or packages.
+    """
+    changed = set()
+    for name in old_decls.keys() | new_decls.keys():
+        old, new = old_decls.get(name), new_decls.get(name)
+        if old == new:
+            continue
+        path = prefix + (name,)
+        if _is_package(old) and _is_package(new):
+            package_changes = rules_diff(old["decls"], new["decls"], path)
+            if package_changes is None:
+                return None
+            changed |= package_changes
+        elif (old is None or _is_rule(old)) and (new is None or _is_rule(new)):
+            changed.add(".".join(path))
+        else:
+            return None
+    return changed
+
+
+def grew_steps(decls: dict, language: str) -> list[dict]:
+    """List the top-level steps of the main and postprocess strategies."""
+    return [
+        {"strategy": strat, **step}
+        for strat in (f"main_{language}", "postprocess")
+        for step in expand_strategy(decls, decls[strat], nested=False)
+    ]
+
+
+def convert_with_checkpoints(
+    conllu_data: dict, language: str, grs_path: str | Path, grs, decls: dict
+) -> tuple[str, list[str]]:
+    """Run the conversion stages, applying the Grew strategies one step at a time.
+
+    Returns the output and the corpus as a conllu string before each Grew step,
+    in the order of grew_steps.
+    """
+    conll = ndt2ud.morphology_stage(conllu_data, language, str(grs_path))
+    corpus = ndt2ud.spaceafter_stage(conll, language, str(grs_path))
+    checkpoints = []
+    for strat in (f"main_{language}", "postprocess"):
+        if strat == "postprocess":
+            conll = ndt2ud.udapi_stage(corpus.to_conll(), language, str(grs_path))
+            corpus = Corpus(conll)
+        for step in expand_strategy(decls, decls[strat], nested=False):
+            checkpoints.append(corpus.to_conll())
+            grs.apply(corpus, strat=step["step"])
+    output = ndt2ud.newpar_stage(corpus.to_conll(), language, str(grs_path))
+    return output, checkpoints
+
+
+def _read(path: Path) -> str:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def _write(path: Path, text: str) -> None:
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=3) as f:
+        f.write(text)
+
+
+def _checkpoint_file(state_dir: Path, i: int) -> Path:
+    return state_dir / f"step_{i:02}.conllu.gz"
+
+
+def token_chunks(lines: list[str]) -> list[list[str]]:
+    """Split conll lines into the chunks of lines of each sentence with tokens."""
+    return [
+        chunk
+        for chunk in split_sentence_chunks(lines)[0]
+        if any(read_conll_line(line)[0] == "token" for line in chunk)
+    ]
+
+
+def load_state(state_dir: Path) -> dict | None:
+    try:
+        return json.loads((state_dir / STATE_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(
+    state_dir: Path,
+    state: dict,
+    grs_json: dict,
+    output: str,
+    checkpoints: list[str],
+) -> None:
+    """Store the state of a conversion, if its output and checkpoints have one
+    sentence for each input sentence."""
+    for conll in [output, *checkpoints]:
+        if len(split_conll_output(conll)[1]) != state["sentences"]:
+            logging.warning(
+                "Could not match the converted sentences to the input sentences, "
+                "no incremental state is stored"
+            )
+            (state_dir / STATE_FILE).unlink(missing_ok=True)
+            return
+    state_dir.mkdir(parents=True, exist_ok=True)
+    (state_dir / STATE_FILE).unlink(missing_ok=True)
+    (state_dir / RULES_FILE).write_text(json.dumps(grs_json), encoding="utf-8")
+    _write(state_dir / OUTPUT_FILE, output)
+    for i, checkpoint in enumerate(checkpoints):
+        _write(_checkpoint_file(state_dir, i), checkpoint)
+    # the state file is written last, so that a partial state is never used
+    (state_dir / STATE_FILE).write_text(json.dumps(state), encoding="utf-8")
+
+
+def _split(conll: str) -> list[str]:
+    return split_conll_output(conll)[1]
+
+
+def affected_sentences(
+    state_dir: Path, old_json: dict, new_decls: dict, grs, language: str
+) -> set[int] | None:
+    """Find the sentences whose conversion can change with the new rules.
+
+    `old_json` is the JSON of the rules used for the stored state.
+    Returns the indices of the affected sentences, or None if the change cannot
+    be analyzed.
+    """
+    old_decls = old_json["decls"]
+    changed = rules_diff(old_decls, new_decls)
+    if changed is None:
+        logging.info("The Grew strategies or packages have changed")
+        return None
+    logging.info(f"Changed Grew rules: {', '.join(sorted(changed)) or 'none'}")
+    if not changed:
+        return set()
+    try:
+        old_grs = load_grs_json(old_json)
+    except (GrewError, KeyError, TypeError, ValueError) as err:
+        logging.info(f"Could not load the previous Grew rules: {err}")
+        return None
+
+    old_steps = grew_steps(old_decls, language)
+    affected = set()
+    for i, (old_step, new_step) in enumerate(
+        zip(old_steps, grew_steps(new_decls, language))
+    ):
+        old_rules = dict(old_step["rules"])
+        new_rules = dict(new_step["rules"])
+        step_changes = changed & (old_rules.keys() | new_rules.keys())
+        if not step_changes:
+            continue
+        checkpoint = _read(_checkpoint_file(state_dir, i))
+        old_corpus, new_corpus = Corpus(checkpoint), Corpus(checkpoint)
+        for name in sorted(step_changes):
+            old_matches = (
+                count_matches(old_corpus, old_rules[name]) if name in old_rules else 0
+            )
+            new_matches = (
+                count_matches(new_corpus, new_rules[name]) if name in new_rules else 0
+            )
+            logging.info(
+                f"Rule {name} matches {old_matches} times before, "
+                f"{new_matches} times after the change"
+            )
+        old_grs.apply(old_corpus, strat=old_step["step"])
+        grs.apply(new_corpus, strat=new_step["step"])
+        old_sentences = _split(old_corpus.to_conll())
+        new_sentences = _split(new_corpus.to_conll())
+        if len(old_sentences) != len(new_sentences):
+            return None
+        step_affected = {
+            j
+            for j, (old, new) in enumerate(zip(old_sentences, new_sentences))
+            if old != new
+        }
+        logging.info(f"Step {new_step['step']} changes {len(step_affected)} sentences")
+        affected |= step_affected
+    return affected
+
+
+def convert_incremental(
+    input_file: str | Path, language: str, grs_path: str | Path, state_dir: str | Path
+) -> str:
+    """Convert an NDT file, reconverting only the sentences affected by changes
+    in the Grew rules since the last incremental conversion stored in `state_dir`.
+
+    Falls back to a full conversion, which stores a new state, when there is no
+    usable state or the change cannot be analyzed.
+    """
+    state_dir = Path(state_dir)
+    input_bytes = Path(input_file).read_bytes()
+    lines = input_bytes.decode("utf-8").splitlines()
+    chunks = token_chunks(lines)
+    state = {
+        "input_hash": hashlib.sha256(input_bytes).hexdigest(),
+        "rules_hash": grs_hash(grs_path),
+        "language": language,
+        "versions": _versions(),
+        "sentences": len(chunks),
+    }
+    grs = ndt2ud.load_grs(grs_path)
+    grs_json = grs.json()
+    decls = grs_json["decls"]
+
+    affected = None
+    previous = load_state(state_dir)
+    if previous is None:
+        logging.info(f"No incremental state in {state_dir}")
+    elif {**previous, "rules_hash": None} != {**state, "rules_hash": None}:
+        logging.info("The input, language or package versions have changed")
+    elif previous["rules_hash"] == state["rules_hash"]:
+        affected = set()
+    else:
+        old_json = json.loads((state_dir / RULES_FILE).read_text(encoding="utf-8"))
+        affected = affected_sentences(state_dir, old_json, decls, grs, language)
+
+    if affected is None:
+        logging.info("Running a full conversion")
+        output, checkpoints = convert_with_checkpoints(
+            parse_conll_lines(lines), language, grs_path, grs, decls
+        )
+        save_state(state_dir, state, grs_json, output, checkpoints)
+        return output
+
+    header, output_sentences = split_conll_output(_read(state_dir / OUTPUT_FILE))
+    logging.info(f"Reconverting {len(affected)} of {len(chunks)} sentences")
+    if not affected:
+        if previous["rules_hash"] != state["rules_hash"]:  # type: ignore
+            (state_dir / RULES_FILE).write_text(json.dumps(grs_json), encoding="utf-8")
+            (state_dir / STATE_FILE).write_text(json.dumps(state), encoding="utf-8")
+        return header + "".join(output_sentences)
+
+    indices = sorted(affected)
+    conllu_data = parse_conll_lines([line for i in indices for line in chunks[i]])
+    output, checkpoints = convert_with_checkpoints(
+        conllu_data, language, grs_path, grs, decls
+    )
+    new_output = _split(output)
+    if len(new_output) != len(indices):
+        logging.warning(
+            "Could not match the reconverted sentences to the input sentences"
+        )
+        output, checkpoints = convert_with_checkpoints(
+            parse_conll_lines(lines), language, grs_path, grs, decls
+        )
+        save_state(state_dir, state, grs_json, output, checkpoints)
+        return output
+
+    merged = dict(enumerate(output_sentences)) | dict(zip(indices, new_output))
+    output = header + "".join(merged[i] for i in range(len(output_sentences)))
+    merged_checkpoints = []
+    for i, checkpoint in enumerate(checkpoints):
+        old_header, old_sentences = split_conll_output(
+            _read(_checkpoint_file(state_dir, i))
+        )
+        sentences = dict(enumerate(old_sentences)) | dict(
+            zip(indices, _split(checkpoint))
+        )
+        merged_checkpoints.append(
+            old_header + "".join(sentences[j] for j in range(len(old_sentences)))
+        )
+    save_state(state_dir, state, grs_json, output, merged_checkpoints)
+    return output
@@ -0,0 +1,170 @@
+"""Measure the conversion stages, and optionally profile them.
+
+Each stage gets a metrics record with wall and CPU time, sentence and token
+counts, the size of its input and output, and peak memory of both Python and
+the grewpy backend. Peak memory is only measured on request, since it resets
+the peak RSS counters of both processes before each stage. With a profile
+directory, each stage is also profiled with cProfile and tracemalloc.
+"""
+
+import cProfile
+import json
+import os
+import platform
+import re
+import resource
+import time
+import tracemalloc
+from pathlib import Path
+
+from grewpy import network
+
+NONTOKENLINE = re.compile(r"\n\d+[-.]")
+
+
+def count_conll(conll: str) -> tuple[int, int]:
+    """Count the sentences and tokens in a conllu string without parsing it.
+
+    Multiword token ranges and empty nodes are not counted as tokens.
+    """
+    if not conll.strip():
+        return 0, 0
+    text = "\n" + conll.rstrip("\n")
+    sentences = text.count("\n1\t")
+    tokens = (
+        text.count("\n")
+        - text.count("\n#")
+        - text.count("\n\n")
+        - len(NONTOKENLINE.findall(text))
+    )
+    return sentences, tokens
+
+
+def peak_rss_mb(pid: int | str = "self") -> float | None:
+    """Peak resident set size of a process in MB, or None if it is unavailable."""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid == "self":
+        # kilobytes on Linux, bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / (1024 * 1024 if platform.system() == "Darwin" else 1024)
+    return None
+
+
+def reset_peak_rss(pid: int | str = "self") -> None:
+    """Reset the peak RSS of a process, where the kernel allows it (Linux)."""
+    try:
+        Path(f"/proc/{pid}/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def backend_pid() -> int | None:
+    """Process ID of the grewpy backend started by this process."""
+    return getattr(network, "caml_pid", None)
+
+
+def backend_cpu_seconds(pid: int | None) -> float | None:
+    """CPU time used so far by the grewpy backend, or None if it is unavailable."""
+    if pid is None:
+        return None
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    # utime and stime are fields 14 and 15, counted after the command name
+    fields = stat.rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _size(data) -> int | None:
+    return len(data.encode()) if isinstance(data, str) else None
+
+
+def measure_stage(
+    name: str,
+    stage,
+    data,
+    language: str,
+    grs_path: str,
+    profile_dir: str | Path | None = None,
+    previous: dict | None = None,
+    measure_memory: bool = False,
+) -> tuple:
+    """Run a conversion stage and measure it.
+
+    Returns the stage output and its metrics record. Sentence and token counts
+    come from the output when it is a conllu string, else from the `previous` record.
+    With `profile_dir`, a cProfile dump `{name}.prof` and a tracemalloc snapshot
+    `{name}.tracemalloc` of the stage are written there.
+    With `measure_memory`, the peak RSS of this process and of the grewpy backend
+    are reset before the stage and recorded after it, else they are None.
+    """
+    pid = backend_pid()
+    if measure_memory:
+        reset_peak_rss()
+        if pid is not None:
+            reset_peak_rss(pid)
+    backend_cpu = backend_cpu_seconds(pid)
+    bytes_in = _size(data)
+
+    profiler = None
+    if profile_dir is not None:
+        Path(profile_dir).mkdir(parents=True, exist_ok=True)
+        profiler = cProfile.Profile()
+        tracemalloc.start()
+        profiler.enable()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        result = stage(data, language, grs_path)
+    finally:
+        wall_seconds = time.perf_counter() - wall_start
+        cpu_seconds = time.process_time() - cpu_start
+        if profiler is not None:
+            profiler.disable()
+            traced_peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            profiler.dump_stats(Path(profile_dir) / f"{name}.prof")
+            snapshot.dump(str(Path(profile_dir) / f"{name}.tracemalloc"))
+
+    if isinstance(result, str):
+        sentences, tokens = count_conll(result)
+    elif previous is not None:
+        sentences, tokens = previous["sentences"], previous["tokens"]
+    else:
+        sentences, tokens = None, None
+    record = {
+        "stage": name,
+        "wall_seconds": round(wall_seconds, 4),
+        "cpu_seconds": round(cpu_seconds, 4),
+        "backend_cpu_seconds": None,
+        "sentences": sentences,
+        "tokens": tokens,
+        "bytes_in": bytes_in,
+        "bytes_out": _size(result),
+        "peak_rss_mb": None,
+        "backend_peak_rss_mb": None,
+    }
+    if measure_memory:
+        record["peak_rss_mb"] = peak_rss_mb()
+        if pid is not None:
+            record["backend_peak_rss_mb"] = peak_rss_mb(pid)
+    backend_cpu_end = backend_cpu_seconds(pid)
+    if backend_cpu is not None and backend_cpu_end is not None:
+        record["backend_cpu_seconds"] = round(backend_cpu_end - backend_cpu, 4)
+    if profiler is not None:
+        record["traced_peak_mb"] = round(traced_peak / (1024 * 1024), 2)
+    return result, record
+
+
+def write_metrics(metrics_file: str | Path, records: list[dict]) -> None:
+    """Append metrics records to a JSON lines file."""
+    path = Path(metrics_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(record) + "\n" for record in records))
@@ -1,9 +1,12 @@
 from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 import pandas as pd
 
-from ndt2ud.parse_conllu import CONLLFIELDS
+from ndt2ud.parse_conllu import CONLLFIELDS, Token
 
 symbols = ["$", "£", "%", ":(", ":)", "+", "-", "/", ">="]
 
@@ -120,6 +123,9 @@ posmap = {
     "clb": "PUNCT",
 }
 
+# Tags that map to the same UD tag regardless of lemma, feats or context
+pos_lookup = {**posmap, "sbu": "SCONJ"}
+
 featsmap = {
     "1": {"Person": "1"},
     "2": {"Person": "2"},
@@ -181,6 +187,13 @@ featsmap = {
     "unorm": "_",  # feat Typo?
 }
 
+# The UD features of each NDT feature in featsmap, as (type, value) pairs
+featsmap_items = {
+    feat: tuple(udfeats.items())
+    for feat, udfeats in featsmap.items()
+    if isinstance(udfeats, dict)
+}
+
 ud_feattypes = [
     "Abbr",
     "Animacy",
@@ -201,6 +214,9 @@ ud_feattypes = [
     "Voice",
 ]
 
+# Max number of cached feats conversions
+FEATS_CACHE_SIZE = 4096
+
 # UTILITY FUNCTIONS
 
 
@@ -209,6 +225,11 @@ def is_ud_feat(feat):
     return feattype in ud_feattypes
 
 
+@lru_cache(maxsize=FEATS_CACHE_SIZE)
+def has_only_ud_feats(feats: str) -> bool:
+    return all(is_ud_feat(f) for f in feats.split("|"))
+
+
 def split_token(line: str) -> list:
     # return line.strip().split('\t')
     return line.rstrip("\n").split("\t")
@@ -248,35 +269,141 @@ def replace_placeholder(feats: list, addendum: list):
     return list(set(feats))
 
 
-def split_batch_samples(filename, sample_size: int = 200000):
-    """Split data into batches to upload to Arborator Grew."""
+def iter_batch_chunks(
+    lines: Iterable[bytes],
+    max_lines: int | None = None,
+    max_sentences: int | None = None,
+    max_bytes: int | None = None,
+) -> Iterator[tuple[bool, list[bytes]]]:
+    """Group the sentence chunks of conll lines into batches within the limits.
+
+    A chunk is the lines of a sentence up to the empty line that ends it.
+    Yields (starts_new_batch, chunk) for each chunk, in one pass. A batch is cut
+    before the chunk that would take it over the number of lines, sentences or
+    bytes. A single sentence over the limits is a batch of its own.
+    """
+    n_lines = n_sentences = n_bytes = 0
+    chunk = []
+    first = True
+
+    def over_limits(chunk):
+        return (
+            (max_lines is not None and n_lines + len(chunk) > max_lines)
+            or (max_sentences is not None and n_sentences + 1 > max_sentences)
+            or (max_bytes is not None and n_bytes + sum(map(len, chunk)) > max_bytes)
+        )
+
+    def add(chunk):
+        nonlocal n_lines, n_sentences, n_bytes, first
+        new_batch = first or (n_lines > 0 and over_limits(chunk))
+        if new_batch:
+            n_lines = n_sentences = n_bytes = 0
+        n_lines += len(chunk)
+        n_sentences += any(line.strip() for line in chunk)
+        n_bytes += sum(map(len, chunk))
+        first = False
+        return new_batch, chunk
+
+    for line in lines:
+        chunk.append(line)
+        if not line.rstrip(b"\r\n"):
+            yield add(chunk)
+            chunk = []
+    if chunk:
+        yield add(chunk)
+
+
+def _batch_path(filepath: Path, number: int) -> Path:
+    return filepath.parent / f"sample{number}_{filepath.name}"
+
+
+def _strip_sentence_end(batch: bytes) -> bytes:
+    """Drop the empty line after the last sentence of a batch."""
+    for ending in (b"\r\n", b"\n"):
+        if batch.endswith(ending) and batch[: -len(ending)].endswith(b"\n"):
+            return batch[: -len(ending)]
+    return batch
+
+
+def plan_batches(filename, **limits) -> list[tuple[int, int]]:
+    """Find the byte ranges of the batches of a conll file, see iter_batch_chunks."""
+    ranges = []
+    offset = 0
+    with open(filename, "rb") as f:
+        for new_batch, chunk in iter_batch_chunks(f, **limits):
+            if new_batch:
+                ranges.append([offset, offset])
+            offset += sum(map(len, chunk))
+            ranges[-1][1] = offset
+    return [tuple(byte_range) for byte_range in ranges]
+
+
+def write_batch(filename, start: int, end: int, path) -> Path:
+    """Copy the bytes `start:end` of a conll file to a batch file."""
+    with open(filename, "rb") as f:
+        f.seek(start)
+        batch = f.read(end - start)
+    Path(path).write_bytes(_strip_sentence_end(batch))
+    return Path(path)
+
+
+def split_batch_samples(
+    filename,
+    sample_size: int | None = 200000,
+    max_sentences: int | None = None,
+    max_bytes: int | None = None,
+    jobs: int = 1,
+) -> list[Path]:
+    """Split data into batches to upload to Arborator Grew.
+
+    The batches are cut between sentences, with at most `sample_size` lines,
+    `max_sentences` sentences and `max_bytes` bytes each, and written next to
+    the file as sample<number>_<filename>, without the empty line after the last
+    sentence. The file is read once, and each batch is written as it is read.
+    With more than one job, the batches are planned in a first pass and then
+    written in parallel threads.
+    """
     filepath = Path(filename)
-    lines = filepath.read_text().splitlines()
-    length = len(lines)
-
-    def split_samples(start):
-        remaining_length = length - start
-        end = start + sample_size if sample_size < remaining_length else length
-
-        rev = lines[:end]
-        rev.reverse()
-        last_sent_rev_idx = rev.index("")
-        end -= last_sent_rev_idx
-
-        sample = lines[start:end]
-        sample.pop()
-        return end, sample
-
-    # Number of samples in the data, given the sample size
-    iterations = (length // sample_size) + int(length % sample_size > 0)
-
-    idx = 0
-    for i in range(iterations):
-        idx, sample = split_samples(idx)
-        path = filepath.parent / f"sample{i + 1}_{filepath.name}"
-        with open(path, "w+") as sf:
-            for line in sample:
-                sf.write(line + "\n")
+    limits = {
+        "max_lines": sample_size,
+        "max_sentences": max_sentences,
+        "max_bytes": max_bytes,
+    }
+    if jobs > 1:
+        ranges = plan_batches(filepath, **limits)
+        paths = [_batch_path(filepath, i + 1) for i in range(len(ranges))]
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            return list(
+                executor.map(
+                    write_batch,
+                    [filepath] * len(ranges),
+                    [start for start, _ in ranges],
+                    [end for _, end in ranges],
+                    paths,
+                )
+            )
+
+    paths = []
+    sample_file = None
+    pending = b""  # the empty line after the last sentence written
+    try:
+        with open(filepath, "rb") as f:
+            for new_batch, chunk in iter_batch_chunks(f, **limits):
+                if new_batch:
+                    if sample_file is not None:
+                        sample_file.close()
+                    paths.append(_batch_path(filepath, len(paths) + 1))
+                    sample_file = open(paths[-1], "wb")
+                    pending = b""
+                sample_file.write(pending)  # type: ignore
+                batch = b"".join(chunk)
+                stripped = _strip_sentence_end(batch)
+                sample_file.write(stripped)  # type: ignore
+                pending = batch[len(stripped) :]
+    finally:
+        if sample_file is not None:
+            sample_file.close()
+    return paths
 
 
 ########## NEW CONVERSION FUNCTIONS ######
@@ -294,19 +421,30 @@ def overlaps(actual_values, qualifying_values):
 # Konverter POS-taggene
 
 
-def get_dependents(sentence, token):
-    return [
-        token_i for token_i in sentence if get_field(token, "ID") == token_i.get("HEAD")
-    ]  # token.get("ID") != token_i.get("ID") ]
+def index_dependents(sentence: list) -> dict:
+    """Map the ID of each head in a sentence to the list of its dependent tokens."""
+    dependents = defaultdict(list)
+    for token in sentence:
+        dependents[token.get("HEAD")].append(token)
+    return dependents
+
+
+def get_dependents(sentence, token, dependents: dict | None = None):
+    """Look up the dependents of a token, in a prebuilt index if it is given."""
+    if dependents is None:
+        dependents = index_dependents(sentence)
+    return dependents.get(get_field(token, "ID"), [])
 
 
 def get_labels(tokens: list) -> list:
     return [get_field(t, "DEPREL") for t in tokens]
 
 
-def get_field(token: dict, field: str) -> str:
+def get_field(token: Token | dict, field: str) -> str:
     field = field.upper()
-    if isinstance(token, dict):
+    if isinstance(token, Token):
+        return getattr(token, field)
+    elif isinstance(token, dict):
         return token[field]
     elif isinstance(token, pd.DataFrame):
         return token[field]
@@ -321,14 +459,14 @@ def fill_xpos(token: dict) -> str:
     return xpos
 
 
-def convert_pos(token, sentence) -> str:
+def convert_pos(token, sentence, dependents: dict | None = None) -> str:
     pos = get_field(token, "UPOS")
     lemma = get_field(token, "LEMMA")
     feats = get_field(token, "FEATS").split("|")
 
     # direct mapping
     def convert_verb_pos() -> str:
-        deps = get_dependents(sentence, token)
+        deps = get_dependents(sentence, token, dependents)
         labels = get_labels(deps) if deps else []
 
         if (
@@ -357,29 +495,22 @@ def convert_pos(token, sentence) -> str:
             return "ADV"
         return "ADP"
 
-    # special cases
-    pos_conversion = {
-        "subst": "PROPN" if "prop" in feats else "NOUN",
-        "symb": "PUNCT" if (lemma == "*") else "SYM",
-        "verb": convert_verb_pos(),  # 'VERB' or 'AUX',
-        "det": convert_det_pos(),  # 'DET', 'PRON', 'NUM'
-        "adj": "ADJ",
-        "adv": "PART" if lemma in ["ikke", "ikkje", "ei"] else "ADV",  # 'ADV',
-        "clb": "PUNCT",
-        "prep": convert_prep_pos(),  # 'ADP',"PRON", 'ADV'
-        "pron": "PRON",
-        "<komma>": "PUNCT",
-        "konj": "CCONJ",
-        "inf-merke": "PART",
-        "<anf>": "PUNCT",
-        "sbu": "SCONJ",
-        "<strek>": "PUNCT",
-        "ukjent": "X",  # feat: Foreign=Yes
-        "<parentes-beg>": "PUNCT",
-        "<parentes-slutt>": "PUNCT",
-        "interj": "INTJ",
-    }
-    return pos_conversion.get(pos, pos)  # type: ignore
+    # special cases, only computed for the matching tag
+    if pos == "verb":
+        return convert_verb_pos()  # 'VERB' or 'AUX'
+    if pos == "det":
+        return convert_det_pos()  # 'DET', 'PRON', 'NUM'
+    if pos == "prep":
+        return convert_prep_pos()  # 'ADP',"PRON", 'ADV'
+
+    if pos == "subst":
+        return "PROPN" if "prop" in feats else "NOUN"
+    if pos == "symb":
+        return "PUNCT" if (lemma == "*") else "SYM"
+    if pos == "adv":
+        return "PART" if lemma in ["ikke", "ikkje", "ei"] else "ADV"
+    # "ukjent" -> "X", feat: Foreign=Yes
+    return pos_lookup.get(pos, pos)  # type: ignore
 
 
 # Konverter feats
@@ -406,20 +537,42 @@ def add_feats(token):
     return replace_placeholder(feats, new_feats)
 
 
+# The only lemmas that make a difference to the converted feats
+feats_lemmas = set(pron_det_lemma_feats_map) | {"ikke", "ikkje", "ingen"}
+
+
 def convert_feats(token):
-    feats = add_feats(token)
-    mapped_feats = map_feats(feats)
+    """Convert the NDT feats of a token to UD feats.
+
+    Conversions are cached on the fields that affect the result.
+    The lemma only counts if it is in feats_lemmas, and the deprel only for "ingen".
+    """
+    lemma = get_field(token, "LEMMA")
+    if lemma not in feats_lemmas:
+        lemma = None
+    deprel = get_field(token, "DEPREL") if lemma == "ingen" else None
+    return _convert_feats(
+        get_field(token, "UPOS"), lemma, get_field(token, "FEATS"), deprel
+    )
+
+
+@lru_cache(maxsize=FEATS_CACHE_SIZE)
+def _convert_feats(pos: str, lemma: str | None, feats: str, deprel: str | None):
+    token = {"UPOS": pos, "LEMMA": lemma, "FEATS": feats, "DEPREL": deprel}
+    mapped_feats = map_feats(add_feats(token))
     formatted = "|".join(sorted(mapped_feats, key=str.lower))
     return formatted if formatted else "_"
 
 
+def feats_cache_info():
+    """Hits, misses and size of the feats conversion cache."""
+    return _convert_feats.cache_info()
+
+
 def map_feats(feats):
     newfeats = defaultdict(set)
-    mapped = (featsmap.get(feat, "_") for feat in feats)
-    for feat in mapped:
-        if not isinstance(feat, dict):
-            continue
-        for feattype, val in feat.items():
+    for feat in feats:
+        for feattype, val in featsmap_items.get(feat, ()):
             newfeats[feattype].add(val)
     formatted = [format_ud_feat(*feat) for feat in newfeats.items()]
     return formatted
@@ -430,17 +583,30 @@ def format_ud_feat(feat_type, feat_val):
     return f"{feat_type}={value}"
 
 
+def convert_sentence_morphology(s: dict) -> dict:
+    """Convert the POS tags and morphological features of one sentence from NDT to UD."""
+    sentence = s["tokens"]
+    dependents = index_dependents(sentence)
+    converted = []
+    for token in sentence:
+        token["UPOS"] = convert_pos(token, sentence, dependents)
+        token["XPOS"] = fill_xpos(token)
+        if not has_only_ud_feats(token["FEATS"]):
+            token["FEATS"] = convert_feats(token)
+        converted.append(token)
+    s["tokens"] = converted
+    return s
+
+
 def convert_morphology(data: dict) -> dict:
-    """Convert the POS tags and morphological features from NDT to UD."""
+    """Convert the POS tags and morphological features from NDT to UD.
+
+    If the sentences are given as a generator, e.g. from iter_conll_sentences,
+    they are converted lazily as the returned sentences are consumed.
+    """
     conll_data = data.copy()
-    for s in conll_data["sentences"]:
-        sentence = s["tokens"]
-        converted = []
-        for token in sentence:
-            token["UPOS"] = convert_pos(token, sentence)
-            token["XPOS"] = fill_xpos(token)
-            if not all(is_ud_feat(f) for f in token["FEATS"].split("|")):
-                token["FEATS"] = convert_feats(token)
-            converted.append(token)
-        s["tokens"] = converted
+    converted = map(convert_sentence_morphology, data["sentences"])
+    if isinstance(data["sentences"], list):
+        converted = list(converted)
+    conll_data["sentences"] = converted
     return conll_data
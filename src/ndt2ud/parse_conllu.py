@@ -10,10 +10,13 @@ Below are additional functions to filter sentences on ids, load the parsed conll
 write conllu files with selected metadata (sent_id, text)
 """
 
+import io
 import re
-from csv import QUOTE_NONE
+import sys
+from collections.abc import MutableMapping
+from operator import attrgetter
 from pathlib import Path
-from typing import Generator
+from typing import Generator, Iterable
 
 import pandas as pd
 
@@ -31,6 +34,123 @@ CONLLFIELDS = [
 ]
 
 
+class Token(MutableMapping):
+    """A conll token with one slot per field in CONLLFIELDS.
+
+    Takes less memory than a dict per token, and can be used like the token
+    dicts it replaces, with the field names as keys. Other keys are not allowed.
+    """
+
+    __slots__ = tuple(CONLLFIELDS)
+
+    def __init__(self, values: Iterable = (), **fields):
+        for field, value in zip(CONLLFIELDS, values):
+            setattr(self, field, value)
+        for field, value in fields.items():
+            self[field] = value
+
+    @classmethod
+    def from_fields(cls, fields: list) -> "Token":
+        """Build a Token from the values of all fields, in CONLLFIELDS order."""
+        token = cls.__new__(cls)
+        (
+            token.ID,
+            token.FORM,
+            token.LEMMA,
+            token.UPOS,
+            token.XPOS,
+            token.FEATS,
+            token.HEAD,
+            token.DEPREL,
+            token.DEPS,
+            token.MISC,
+        ) = fields
+        return token
+
+    def __getitem__(self, field):
+        if field not in _FIELDSET:
+            raise KeyError(field)
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def __setitem__(self, field, value):
+        if field not in _FIELDSET:
+            raise KeyError(field)
+        setattr(self, field, value)
+
+    def __delitem__(self, field):
+        if field not in _FIELDSET or not hasattr(self, field):
+            raise KeyError(field)
+        delattr(self, field)
+
+    def __iter__(self):
+        return (field for field in CONLLFIELDS if hasattr(self, field))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Token({dict(self)})"
+
+    def values(self):
+        try:
+            return list(_getfields(self))
+        except AttributeError:
+            return [getattr(self, field) for field in self]
+
+    def copy(self) -> "Token":
+        return Token(**self)
+
+
+_FIELDSET = frozenset(CONLLFIELDS)
+_getfields = attrgetter(*CONLLFIELDS)
+
+
+class Sentence(MutableMapping):
+    """A conll sentence: a list of tokens, plus metadata from the comment lines.
+
+    Can be used like the sentence dicts it replaces, where "tokens" is the
+    first key, followed by the metadata keys in the order they were read.
+    """
+
+    __slots__ = ("tokens", "meta")
+
+    def __init__(self, tokens: list | None = None, **meta):
+        self.tokens = tokens if tokens is not None else []
+        self.meta = meta
+
+    def __getitem__(self, key):
+        if key == "tokens":
+            return self.tokens
+        return self.meta[key]
+
+    def __setitem__(self, key, value):
+        if key == "tokens":
+            self.tokens = value
+        else:
+            self.meta[key] = value
+
+    def __delitem__(self, key):
+        if key == "tokens":
+            raise KeyError("A sentence always has tokens")
+        del self.meta[key]
+
+    def __iter__(self):
+        yield "tokens"
+        yield from self.meta
+
+    def __len__(self):
+        return 1 + len(self.meta)
+
+    def __repr__(self):
+        return f"Sentence(tokens={self.tokens}, **{self.meta})"
+
+    def copy(self) -> "Sentence":
+        return Sentence(list(self.tokens), **self.meta)
+
+
 # Regular expressions for reading conll lines
 
 COMMENTPATTERN = re.compile(r"^# (.+?) = (.+?)$")
@@ -42,6 +162,64 @@ TOKENLINEPATTERN = re.compile(
 DIALECTPATTERN = re.compile(r"^# dialect:\s*(.*)$")
 
 
+def _parse_token_fields(fields: list) -> Token | None:
+    """Parse the tab-separated fields of a well-formed token line into a Token.
+
+    Returns None if the line needs the full TOKENLINEPATTERN and parse_line.
+    """
+    if not (
+        len(fields) == 10
+        and fields[0].isdecimal()
+        and fields[6].isdecimal()
+        and fields[1]
+        and fields[3]
+        and fields[7]
+        and fields[9]
+        and not fields[9][-1].isspace()
+    ):
+        return None
+    token = Token.from_fields([sys.intern(field) if field else "_" for field in fields])
+    token.ID = int(fields[0])  # type: ignore
+    token.HEAD = int(fields[6])  # type: ignore
+    return token
+
+
+def read_conll_line(line: str) -> tuple[str, str | tuple | Token | None]:
+    """Classify, validate and parse a conll line in a single pass.
+
+    The first character decides which patterns are tried. Returns a tuple
+    (kind, value), where kind and value are one of:
+    ("empty", None), ("newpardoc", "newpar" or "newdoc"),
+    ("comment", (key, value)), ("dialect", None), ("token", Token)
+    or ("invalid", None).
+
+    Parameter
+    ----------
+    line: str
+        a line from a conll file, without trailing newline
+    """
+    if not line:
+        return "empty", None
+    if line[0] == "#":
+        if matchobj := NEWPARDOCPATTERN.match(line):
+            return "newpardoc", matchobj.group(1)
+        if matchobj := COMMENTPATTERN.match(line):
+            return "comment", (matchobj.group(1), matchobj.group(2))
+        if DIALECTPATTERN.match(line):
+            return "dialect", None
+    elif line[0].isdecimal():
+        if (token := _parse_token_fields(line.split("\t"))) is not None:
+            return "token", token
+        if TOKENLINEPATTERN.match(line):
+            return "token", parse_line(line)
+    return "invalid", None
+
+
+def is_valid_conll_line(line: str) -> bool:
+    """Check if a line is a valid comment, token or empty line in a conll file."""
+    return read_conll_line(line)[0] != "invalid"
+
+
 def validate_conll_lines(lines: list) -> list:
     """Check a list of lines to see if they are valid lines of a conll file
     if all lines are valid, the lines are returned. Else, an error is raised
@@ -55,17 +233,7 @@ def validate_conll_lines(lines: list) -> list:
     """
     invalid_lines = []
     for i, line in enumerate(lines):
-        validline = any(
-            pattern.match(line)
-            for pattern in [
-                COMMENTPATTERN,
-                NEWPARDOCPATTERN,
-                EMPTYLINEPATTERN,
-                TOKENLINEPATTERN,
-                DIALECTPATTERN,
-            ]
-        )
-        if not validline:
+        if not is_valid_conll_line(line):
             invalid_lines.append(f"line: {i}, text: {line}")
     if invalid_lines:
         print("Error: There are invalid line(s):")
@@ -74,8 +242,8 @@ def validate_conll_lines(lines: list) -> list:
     return lines
 
 
-def parse_line(conll_line: str) -> dict:
-    """Parses a string containing a valid conll line and returns a dict
+def parse_line(conll_line: str) -> Token:
+    """Parses a string containing a valid conll line and returns a Token
     with the UD field names as keys and values from the split string.
     ID and HEAD values are integers.
 
@@ -86,15 +254,10 @@ def parse_line(conll_line: str) -> dict:
     """
 
     vals = conll_line.strip().split("\t")
-    token = dict(zip(CONLLFIELDS, vals))
-    parsed = token.copy()
-
-    for k, v in token.items():
-        if k in ["ID", "HEAD"]:
-            parsed[k] = int(v)  # type: ignore
-        if (v is None) or (v == ""):
-            parsed[k] = "_"
-
+    parsed = Token(sys.intern(v) if v else "_" for v in vals)
+    for k in ("ID", "HEAD"):
+        if k in parsed:
+            parsed[k] = int(parsed[k])  # type: ignore
     return parsed
 
 
@@ -102,9 +265,11 @@ def parse_conll_file(filepath: Path) -> dict:
     """Opens a conll file and returns a dict representation of
     the content of that file. On the top level, there is a key
     "file" with the filename sting, as well as "sentences",
-    taking a list of sentence dicts as a value. For each sentence
+    taking a list of Sentence mappings as a value. For each sentence
     comments of type "# feature = value" is converted to a key-value
-    pair in the sentence dict, and "# newpar" is converted to ""newpar": True"
+    pair in the Sentence, and "# newpar" is converted to ""newpar": True".
+    Lines that are not valid conll lines are skipped, and listed
+    under the key "invalid_lines".
 
     Parameter
     ----------
@@ -112,100 +277,248 @@ def parse_conll_file(filepath: Path) -> dict:
         a conll file
     """
 
-    conlldict = {"file": filepath.name, "sentences": []}
-    sentdict = {"tokens": []}
-    lines = validate_conll_lines(filereadlines(filepath))
-    for line in lines:
-        if EMPTYLINEPATTERN.match(line):
-            if not sentdict["tokens"]:
-                pass
-            conlldict["sentences"].append(sentdict)
-            sentdict = {"tokens": []}
-        elif matchobj := NEWPARDOCPATTERN.match(line):
-            metadata = matchobj.group(1)
-            sentdict[metadata] = True  # type: ignore
-        elif matchobj := COMMENTPATTERN.match(line):
-            metadata = matchobj.group(1)
+    return parse_conll_lines(filereadlines(filepath), filepath.name)
+
+
+def parse_conll_lines(lines: list, filename: str = "") -> dict:
+    """Parse a list of conll lines into the same dict representation
+    as parse_conll_file, with `filename` as the value of "file".
+    Invalid lines are listed under the key "invalid_lines".
+
+    Parameter
+    ----------
+    lines: list
+        lines from a conll file, without trailing newlines
+    filename: str
+        name of the file the lines were read from
+    """
+    invalid_lines = []
+    sentences = list(iter_sentences(lines, invalid_lines))
+    return {"file": filename, "sentences": sentences, "invalid_lines": invalid_lines}
+
+
+def iter_sentences(
+    lines: Iterable[str], invalid_lines: list | None = None
+) -> Generator[Sentence, None, None]:
+    """Parse conll lines and yield one Sentence at a time.
+
+    Each line is classified, validated and parsed once with read_conll_line.
+    A sentence is yielded when the empty line that ends it is read.
+
+    Parameter
+    ----------
+    lines: Iterable[str]
+        lines from a conll file, without trailing newlines
+    invalid_lines: list | None
+        if given, invalid lines are appended to it as "line: <index>, text: <line>"
+    """
+    sentdict = Sentence()
+    for i, line in enumerate(lines):
+        kind, value = read_conll_line(line)
+        if kind == "token":
+            sentdict.tokens.append(value)
+        elif kind == "empty":
+            yield sentdict
+            sentdict = Sentence()
+        elif kind == "comment":
+            metadata, metavalue = value  # type: ignore
             if metadata == "ud_id" or metadata == "id":
                 metadata = "sent_id"
-            sentdict[metadata] = matchobj.group(2)  # type: ignore
+            sentdict[metadata] = metavalue
+        elif kind == "newpardoc":
+            sentdict[value] = True  # type: ignore
+        elif kind == "invalid" and invalid_lines is not None:
+            invalid_lines.append(f"line: {i}, text: {line.strip()}")
+
+
+def iter_conll_sentences(
+    filepath: str | Path, invalid_lines: list | None = None
+) -> Generator[Sentence, None, None]:
+    """Read a conll file lazily and yield one Sentence at a time,
+    in the same format as the sentences from parse_conll_file.
+
+    Only the current sentence is kept in memory.
 
-        elif TOKENLINEPATTERN.match(line):
-            sentdict["tokens"].append(parse_line(line))
-    return conlldict
+    Parameter
+    ----------
+    filepath: str | pathlib.Path
+        a conll file
+    invalid_lines: list | None
+        if given, invalid lines are appended to it as they are read
+    """
+    with open(filepath, encoding="utf-8") as fp:
+        yield from iter_sentences((line.rstrip("\r\n") for line in fp), invalid_lines)
 
 
 ### End of copied module ###
 
 
+def split_conll_lines(lines: list, n_shards: int) -> list[list]:
+    """Split conll lines into at most `n_shards` consecutive shards of whole sentences.
+
+    Shards are cut after the empty line that ends a sentence, so comment lines
+    like `# newpar` stay with the sentence they precede. Joining the shards
+    gives back the original lines.
+    """
+    ends = [i + 1 for i, line in enumerate(lines) if EMPTYLINEPATTERN.match(line)]
+    n_shards = max(1, min(n_shards, len(ends)))
+    cuts = [ends[len(ends) * k // n_shards - 1] for k in range(1, n_shards)]
+    bounds = [0, *cuts, len(lines)]
+    return [lines[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
 def filereadlines(id_file):
     return Path(id_file).read_text().splitlines()
 
 
 # Skriv CONLLU-filer med eller uten kommentarlinjer
+FLAG_COMMENTS = ("newpar", "newdoc")
+VALUE_COMMENTS = ("sent_id", "text", "dialect", "newpar id", "newdoc id")
+NEWPARDOC = ("newdoc", "newdoc id", "newpar", "newpar id")
+
+
 def add_commentlines(sentence: dict) -> Generator:
     """Format comment lines with sentence metadata"""
     for meta, value in sentence.items():
-        if meta in ("newpar", "newdoc"):
+        if meta in FLAG_COMMENTS:
             yield f"# {meta}\n"
-        elif meta in ("sent_id", "text", "dialect", "newpar id", "newdoc id"):
+        elif meta in VALUE_COMMENTS:
             yield f"# {meta} = {value}\n"
 
 
-def write_conll(data: dict, conllu_filepath: str | Path, drop_comments: bool = False):
-    """Format a dict with treebank data to conllu strings."""
+def format_conllu_lines(sentences, drop_comments: bool = False) -> Generator:
+    """Format treebank sentences to conllu lines, one sentence at a time."""
+    for sentence in sentences:
+        if not drop_comments:
+            yield from add_commentlines(sentence)
+        for token in sentence.get("tokens"):
+            yield "\t".join(map(str, token.values())) + "\n"
+        yield "\n"
+
+
+def format_conll(data: dict, drop_comments: bool = False) -> str:
+    """Format a dict with treebank data to a conllu string."""
+    return "".join(format_conllu_lines(data["sentences"], drop_comments))
 
-    def format_conllu_lines(sentences: list) -> Generator:
-        for sentence in sentences:
-            if not drop_comments:
-                yield from add_commentlines(sentence)
-            for token in sentence.get("tokens"):
-                yield "\t".join(map(str, token.values())) + "\n"
-            yield "\n"
 
-    output_data = format_conllu_lines(data["sentences"])
+def write_conll(data: dict, conllu_filepath: str | Path, drop_comments: bool = False):
+    """Format a dict with treebank data to conllu strings."""
+    output_data = format_conllu_lines(data["sentences"], drop_comments)
     with open(conllu_filepath, "w+", encoding="utf-8") as fp:
         fp.writelines(output_data)
 
 
+CATEGORICAL_FIELDS = ["LEMMA", "UPOS", "XPOS", "DEPREL"]
+
+
 def load_conll_to_df(conll: dict) -> pd.DataFrame:
-    """Load a dictionary with conlldata into a pandas dataframe"""
-    dfs = []
+    """Load a dictionary with conlldata into a pandas dataframe.
+
+    There is one row per token, with the token fields, the sentence metadata
+    and the index of the sentence in the column "idx". Metadata that a sentence
+    does not have is False. Each column is built in one pass over the sentences,
+    and the fields in CATEGORICAL_FIELDS get a categorical dtype.
+    """
+    columns = {}
+    rows = []
     for idx, sentence in enumerate(conll["sentences"]):
-        sent_df = pd.DataFrame(sentence.get("tokens"))
-        for col in sentence.keys():
-            if col == "tokens":
+        tokens = sentence.get("tokens")
+        n_tokens = len(tokens)
+        # the metadata columns of a sentence without tokens are kept, without rows
+        sentence_columns = [
+            *(tokens[0] if n_tokens else []),
+            *(col for col in sentence if col != "tokens"),
+        ]
+        for col in [*sentence_columns, "idx"]:
+            if col not in columns:
+                columns[col] = [False] * len(rows)
+        if not n_tokens:
+            continue
+        for token in tokens:
+            rows.append(_token_values(token))
+        for col, values in columns.items():
+            if col in _FIELDSET:
                 continue
-            sent_df[col] = sentence.get(col)
-        sent_df["idx"] = idx
-        dfs.append(sent_df)
+            if col == "idx":
+                values.extend([idx] * n_tokens)
+            else:
+                values.extend([sentence.get(col, False)] * n_tokens)
+
+    field_values = dict(zip(CONLLFIELDS, zip(*rows))) if rows else {}
+    data = {}
+    for col, values in columns.items():
+        if col in _FIELDSET:
+            values = field_values[col]
+            if col in CATEGORICAL_FIELDS:
+                values = pd.Categorical(values)
+        data[col] = values
+    return pd.DataFrame(data)
+
+
+def _token_values(token) -> tuple:
+    """The values of all fields of a token, with False for missing fields."""
+    try:
+        return _getfields(token)
+    except (AttributeError, TypeError):
+        return tuple(token.get(field, False) for field in CONLLFIELDS)
+
 
-    return pd.concat(dfs, ignore_index=True).fillna(False)
+def _token_lines(df: pd.DataFrame) -> pd.Series:
+    """Format each row of a dataframe with conll data as a token line."""
+    fields = [df[field].astype(object).fillna("_").astype(str) for field in CONLLFIELDS]
+    return fields[0].str.cat(fields[1:], sep="\t") + "\n"
+
+
+def _comment_headers(sentences: pd.DataFrame) -> pd.Series:
+    """Format the comment lines of each row of a dataframe with sentence metadata.
+
+    Metadata that is missing (False or NaN) is left out. The newdoc and newpar
+    comments come before the others.
+    """
+    headers = pd.Series("", index=sentences.index, dtype=object)
+    for meta in sorted(sentences.columns, key=lambda meta: meta not in NEWPARDOC):
+        values = sentences[meta]
+        present = values.notna() & values.ne(False)
+        if meta in FLAG_COMMENTS:
+            headers = headers.where(~present, headers + f"# {meta}\n")
+        elif meta in VALUE_COMMENTS:
+            comments = f"# {meta} = " + values.astype(object).astype(str) + "\n"
+            headers = headers.where(~present, headers + comments)
+    return headers
 
 
 def get_conll_tsv(df: pd.DataFrame) -> str:
     """Turn a dataframe with conll data into a tsv-formatted string"""
-    return df[CONLLFIELDS].to_csv(
-        sep="\t",
-        header=False,
-        index=False,
-        quoting=QUOTE_NONE,
-        quotechar="",
-        escapechar="\\",
-        na_rep="_",
-    )
-
-
-def df_to_conll(totaldf: pd.DataFrame, drop_comments: bool = False):
+    return "".join(_token_lines(df))
+
+
+def write_df_conll(
+    totaldf: pd.DataFrame, fp, drop_comments: bool = False, batch_size: int = 10000
+) -> None:
+    """Write a pandas dataframe with conll data to an open text file as conllu.
+
+    The rows of each sentence, grouped by "idx", are written in the order of the
+    sentence indices, with the comment lines from the metadata of the first row
+    of the sentence. The token lines of the whole dataframe are formatted at
+    once, and written in batches of `batch_size` rows.
+    """
+    if not totaldf["idx"].is_monotonic_increasing:
+        totaldf = totaldf.sort_values("idx", kind="stable")
+    totaldf = totaldf.reset_index(drop=True)
+    lines = _token_lines(totaldf).astype(object)
+    idx = totaldf["idx"]
+    starts = idx.ne(idx.shift())
+    if not drop_comments:
+        meta = [col for col in totaldf.columns if col not in _FIELDSET]
+        lines[starts] = _comment_headers(totaldf.loc[starts, meta]) + lines[starts]
+    ends = idx.ne(idx.shift(-1))
+    lines[ends] = lines[ends] + "\n"
+    for start in range(0, len(lines), batch_size):
+        fp.writelines(lines.iloc[start : start + batch_size])
+
+
+def df_to_conll(totaldf: pd.DataFrame, drop_comments: bool = False) -> str:
     """Produce conllu string from a pandas dataframe."""
-    gb = totaldf.groupby("idx")
-    mystring = ""
-    ids = gb.groups.keys()
-    for id in ids:
-        df = gb.get_group(id).copy()
-        if not drop_comments:
-            for line in add_commentlines(df.iloc[0].to_dict()):
-                mystring += line
-        mystring += get_conll_tsv(df)
-        mystring += "\n"
-    return mystring
+    output = io.StringIO()
+    write_df_conll(totaldf, output, drop_comments)
+    return output.getvalue()
@@ -0,0 +1,199 @@
+"""Cache the converted UD output of each sentence on disk.
+
+Sentences are cached under a key made from the input sentence lines, a hash of
+the Grew rules, the language and the versions of ndt2ud, grewpy and udapi,
+so that a re-run only needs to convert the sentences that changed.
+The cache is an SQLite database that is kept below a maximum size by evicting
+the least recently used sentences.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from ndt2ud.grs_cache import grs_hash
+from ndt2ud.parse_conllu import EMPTYLINEPATTERN, read_conll_line
+
+SENTENCE_CACHE_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "ndt2ud"
+    / "sentences.sqlite"
+)
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+HEADER_KEY = "# global.columns"
+OUTPUTBLOCK = re.compile(r".+?(?:\n\n+|\Z)", re.DOTALL)
+
+
+def _package_version(package: str) -> str:
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def split_sentence_chunks(lines: list[str]) -> tuple[list[list[str]], list[str]]:
+    """Split conll lines into chunks that each end with the empty line of a sentence.
+
+    Returns the chunks and the trailing lines after the last empty line.
+    """
+    chunks, start = [], 0
+    for i, line in enumerate(lines):
+        if EMPTYLINEPATTERN.match(line):
+            chunks.append(lines[start : i + 1])
+            start = i + 1
+    return chunks, lines[start:]
+
+
+def split_conll_output(conll: str) -> tuple[str, list[str]]:
+    """Split converted conllu output into its `# global.columns` header and
+    one block per sentence, with the empty lines that end it.
+
+    Joining the header and the blocks gives back the output.
+    """
+    header = ""
+    while conll.startswith("# global.columns"):
+        line, _, conll = conll.partition("\n")
+        header += line + "\n"
+    return header, OUTPUTBLOCK.findall(conll)
+
+
+class SentenceCache:
+    """An SQLite cache that maps input sentences to their converted UD output."""
+
+    def __init__(
+        self,
+        grs_path: str | Path,
+        language: str,
+        cache_file: str | Path = SENTENCE_CACHE_FILE,
+        max_bytes: int = MAX_CACHE_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        versions = "|".join(
+            _package_version(package) for package in ("ndt2ud", "grewpy", "udapi")
+        )
+        self.namespace = f"{grs_hash(grs_path)}|{language}|{versions}|"
+        Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(cache_file, timeout=60)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS sentences "
+            "(key TEXT PRIMARY KEY, output TEXT, size INTEGER, last_used REAL)"
+        )
+
+    def key(self, lines: list[str]) -> str:
+        """Cache key for the lines of an input sentence."""
+        sentence = "\n".join(line.rstrip("\r\n") for line in lines).strip("\n")
+        return hashlib.sha256((self.namespace + sentence).encode()).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        """Look up cached outputs, and mark them as recently used."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self.connection:
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(
+                    self.connection.execute(
+                        f"SELECT key, output FROM sentences WHERE key IN ({placeholders})",
+                        batch,
+                    ).fetchall()
+                )
+                self.connection.execute(
+                    f"UPDATE sentences SET last_used = ? WHERE key IN ({placeholders})",
+                    [time.time(), *batch],
+                )
+        return found
+
+    def put_many(self, outputs: dict[str, str]) -> None:
+        """Store converted outputs, and evict old entries if the cache is too large."""
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO sentences VALUES (?, ?, ?, ?)",
+                [
+                    (key, output, len(output.encode()), now)
+                    for key, output in outputs.items()
+                ],
+            )
+        self.evict()
+
+    def size(self) -> int:
+        (total,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM sentences"
+        ).fetchone()
+        return total
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cache fits in max_bytes."""
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        for key, size in self.connection.execute(
+            "SELECT key, size FROM sentences ORDER BY last_used, rowid"
+        ):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        with self.connection:
+            self.connection.executemany("DELETE FROM sentences WHERE key = ?", evicted)
+        logging.debug(f"Evicted {len(evicted)} sentences from the sentence cache")
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def convert_with_cache(lines: list[str], cache: SentenceCache, convert) -> str:
+    """Convert conll lines, reusing the cached output of unchanged sentences.
+
+    Only the sentences missing from the cache are passed to `convert`, which
+    must take a list of conll lines and return the converted conllu string.
+    Their output is spliced back in between the cached sentences, and cached.
+    Sentences with invalid lines are always converted, so that they are reported.
+    """
+    chunks, _ = split_sentence_chunks(lines)
+    kinds = [[read_conll_line(line)[0] for line in chunk] for chunk in chunks]
+    has_tokens = ["token" in chunk_kinds for chunk_kinds in kinds]
+    keys = [
+        cache.key(chunk) if tokens and "invalid" not in chunk_kinds else None
+        for chunk, chunk_kinds, tokens in zip(chunks, kinds, has_tokens)
+    ]
+    header_key = cache.key([HEADER_KEY])
+    cached = cache.get_many([key for key in keys if key is not None] + [header_key])
+    header = cached.pop(header_key, None)
+
+    missing = [i for i, key in enumerate(keys) if key is None or key not in cached]
+    logging.info(
+        f"Sentence cache: {len(chunks) - len(missing)} sentences cached, "
+        f"{len(missing)} to convert"
+    )
+    new_outputs = {}
+    if header is None or any(has_tokens[i] for i in missing):
+        conll = convert([line for i in missing for line in chunks[i]])
+        header, blocks = split_conll_output(conll)
+        converted = [i for i in missing if has_tokens[i]]
+        if len(blocks) != len(converted):
+            logging.warning(
+                "Could not match the converted sentences to the input sentences, "
+                "converting the whole file without the sentence cache"
+            )
+            return convert(lines)
+        new_outputs = dict(zip(converted, blocks))
+        cache.put_many(
+            {header_key: header}
+            | {keys[i]: block for i, block in new_outputs.items() if keys[i]}
+        )
+
+    output = [header]
+    for i, key in enumerate(keys):
+        if i in new_outputs:
+            output.append(new_outputs[i])
+        elif key is not None:
+            output.append(cached[key])
+    return "".join(output)
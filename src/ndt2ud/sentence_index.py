@@ -0,0 +1,164 @@
+"""Look up sentences in a conllu file by their sent_id, without parsing the file.
+
+The index maps each sent_id to the byte offset and length of its sentence,
+from the first comment line to the empty line that ends it. It is built in one
+pass over the file, and stored in a sidecar file next to it, which is rebuilt
+when the size or modification time of the conllu file changes. The conllu file
+is memory-mapped, so that a sentence is read without reading the rest of it.
+"""
+
+import logging
+import mmap
+import re
+from collections.abc import Iterable
+from pathlib import Path
+
+from ndt2ud.parse_conllu import Sentence, iter_sentences
+
+INDEX_SUFFIX = ".sentidx"
+INDEX_HEADER = "# ndt2ud sentence index v2"
+SENTIDPATTERN = re.compile(rb"^# (?:sent_id|ud_id|id) = (.+?)\r?\n?$")
+HEADER_PREFIX = b"# global.columns"
+
+
+def index_file_for(conllu_file: str | Path) -> Path:
+    return Path(f"{conllu_file}{INDEX_SUFFIX}")
+
+
+def build_sentence_index(conllu_file: str | Path) -> dict[str, tuple[int, int]]:
+    """Map the sent_id of each sentence in a conllu file to its byte offset and
+    length. Sentences without a sent_id are left out, and for a non-unique
+    sent_id the first sentence is kept. A `# global.columns` header before a
+    sentence is not part of it."""
+    index = {}
+    offset, start, sent_id = 0, None, None
+    with open(conllu_file, "rb") as f:
+        for line in f:
+            if line in (b"\n", b"\r\n"):
+                if start is not None and sent_id is not None:
+                    _add(index, sent_id, start, offset + len(line) - start)
+                start, sent_id = None, None
+            elif start is not None or not line.startswith(HEADER_PREFIX):
+                if start is None:
+                    start = offset
+                if line[:1] == b"#" and (match := SENTIDPATTERN.match(line)):
+                    sent_id = match.group(1).decode("utf-8")
+            offset += len(line)
+    if start is not None and sent_id is not None:
+        _add(index, sent_id, start, offset - start)
+    return index
+
+
+def _add(index: dict, sent_id: str, offset: int, length: int) -> None:
+    if sent_id in index:
+        logging.warning(f"Non-unique sent_id {sent_id}, only the first is indexed")
+        return
+    index[sent_id] = (offset, length)
+
+
+def _stamp(conllu_file: str | Path) -> str:
+    stat = Path(conllu_file).stat()
+    return f"{INDEX_HEADER}\t{stat.st_size}\t{stat.st_mtime_ns}"
+
+
+def write_sentence_index(
+    conllu_file: str | Path, index: dict, index_file: str | Path | None = None
+) -> None:
+    """Store an index as a tsv file with a sent_id, offset and length per line."""
+    index_file = index_file_for(conllu_file) if index_file is None else index_file
+    with open(index_file, "w", encoding="utf-8") as f:
+        f.write(_stamp(conllu_file) + "\n")
+        for sent_id, (offset, length) in index.items():
+            f.write(f"{sent_id}\t{offset}\t{length}\n")
+
+
+def read_sentence_index(
+    conllu_file: str | Path, index_file: str | Path | None = None
+) -> dict[str, tuple[int, int]] | None:
+    """Read the stored index of a conllu file, or None if it is missing or stale."""
+    index_file = index_file_for(conllu_file) if index_file is None else index_file
+    try:
+        with open(index_file, encoding="utf-8") as f:
+            if f.readline().rstrip("\n") != _stamp(conllu_file):
+                return None
+            index = {}
+            for line in f:
+                sent_id, offset, length = line.rstrip("\n").rsplit("\t", 2)
+                index[sent_id] = (int(offset), int(length))
+            return index
+    except (OSError, ValueError):
+        return None
+
+
+def load_sentence_index(
+    conllu_file: str | Path, index_file: str | Path | None = None
+) -> dict[str, tuple[int, int]]:
+    """Read the stored index of a conllu file, or build and store a new one."""
+    index = read_sentence_index(conllu_file, index_file)
+    if index is not None:
+        return index
+    logging.info(f"Indexing the sentences of {conllu_file}")
+    index = build_sentence_index(conllu_file)
+    try:
+        write_sentence_index(conllu_file, index, index_file)
+    except OSError as err:
+        logging.debug(f"Could not store the sentence index: {err}")
+    return index
+
+
+class SentenceIndex:
+    """Random access to the sentences of a memory-mapped conllu file by sent_id."""
+
+    def __init__(self, conllu_file: str | Path, index_file: str | Path | None = None):
+        self.conllu_file = Path(conllu_file)
+        self.index = load_sentence_index(conllu_file, index_file)
+        self._file = open(conllu_file, "rb")
+        if self.index:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = b""  # an empty file can't be memory-mapped
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, sent_id):
+        return sent_id in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def sentence_text(self, sent_id: str) -> str:
+        """The conllu lines of a sentence, with the empty line that ends it."""
+        offset, length = self.index[sent_id]
+        return self._map[offset : offset + length].decode("utf-8")
+
+    def sentence(self, sent_id: str) -> Sentence:
+        """Parse a sentence into a Sentence, like parse_conll_file."""
+        lines = self.sentence_text(sent_id).splitlines()
+        return next(iter_sentences([*lines, ""]))
+
+    def subcorpus(self, sent_ids: Iterable[str]) -> str:
+        """Extract the sentences with the given ids, in the order of `sent_ids`,
+        as a conllu string. Ids that are not in the file are skipped."""
+        blocks = []
+        for sent_id in sent_ids:
+            if sent_id not in self.index:
+                logging.warning(f"No sentence {sent_id} in {self.conllu_file}")
+                continue
+            block = self.sentence_text(sent_id).rstrip("\r\n")
+            blocks.append(block + "\n\n")
+        return "".join(blocks)
+
+    def write_subcorpus(self, sent_ids: Iterable[str], output_file: str | Path):
+        Path(output_file).write_text(self.subcorpus(sent_ids), encoding="utf-8")
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,211 @@
+"""Compare two versions of a converted treebank sentence by sentence.
+
+The sentences of the old and new file are aligned by sent_id with the byte
+offsets from `ndt2ud.sentence_index`, and each sentence is hashed, so that only
+the sentences whose text changed are parsed. For those, the metadata and the
+fields of each token are compared. The changes are counted by field and by
+deprel transition. The changed sentences can be compared in parallel worker
+processes, in shards of consecutive sentences.
+"""
+
+import hashlib
+import mmap
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from ndt2ud.parse_conllu import CONLLFIELDS, iter_sentences
+from ndt2ud.sentence_index import build_sentence_index
+
+SHARD_SIZE = 500
+
+
+def _open_map(conllu_file: str | Path):
+    with open(conllu_file, "rb") as f:
+        if Path(conllu_file).stat().st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def sentence_hashes(conllu_file: str | Path) -> dict[str, tuple[bytes, int, int]]:
+    """Map each sent_id in a conllu file to the hash, offset and length of its
+    sentence."""
+    index = build_sentence_index(conllu_file)
+    data = _open_map(conllu_file)
+    hashes = {
+        sent_id: (
+            hashlib.blake2b(data[offset : offset + length]).digest(),
+            offset,
+            length,
+        )
+        for sent_id, (offset, length) in index.items()
+    }
+    if isinstance(data, mmap.mmap):
+        data.close()
+    return hashes
+
+
+def _parse(data, offset: int, length: int):
+    lines = data[offset : offset + length].decode("utf-8").splitlines()
+    return next(iter_sentences([*lines, ""]))
+
+
+def sentence_changes(old, new) -> list[dict]:
+    """List the differences between two versions of a parsed sentence.
+
+    Each change has the token ID and form, or None for metadata, the field and
+    the old and new value.
+    """
+    changes = []
+    for key in dict.fromkeys([*old.meta, *new.meta]):
+        if old.meta.get(key) != new.meta.get(key):
+            changes.append(
+                {
+                    "id": None,
+                    "form": None,
+                    "field": f"# {key}",
+                    "old": old.meta.get(key),
+                    "new": new.meta.get(key),
+                }
+            )
+    if len(old.tokens) != len(new.tokens):
+        changes.append(
+            {
+                "id": None,
+                "form": None,
+                "field": "tokens",
+                "old": len(old.tokens),
+                "new": len(new.tokens),
+            }
+        )
+        return changes
+    for old_token, new_token in zip(old.tokens, new.tokens):
+        for field, old_value, new_value in zip(
+            CONLLFIELDS, old_token.values(), new_token.values()
+        ):
+            if old_value != new_value:
+                changes.append(
+                    {
+                        "id": new_token["ID"],
+                        "form": new_token["FORM"],
+                        "field": field,
+                        "old": old_value,
+                        "new": new_value,
+                    }
+                )
+    return changes
+
+
+def diff_sentences(
+    old_file: str | Path, new_file: str | Path, ranges: list[tuple]
+) -> list[dict]:
+    """Compare sentences, given as (sent_id, old offset, old length, new offset,
+    new length), of two conllu files."""
+    old_data, new_data = _open_map(old_file), _open_map(new_file)
+    try:
+        return [
+            {
+                "sent_id": sent_id,
+                "changes": sentence_changes(
+                    _parse(old_data, old_offset, old_length),
+                    _parse(new_data, new_offset, new_length),
+                ),
+            }
+            for sent_id, old_offset, old_length, new_offset, new_length in ranges
+        ]
+    finally:
+        for data in (old_data, new_data):
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+
+def diff_treebanks(old_file: str | Path, new_file: str | Path, jobs: int = 1) -> dict:
+    """Compare the sentences of two versions of a conllu file by sent_id.
+
+    Sentences without a sent_id are not compared. Returns the ids of the added
+    and removed sentences, the changes in each changed sentence, and the counts
+    of changes by field and by deprel transition.
+    """
+    old_hashes, new_hashes = sentence_hashes(old_file), sentence_hashes(new_file)
+    changed = [
+        (sent_id, *old_hashes[sent_id][1:], *new[1:])
+        for sent_id, new in new_hashes.items()
+        if sent_id in old_hashes and old_hashes[sent_id][0] != new[0]
+    ]
+    shards = [
+        changed[start : start + SHARD_SIZE]
+        for start in range(0, len(changed), SHARD_SIZE)
+    ]
+    if jobs > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(shards)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            results = executor.map(
+                diff_sentences,
+                [old_file] * len(shards),
+                [new_file] * len(shards),
+                shards,
+            )
+            sentences = [sentence for result in results for sentence in result]
+    else:
+        sentences = [
+            sentence
+            for shard in shards
+            for sentence in diff_sentences(old_file, new_file, shard)
+        ]
+
+    fields, deprels = Counter(), Counter()
+    for sentence in sentences:
+        for change in sentence["changes"]:
+            fields[change["field"]] += 1
+            if change["field"] == "DEPREL":
+                deprels[f"{change['old']} -> {change['new']}"] += 1
+    return {
+        "old_file": str(old_file),
+        "new_file": str(new_file),
+        "sentences": len(new_hashes),
+        "unchanged": len(new_hashes)
+        - len(changed)
+        - len(new_hashes.keys() - old_hashes.keys()),
+        "added": [sent_id for sent_id in new_hashes if sent_id not in old_hashes],
+        "removed": [sent_id for sent_id in old_hashes if sent_id not in new_hashes],
+        "changed": sentences,
+        "fields": dict(fields.most_common()),
+        "deprel_transitions": dict(deprels.most_common()),
+    }
+
+
+def format_report(diff: dict, max_sentences: int = 20) -> str:
+    """Format a treebank diff as a text report, with the changes in the first
+    `max_sentences` changed sentences."""
+    lines = [
+        f"Old: {diff['old_file']}",
+        f"New: {diff['new_file']}",
+        f"{diff['sentences']} sentences: {len(diff['changed'])} changed, "
+        f"{diff['unchanged']} unchanged, {len(diff['added'])} added, "
+        f"{len(diff['removed'])} removed",
+    ]
+    if diff["fields"]:
+        lines += ["", "Changes by field:"]
+        lines += [f"{count:>8}  {field}" for field, count in diff["fields"].items()]
+    if diff["deprel_transitions"]:
+        lines += ["", "Deprel transitions:"]
+        lines += [
+            f"{count:>8}  {transition}"
+            for transition, count in diff["deprel_transitions"].items()
+        ]
+    for label in ("added", "removed"):
+        if diff[label]:
+            lines += ["", f"Sentences {label}: {', '.join(diff[label])}"]
+    if diff["changed"]:
+        lines += ["", f"Changed sentences (first {max_sentences}):"]
+    for sentence in diff["changed"][:max_sentences]:
+        lines.append(f"# sent_id = {sentence['sent_id']}")
+        for change in sentence["changes"]:
+            token = "" if change["id"] is None else f"{change['id']} {change['form']} "
+            lines.append(
+                f"  {token}{change['field']}: {change['old']} -> {change['new']}"
+            )
+    return "\n".join(lines) + "\n"
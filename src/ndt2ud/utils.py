@@ -1,12 +1,17 @@
 # %%
+import contextlib
+import csv
+import io
 import logging
 import re
+from collections import Counter
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 # %%
 import grewpy
-import pandas as pd
 from udapi import Document
+from udapi.block.read.conllu import Conllu as ConlluReader
 from udapi.block.ud.fixchain import FixChain
 from udapi.block.ud.fixleaf import FixLeaf
 from udapi.block.ud.fixmultisubjects import FixMultiSubjects
@@ -14,6 +19,10 @@ from udapi.block.ud.fixpunct import FixPunct
 from udapi.block.ud.fixrightheaded import FixRightheaded
 from udapi.block.ud.setspaceafterfromtext import SetSpaceAfterFromText
 from udapi.block.util.normalize import Normalize
+from udapi.block.write.conllu import Conllu as ConlluWriter
+
+SENTENCEBREAK = re.compile(r"\n\n+")
+GLOBALENTITYPATTERN = re.compile(r"^# global\.Entity\s*=\s*(\S+)")
 
 
 def set_spaceafter_from_text(graph: grewpy.Graph):
@@ -42,84 +51,247 @@ def set_spaceafter_from_text(graph: grewpy.Graph):
     return graph
 
 
+def udapi_blocks() -> list:
+    """The udapi blocks of the post-processing, in the order they are applied."""
+    return [
+        SetSpaceAfterFromText(),
+        FixMultiSubjects(),
+        FixLeaf(deprels="aux,cop,case,mark,cc,det"),
+        FixChain(),
+        FixRightheaded(),
+        FixPunct(check_paired_punct_upos=True),
+        Normalize(),
+    ]
+
+
+def apply_udapi_fixes(doc: Document) -> Document:
+    """Apply udapi block functions to a full treebank document, in place."""
+    for block in udapi_blocks():
+        block.run(document=doc)
+    return doc
+
+
+def iter_conll_blocks(conll: str) -> Iterator[str]:
+    """Split a conllu string into the blocks of lines of each sentence."""
+    start = 0
+    for match in SENTENCEBREAK.finditer(conll):
+        if match.start() > start:
+            yield conll[start : match.start()]
+        start = match.end()
+    if conll[start:]:
+        yield conll[start:]
+
+
+def udapi_fixes_stream(sentences: str | Iterable[str]) -> Iterator[str]:
+    """Apply the udapi blocks to one sentence at a time, and yield the fixed
+    sentences as conllu strings.
+
+    All blocks are applied to a tree, in the same order as `apply_udapi_fixes`,
+    before the next sentence is read. `sentences` is a conllu string, or an
+    iterable of conllu strings with one sentence each.
+    """
+    if isinstance(sentences, str):
+        sentences = iter_conll_blocks(sentences)
+    reader, writer = ConlluReader(), ConlluWriter()
+    blocks = udapi_blocks()
+    doc = Document()
+    global_entity = None
+    for block in blocks:
+        block.process_start()
+    for number, sentence in enumerate(sentences, start=1):
+        lines = sentence.rstrip("\n").split("\n")
+        root = reader.read_tree_from_lines(lines)
+        if root is None:
+            continue
+        # udapi keeps the global.Entity header in a private reader attribute,
+        # so read it here and store it in the document meta, like udapi does
+        for line in lines:
+            if line[:1] == "#" and (match := GLOBALENTITYPATTERN.match(line)):
+                global_entity = match.group(1)
+        doc.meta["global.Entity"] = global_entity
+        bundle = doc.create_bundle()
+        bundle.number = number
+        if root._sent_id is not None:
+            bundle_id, _, zone = root._sent_id.partition("/")
+            bundle.bundle_id = bundle_id
+            if zone:
+                root.zone = zone
+        bundle.add_tree(root)
+        for block in blocks:
+            block.process_bundle(bundle)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            for tree in bundle:
+                writer.process_tree(tree)
+        # only the current sentence is kept in memory
+        doc.bundles.clear()
+        yield output.getvalue()
+    for block in blocks:
+        block.process_end()
+
+
 def udapi_fixes(input_file: str, output_file: str):
     """Apply udapi block functions to a full treebank document."""
-    doc = Document(filename=input_file)
+    with open(input_file, encoding="utf-8-sig") as infile:
+        fixed = udapi_fixes_stream(infile.read())
+        with open(output_file, "w", encoding="utf-8") as outfile:
+            outfile.writelines(fixed)
 
-    # Processing full document
-    spaceafter = SetSpaceAfterFromText()
-    spaceafter.run(document=doc)
 
-    fix_multisubj = FixMultiSubjects()
-    fix_multisubj.run(document=doc)
+def udapi_fixes_conll(conll: str) -> str:
+    """Apply udapi block functions to a treebank given as a conllu string."""
+    return "".join(udapi_fixes_stream(conll))
 
-    fix_leaf = FixLeaf(deprels="aux,cop,case,mark,cc,det")
-    fix_leaf.run(document=doc)
 
-    fix_chain = FixChain()
-    fix_chain.run(document=doc)
+# %%
 
-    fix_right = FixRightheaded()
-    fix_right.run(document=doc)
 
-    fixpunct = FixPunct(check_paired_punct_upos=True)
-    fixpunct.run(document=doc)
+ERROR_PATTERN = re.compile(
+    r"^\["
+    + r"(?:File )?(?P<file>[^ ]+)?\s*"
+    + r"(?:Line )?(?P<line>\d+)?\s*"
+    + r"(?:Sent )?(?P<sent>\d+)?\s*"
+    + r"(?:Node )?(?P<node>\d+)?"
+    + r"\]: \["
+    + r"(?P<error_level>L[1234])"
+    + " "
+    + r"(?P<error_class>\w+)"
+    + " "
+    + r"(?P<error_name>[\w-]+)"
+    + r"\] "
+    + r"(?P<error_message>.*)"
+    + r"$"
+)
+ERROR_FIELDS = list(ERROR_PATTERN.groupindex)
+ERROR_TYPE_FIELDS = ["error_level", "error_class", "error_name"]
 
-    normalize_order = Normalize()
-    normalize_order.run(document=doc)
 
-    # Write the modified document to an output file
-    doc.store_conllu(output_file)
+class ErrorSummary:
+    """Counts of the errors in a validation report by error type, file and sentence."""
 
+    def __init__(self):
+        self.by_type = Counter()
+        self.by_file = Counter()
+        self.by_sentence = Counter()
 
-# %%
+    def add(self, error: dict) -> None:
+        file = error["file"]
+        self.by_type[
+            error["error_level"], error["error_class"], error["error_name"]
+        ] += 1
+        self.by_file[file] += 1
+        self.by_sentence[file, error["sent"]] += 1
+
+    @property
+    def total(self) -> int:
+        return self.by_type.total()
 
+    def write_csv(self, output_file: str | Path) -> None:
+        """Write the error type counts to a CSV file, the most frequent first."""
+        with open(output_file, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(ERROR_TYPE_FIELDS + ["count"])
+            for error_type, count in self.by_type.most_common():
+                writer.writerow([*error_type, count])
 
-def report_errors(report_file: Path, output_file: str | Path = "-") -> pd.DataFrame:
+    def format(self) -> str:
+        lines = ["## Summary \n"]
+        for (level, error_class, name), count in self.by_type.most_common():
+            lines.append(f"{level}  {error_class:<10} {name:<40} {count:>8}")
+        lines += ["", "## Errors by file \n"]
+        for file, count in self.by_file.most_common():
+            lines.append(f"{file or '-':<52} {count:>8}")
+        return "\n".join(lines)
+
+
+def iter_report_errors(report_file: str | Path) -> Iterator[dict]:
+    """Read the errors in a report from UniversalDependencies/tools/validate.py,
+    one line at a time."""
+    with open(report_file, encoding="utf-8") as f:
+        for row in f:
+            m = ERROR_PATTERN.fullmatch(row.rstrip("\r\n"))
+            if m is None:
+                logging.debug("Row didn't match the error regex pattern: %s", row)
+                continue
+            yield m.groupdict()
+
+
+def write_error_details(
+    errors: Iterable[dict], details_file: str | Path, batch_size: int = 10000
+) -> Iterator[dict]:
+    """Pass on the errors, while writing them to a CSV or Parquet file.
+
+    The format is chosen from the file suffix. Parquet needs pyarrow, from the
+    `arrow` extra.
+    """
+    if Path(details_file).suffix != ".parquet":
+        with open(details_file, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, ERROR_FIELDS, lineterminator="\n")
+            writer.writeheader()
+            for error in errors:
+                writer.writerow(error)
+                yield error
+        return
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as err:
+        raise ImportError(
+            "Parquet error details need pyarrow, "
+            "install it with `pip install ndt2ud[arrow]`"
+        ) from err
+
+    schema = pa.schema([(field, pa.string()) for field in ERROR_FIELDS])
+    with pq.ParquetWriter(details_file, schema) as writer:
+        batch = []
+        for error in errors:
+            batch.append(error)
+            yield error
+            if len(batch) == batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema))
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema))
+
+
+def report_errors(
+    report_file: Path,
+    output_file: str | Path = "-",
+    details_file: str | Path | None = None,
+    dataframe: bool = False,
+):
     """Parse the error report from the UniversalDependencies/tools/validate.py script,
     and print a compressed report with the sum of each error type.
 
+    The report is read one line at a time, and only the counts are kept.
+
     Args:
         filepath: Path to the validation report file. Should be a Path for a txt-file.
         output_file: Path to write output report to. Default is -, which means it'll just print to the terminal window.
+        details_file: Optional CSV or Parquet file to write every error to.
+        dataframe: Return a pandas DataFrame with every error instead of the ErrorSummary.
     """
-    rows = report_file.read_text(encoding="utf-8").splitlines()
-
-    error_info_regx = re.compile(
-        r"^\["
-        + r"(?:File )?(?P<file>[^ ]+)?\s*"
-        + r"(?:Line )?(?P<line>\d+)?\s*"
-        + r"(?:Sent )?(?P<sent>\d+)?\s*"
-        + r"(?:Node )?(?P<node>\d+)?"
-        + r"\]: \["
-        + r"(?P<error_level>L[1234])"
-        + " "
-        + r"(?P<error_class>\w+)"
-        + " "
-        + r"(?P<error_name>[\w-]+)"
-        + r"\] "
-        + r"(?P<error_message>.*)"
-        + r"$"
-    )
-
-    errors = []
-    for row in rows:
-        m = error_info_regx.fullmatch(row)
-        if m is None:
-            logging.debug("Row didn't match the error regex pattern: %s", row)
-            continue
-        errors.append(m.groupdict())
-
-    df = pd.DataFrame(errors)
-    type_counts = df.value_counts(subset=["error_level", "error_class", "error_name"])
+    errors = iter_report_errors(report_file)
+    if details_file is not None:
+        errors = write_error_details(errors, details_file)
+    summary = ErrorSummary()
+    rows = []
+    for error in errors:
+        summary.add(error)
+        if dataframe:
+            rows.append(error)
 
     if str(output_file).startswith("-"):
-        print("## Summary \n")
-        print(type_counts)
+        print(summary.format())
     else:
-        type_counts.to_csv(output_file)
+        summary.write_csv(output_file)
+
+    if dataframe:
+        import pandas as pd
 
-    return df
+        return pd.DataFrame(rows, columns=ERROR_FIELDS)
+    return summary
 
 
 def remove_comment_lines(input_file: str, output_file: str):
@@ -0,0 +1,228 @@
+"""Validate UD treebanks in-process with the validator of the UD tools repository.
+
+The validator is imported from the `udtools` package of the tools repository
+that holds the validation script. With one job, all files are validated with a
+single validation state, like `validate.py` does. With more jobs, each file is
+validated in its own worker process, which writes its errors to a part file as
+they are found. The part files are appended to the report in the order of the
+input files.
+
+The checks that look across files are kept: each worker knows the sentence ids
+of the files before its file, to report non-unique sentence ids, and the final
+treebank-wide checks run on the merged observations of all workers. Other
+observations, like whether the treebank has features or enhanced graphs, are
+made per file.
+"""
+
+import argparse
+import importlib
+import logging
+import multiprocessing
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from ndt2ud import validation_cache
+
+LANGUAGE = "no"
+
+
+def load_validator(validation_script: str | Path):
+    """Import the validator module from the tools repository of `validation_script`.
+
+    Raises ImportError if the repository has no `udtools` package, as in
+    versions of the tools where `validate.py` is a standalone script.
+    """
+    tools_dir = Path(validation_script).absolute().parent
+    if not (tools_dir / "udtools").is_dir():
+        raise ImportError(f"No udtools package in {tools_dir}")
+    if str(tools_dir) not in sys.path:
+        sys.path.insert(0, str(tools_dir))
+    try:
+        return importlib.import_module("udtools.src.udtools.validator")
+    except ModuleNotFoundError:
+        # the package is also installed, and takes precedence over the repository
+        return importlib.import_module("udtools.validator")
+
+
+def _validator(module, output, report_filename: bool, max_store: int = 1):
+    """A validator that prints all incidents to `output`, like `--max-err 0`."""
+    validator = module.Validator(
+        lang=LANGUAGE,
+        args=argparse.Namespace(max_err=0),
+        output=output,
+        max_store=max_store,
+    )
+    validator.incfg["report_filename"] = report_filename
+    return validator
+
+
+def _validate_files(
+    module,
+    output,
+    input_files: list[str],
+    state,
+    report_filename: bool,
+    cache_file: str | Path | None = None,
+):
+    """Validate files into `state` without the final treebank checks.
+
+    With a `cache_file`, only the sentences that are not in the validation
+    cache are validated, and the incidents of the others are replayed.
+    Returns the validator.
+    """
+    if cache_file is None:
+        validator = _validator(module, output, report_filename)
+        for input_file in input_files:
+            validator.validate_file(input_file, state)
+        return validator
+
+    # the incidents of each sentence are collected from the state to cache them
+    validator = _validator(module, output, report_filename, max_store=0)
+    cache = validation_cache.ValidationCache(
+        validation_cache.validator_fingerprint(module, validator), cache_file
+    )
+    try:
+        for input_file in input_files:
+            state.current_file_name = input_file
+            with open(input_file, encoding="utf-8") as inp:
+                validation_cache.validate_file_handle(
+                    module, validator, inp, state, cache
+                )
+    finally:
+        cache.close()
+    return validator
+
+
+def _observations(state) -> dict:
+    """The parts of a validation state that are needed to merge it with others."""
+    return {
+        "counts": [
+            (incident_type.name, testclass.name, count)
+            for incident_type, counts in state.error_counter.items()
+            for testclass, count in counts.items()
+        ],
+        "seen_enhanced_graph": state.seen_enhanced_graph,
+        "seen_enhancement": state.seen_enhancement,
+    }
+
+
+def validate_file(
+    validation_script: str | Path,
+    input_file: str,
+    part_file: str | Path,
+    known_sent_ids: set[str],
+    report_filename: bool,
+    cache_file: str | Path | None = None,
+) -> dict:
+    """Validate one file of a treebank, and write its incidents to `part_file`.
+
+    `known_sent_ids` are the sentence ids of the files validated before it.
+    """
+    module = load_validator(validation_script)
+    state = module.State()
+    state.known_sent_ids = set(known_sent_ids)
+    with open(part_file, "w", encoding="utf-8") as output:
+        _validate_files(
+            module, output, [input_file], state, report_filename, cache_file
+        )
+    return _observations(state)
+
+
+def read_sent_ids(module, input_file: str) -> set[str]:
+    """Collect the sentence ids of a file, as the validator reads them."""
+    sent_ids = set()
+    with open(input_file, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#"):
+                match = module.utils.crex.sentid.fullmatch(line.rstrip("\n"))
+                if match:
+                    sent_ids.add(match.group(1))
+    return sent_ids
+
+
+def _merge(module, observations: list[dict]):
+    """Merge the observations of the workers into one validation state."""
+    incident = importlib.import_module(module.__package__ + ".incident")
+    state = module.State()
+    for observation in observations:
+        for incident_type, testclass, count in observation["counts"]:
+            state.error_counter[incident.IncidentType[incident_type]][
+                incident.TestClass[testclass]
+            ] += count
+        state.seen_enhanced_graph = (
+            state.seen_enhanced_graph or observation["seen_enhanced_graph"]
+        )
+        state.seen_enhancement = (
+            state.seen_enhancement or observation["seen_enhancement"]
+        )
+    return state
+
+
+def validate_treebank(
+    input_files: list[str],
+    report_file: str | Path,
+    validation_script: str | Path,
+    jobs: int = 1,
+    cache_file: str | Path | None = None,
+) -> bool:
+    """Validate the files of a treebank and write the report to `report_file`.
+
+    The report has the format of `validate.py --max-err 0`, with the summary of
+    the errors at the end. Returns True if the treebank passed the validation.
+    With a `cache_file`, sentences that were validated before are not validated
+    again, see `ndt2ud.validation_cache`.
+    """
+    module = load_validator(validation_script)
+    report_filename = len(input_files) > 1
+    with open(report_file, "w", encoding="utf-8") as report:
+        if jobs <= 1 or len(input_files) == 1:
+            state = module.State()
+            validator = _validate_files(
+                module, report, input_files, state, report_filename, cache_file
+            )
+            validator.validate_end(state)
+            print(str(state), file=report)
+            return state.passed()
+
+        with (
+            tempfile.TemporaryDirectory(dir=Path(report_file).parent) as part_dir,
+            ProcessPoolExecutor(
+                max_workers=min(jobs, len(input_files)),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor,
+        ):
+            part_files = [
+                Path(part_dir) / f"{i:03}.txt" for i in range(len(input_files))
+            ]
+            known_sent_ids = []
+            for input_file in input_files:
+                previous = known_sent_ids[-1] if known_sent_ids else set()
+                known_sent_ids.append(previous | read_sent_ids(module, input_file))
+            results = executor.map(
+                validate_file,
+                [validation_script] * len(input_files),
+                input_files,
+                part_files,
+                [set()] + known_sent_ids[:-1],
+                [report_filename] * len(input_files),
+                [cache_file] * len(input_files),
+            )
+            # the parts are appended to the report as soon as the files before
+            # them are done
+            observations = []
+            for input_file, part_file, observation in zip(
+                input_files, part_files, results
+            ):
+                logging.info(f"Validated {input_file}")
+                with open(part_file, encoding="utf-8") as part:
+                    shutil.copyfileobj(part, report)
+                report.flush()
+                observations.append(observation)
+
+        state = _merge(module, observations)
+        _validator(module, report, report_filename).validate_end(state)
+        print(str(state), file=report)
+        return state.passed()
@@ -0,0 +1,267 @@
+"""Cache the validation result of each sentence, to only validate changed sentences.
+
+A sentence is stored with the errors and warnings the UD validator found in it,
+under a key made from the sentence lines, a fingerprint of the validator code
+and data, and the validation state the sentence depends on: whether the
+previous sentence ended with SpaceAfter=No, whether its sentence id was seen
+before, and the first enhanced graph, tree without enhanced graph, empty node
+and enhanced orphan seen so far. For a cached sentence, the stored incidents
+are replayed through the validator's own incident classes, at the sentence's
+current line numbers, so that the report is the same as after a full run.
+
+Sentences that change the validation state for later sentences, like the first
+sentence with features, and sentences before the first feature, whose feature
+errors are delayed, are always validated. So are the checks at the end of each
+file and of the treebank.
+
+The store is kept below a maximum size by evicting the least recently used
+sentences, like the sentence cache of the conversion.
+"""
+
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+VALIDATION_CACHE_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "ndt2ud"
+    / "validation.sqlite"
+)
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# observations that later sentences depend on
+SEEN_FIELDS = (
+    "seen_morpho_feature",
+    "seen_enhanced_graph",
+    "seen_tree_without_enhanced_graph",
+    "seen_enhancement",
+    "seen_empty_node",
+    "seen_enhanced_orphan",
+    "seen_global_entity",
+)
+
+
+def validator_fingerprint(module, validator) -> str:
+    """Hash the source files of the validator package and its language data."""
+    digest = hashlib.sha256(f"{validator.lang}|{validator.level}".encode())
+    package_dir = Path(module.__file__).parent
+    data_dir = Path(validator.data.datapath)
+    for path in sorted(package_dir.glob("*.py")) + sorted(data_dir.glob("*.json")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class ValidationCache:
+    """An SQLite store of the incidents found in each validated sentence.
+
+    Entries of other validator versions are deleted when the store is opened,
+    and the least recently used entries when it grows larger than `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        fingerprint: str,
+        cache_file: str | Path = VALIDATION_CACHE_FILE,
+        max_bytes: int = MAX_CACHE_BYTES,
+    ):
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self.used = set()
+        Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(cache_file, timeout=60)
+        with self.connection:
+            columns = [
+                row[1]
+                for row in self.connection.execute("PRAGMA table_info(sentences)")
+            ]
+            if columns and "last_used" not in columns:
+                # a store from before entries were evicted
+                self.connection.execute("DROP TABLE sentences")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS sentences (key TEXT PRIMARY KEY, "
+                "validator TEXT, result TEXT, size INTEGER, last_used REAL)"
+            )
+            self.connection.execute(
+                "DELETE FROM sentences WHERE validator != ?", (fingerprint,)
+            )
+
+    def key(self, lines: list[str], context: str) -> str:
+        sentence = "\n".join(lines)
+        return hashlib.sha256(
+            f"{self.fingerprint}|{context}|{sentence}".encode()
+        ).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        """Look up a stored result. It is marked as used on the next `put_many`."""
+        row = self.connection.execute(
+            "SELECT result FROM sentences WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.used.add(key)
+        return json.loads(row[0])
+
+    def put_many(self, results: dict[str, dict]) -> None:
+        """Store results, mark the results that were looked up as recently used,
+        and evict old entries if the store is too large."""
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE sentences SET last_used = ? WHERE key = ?",
+                [(now, key) for key in self.used],
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO sentences VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, self.fingerprint, result, len(result.encode()), now)
+                    for key, result in (
+                        (key, json.dumps(result)) for key, result in results.items()
+                    )
+                ],
+            )
+        self.used.clear()
+        self.evict()
+
+    def size(self) -> int:
+        (total,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM sentences"
+        ).fetchone()
+        return total
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the store fits in max_bytes."""
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        for key, size in self.connection.execute(
+            "SELECT key, size FROM sentences ORDER BY last_used, rowid"
+        ):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        with self.connection:
+            self.connection.executemany("DELETE FROM sentences WHERE key = ?", evicted)
+        logging.debug(f"Evicted {len(evicted)} sentences from the validation cache")
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def _sent_id(module, lines: list[str]) -> str | None:
+    """The sentence id, if the sentence has exactly one sent_id comment."""
+    matches = [
+        module.utils.crex.sentid.fullmatch(line) for line in lines if line[:1] == "#"
+    ]
+    matches = [match for match in matches if match]
+    return matches[0].group(1) if len(matches) == 1 else None
+
+
+def _context(state, sent_id: str) -> str | None:
+    """The validation state that the incidents in a sentence depend on, or None
+    if the sentence must be validated anyway."""
+    if not state.seen_morpho_feature:
+        return None
+    return json.dumps(
+        [
+            state.spaceafterno_in_effect,
+            sent_id in state.known_sent_ids,
+            state.seen_enhanced_graph,
+            state.seen_tree_without_enhanced_graph,
+            state.seen_empty_node,
+            state.seen_enhanced_orphan,
+        ]
+    )
+
+
+def _observed(state) -> tuple:
+    return tuple(getattr(state, field) for field in SEEN_FIELDS) + (
+        len(state.known_parallel_ids),
+    )
+
+
+def _incident_record(incident, start: int) -> dict:
+    return {
+        "type": incident.get_type().name,
+        "level": incident.level,
+        "testclass": incident.testclass.name,
+        "testid": incident.testid,
+        "message": incident.message,
+        "explanation": incident.explanation,
+        "line": incident.lineno - start,
+    }
+
+
+def _replay(incident_module, validator, state, result: dict, start: int) -> None:
+    """Report the stored incidents of a sentence that starts on line `start`."""
+    for incident in result["incidents"]:
+        if incident["type"] == "ERROR":
+            incident_class = incident_module.Error
+        else:
+            incident_class = incident_module.Warning
+        incident_class(
+            state=state,
+            config=validator.incfg,
+            level=incident["level"],
+            testclass=incident_module.TestClass[incident["testclass"]],
+            testid=incident["testid"],
+            message=incident["message"],
+            lineno=start + incident["line"],
+            explanation=incident["explanation"],
+        ).confirm()
+
+
+def validate_file_handle(module, validator, inp, state, cache: ValidationCache):
+    """Validate an open file like `Validator.validate_file_handle`, replaying the
+    incidents of the sentences found in the cache, and caching the others.
+
+    The validator must store all incidents in the state (`max_store=0`).
+    """
+    incident_module = importlib.import_module(module.__package__ + ".incident")
+    results = {}
+    for lines in module.utils.next_sentence(state, inp):
+        start = state.current_line - len(lines) + 1
+        sent_id = _sent_id(module, lines)
+        key = None
+        if sent_id is not None and not any("parallel_id" in line for line in lines):
+            context = _context(state, sent_id)
+            key = None if context is None else cache.key(lines, context)
+        result = None if key is None else cache.get(key)
+
+        if result is not None:
+            state.current_lines = lines
+            state.sentence_id = sent_id
+            _replay(incident_module, validator, state, result, start)
+            if result["sent_id_known"]:
+                state.known_sent_ids.add(sent_id)
+            state.spaceafterno_in_effect = result["spaceafterno"]
+        else:
+            observed = _observed(state)
+            validator.validate_sentence(lines, state)
+            incidents = state.error_tracker
+            if (
+                key is not None
+                and _observed(state) == observed
+                and all(
+                    incident.sentid == sent_id and incident.lineno >= start
+                    for incident in incidents
+                )
+            ):
+                results[key] = {
+                    "incidents": [
+                        _incident_record(incident, start) for incident in incidents
+                    ],
+                    "sent_id_known": sent_id in state.known_sent_ids,
+                    "spaceafterno": state.spaceafterno_in_effect,
+                }
+        state.error_tracker.clear()
+    validator.check_newlines(state, inp)
+    cache.put_many(results)
+    return state
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import ndt2ud
+from ndt2ud import benchmark
+
+CONLL = (
+    "1\tHan\than\tpron\tpron\tpers|hum|ent|mask|3|nom\t2\tSUBJ\t_\t_\n"
+    "2\tsov\tsove\tverb\tverb\tpret\t0\tFINV\t_\t_\n"
+    "\n"
+)
+
+
+@pytest.fixture
+def mocked_stages(monkeypatch, tmp_path):
+    calls = []
+
+    def stage(name):
+        def run(data, language, grs_path):
+            calls.append((name, language))
+            return data
+
+        return run
+
+    monkeypatch.setattr(
+        ndt2ud,
+        "STAGES",
+        [("01_first", "First", stage("first")), ("02_second", "Second", stage("2"))],
+    )
+    monkeypatch.setattr(ndt2ud, "run_stages", lambda *args: "")
+    monkeypatch.setattr(ndt2ud, "load_grs", lambda grs_path: None)
+    (tmp_path / "rules.grs").write_text("strat main { Id }\n", encoding="utf-8")
+    (tmp_path / "ndt_nn_test.conllu").write_text(CONLL, encoding="utf-8")
+    return calls
+
+
+def test_run_benchmarks_writes_stage_metrics(mocked_stages, tmp_path):
+    output_file = tmp_path / "bench" / "results.json"
+
+    benchmark.run_benchmarks(
+        [tmp_path / "ndt_nn_test.conllu"],
+        tmp_path / "rules.grs",
+        output_file,
+        repeat=2,
+    )
+
+    results = json.loads(output_file.read_text(encoding="utf-8"))
+    assert results["repeat"] == 2
+    assert len(results["rules_hash"]) == 64
+    (result,) = results["results"]
+    assert result["language"] == "nn"
+    assert (result["sentences"], result["tokens"]) == (1, 2)
+    assert list(result["stages"]) == ["00_read", "01_first", "02_second"]
+    assert result["end_to_end"]["seconds"] >= 0
+    assert mocked_stages == [("first", "nn"), ("2", "nn")] * 2
+
+
+def _results(**speeds):
+    stages = {name: {"tokens_per_sec": speed} for name, speed in speeds.items()}
+    return {
+        "results": [
+            {"file": "a.conllu", "stages": stages, "end_to_end": {"tokens_per_sec": 10}}
+        ]
+    }
+
+
+def test_compare_benchmarks_flags_slower_stages():
+    baseline = _results(read=100, morph=100, grew=100)
+    current = _results(read=95, morph=50, new_stage=1)
+
+    regressions = benchmark.compare_benchmarks(baseline, current, tolerance=0.1)
+
+    assert regressions == ["a.conllu morph: 100 -> 50 tokens/sec (-50%)"]
@@ -0,0 +1,64 @@
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from ndt2ud.columnar import (
+    read_sentence_table,
+    read_treebank,
+    value_counts,
+    write_treebank,
+)
+from ndt2ud.parse_conllu import parse_conll_file, write_conll
+
+UD_FILE = (
+    Path(__file__).parents[2] / "data" / "gullkorpus" / "2019_gullkorpus_ud.conllu"
+)
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_treebank_round_trips_to_conllu(tmp_path, file_format):
+    data = parse_conll_file(UD_FILE)
+    data["sentences"][0]["newdoc id"] = "doc1"
+    data["sentences"][1]["newdoc"] = True
+    write_treebank(data, tmp_path / "treebank", file_format)
+
+    stored = read_treebank(tmp_path / "treebank")
+    assert stored == data
+    write_conll(data, tmp_path / "expected.conllu")
+    write_conll(stored, tmp_path / "stored.conllu")
+    assert (tmp_path / "stored.conllu").read_text() == (
+        tmp_path / "expected.conllu"
+    ).read_text()
+
+
+def test_sentence_table_has_token_offsets(tmp_path):
+    data = parse_conll_file(UD_FILE)
+    write_treebank(data, tmp_path)
+
+    sentences = read_sentence_table(tmp_path).to_pydict()
+    lengths = [len(sentence["tokens"]) for sentence in data["sentences"]]
+    assert sentences["offset"][:3] == [0, lengths[0], lengths[0] + lengths[1]]
+    assert sentences["sent_id"][0] == data["sentences"][0]["sent_id"]
+    assert sum(sentences["newpar"]) == sum(
+        "newpar" in sentence for sentence in data["sentences"]
+    )
+
+
+def test_value_counts(tmp_path):
+    data = parse_conll_file(UD_FILE)
+    write_treebank(data, tmp_path, "arrow")
+
+    expected = Counter(
+        token["UPOS"] for sentence in data["sentences"] for token in sentence["tokens"]
+    )
+    counts = value_counts(tmp_path, "UPOS")
+    assert counts == dict(expected)
+    assert list(counts)[0] == expected.most_common(1)[0][0]
+
+
+def test_write_treebank_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        write_treebank(parse_conll_file(UD_FILE), tmp_path, "csv")
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import pytest
+
+UD_SENTENCE = """# sent_id = {sent_id}
+# text = Slik gjer eg det:
+1	Slik	slik	ADV	adv	_	2	advmod	_	_
+2	gjer	gjere	VERB	verb	Mood=Ind|Tense=Pres|VerbForm=Fin	0	root	_	_
+3	eg	eg	PRON	pron	Animacy=Hum|Case=Nom|Person=1|PronType=Prs	2	{deprel}	_	_
+4	det	det	PRON	pron	Gender=Neut|Person=3|PronType=Prs	2	obj	_	SpaceAfter=No
+5	:	$:	PUNCT	clb	_	2	punct	_	_
+
+"""
+
+
+@pytest.fixture
+def validation_script(tmp_path):
+    """A tools repository with the installed udtools package in it."""
+    udtools = pytest.importorskip("udtools")
+    tools_dir = tmp_path / "tools"
+    (tools_dir / "udtools" / "src").mkdir(parents=True)
+    (tools_dir / "udtools" / "src" / "udtools").symlink_to(
+        Path(udtools.__file__).parent
+    )
+    script = tools_dir / "validate.py"
+    script.write_text("")
+    return script
+
+
+@pytest.fixture
+def write_ud_treebank():
+    """Write UD sentences, given as (sent_id, deprel of "eg") pairs, to a file."""
+
+    def write(file: Path, sentences: list[tuple[str, str]]) -> list[str]:
+        file.write_text(
+            "".join(
+                UD_SENTENCE.format(sent_id=sent_id, deprel=deprel)
+                for sent_id, deprel in sentences
+            )
+        )
+        return [str(file)]
+
+    return write
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+from ndt2ud.evaluation import evaluate, evaluation_pairs, format_report
+
+GOLD = """# sent_id = 1
+# text = Han sov godt .
+1\tHan\than\tPRON\t_\tCase=Nom\t2\tnsubj\t_\t_
+2\tsov\tsove\tVERB\t_\tTense=Past\t0\troot\t_\t_
+3\tgodt\tgod\tADJ\t_\t_\t2\tadvmod\t_\t_
+4\t.\t$.\tPUNCT\t_\t_\t2\tpunct\t_\t_
+
+# sent_id = 2
+# text = Ja
+1\tJa\tja\tINTJ\t_\t_\t0\troot\t_\t_
+
+"""
+
+SYSTEM = """# sent_id = 2
+# text = Nei
+1\tNei\tnei\tINTJ\t_\t_\t0\troot\t_\t_
+
+# sent_id = 1
+# text = Han sov godt .
+1\tHan\than\tPRON\t_\tCase=Nom\t2\tnsubj\t_\t_
+2\tsov\tsove\tVERB\t_\t_\t0\troot\t_\t_
+3\tgodt\tgod\tADV\t_\t_\t2\tobl:tmod\t_\t_
+4\t.\t$.\tPUNCT\t_\t_\t3\tpunct\t_\t_
+
+"""
+
+
+@pytest.fixture
+def files(tmp_path):
+    (tmp_path / "gold.conllu").write_text(GOLD)
+    (tmp_path / "system.conllu").write_text(SYSTEM)
+    return tmp_path / "system.conllu", tmp_path / "gold.conllu"
+
+
+def test_scores_of_sentences_aligned_by_sent_id(files):
+    result = evaluate(*files)
+
+    assert result["tokens"] == 4
+    assert result["unaligned_sentences"] == 1
+    assert result["UAS"] == 0.75
+    assert result["LAS"] == 0.5
+    assert result["UPOS"] == 0.75
+    assert result["FEATS"] == 0.75
+
+    deprels = result["deprels"]
+    assert deprels.loc["advmod", ["gold", "system", "correct"]].tolist() == [1, 0, 0]
+    assert deprels.loc["obl:tmod", "precision"] == 0.0
+    assert deprels.loc["nsubj", "f1"] == 1.0
+    assert result["upos_confusion"].loc["ADJ", "ADV"] == 1
+    assert result["upos_confusion"].to_numpy().sum() == 4
+    assert "LAS: 50.00%" in format_report(result)
+
+
+def test_universal_deprels(files):
+    files[0].write_text(SYSTEM.replace("obl:tmod", "advmod:tmod"))
+    assert evaluate(*files)["LAS"] == 0.5
+    assert evaluate(*files, universal_deprels=True)["LAS"] == 0.75
+
+
+def test_evaluation_pairs_match_file_names(tmp_path):
+    for folder in ("system", "gold"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "dev.conllu").write_text(GOLD)
+    (tmp_path / "system" / "test.conllu").write_text(GOLD)
+
+    assert evaluation_pairs(tmp_path / "system", tmp_path / "gold") == [
+        (tmp_path / "system" / "dev.conllu", tmp_path / "gold" / "dev.conllu")
+    ]
+    assert evaluation_pairs(Path("a.conllu"), Path("b.conllu")) == [
+        (Path("a.conllu"), Path("b.conllu"))
+    ]
@@ -0,0 +1,117 @@
+import pytest
+
+from ndt2ud import grew_profile
+
+
+def rule(pattern):
+    return {"request": pattern, "commands": []}
+
+
+DECLS = {
+    "NDT_fix": {"decls": {"fix_a": rule("a"), "fix_b": rule("b")}},
+    "heads": {
+        "decls": {
+            "copula": {"decls": {"cop": rule("cop")}},
+            "root": {"decls": {"shift": rule("shift")}},
+            "main_": "Seq (\n  Onf (copula), % restructure\n  Onf (root),\n)",
+        }
+    },
+    "final": {"decls": {"del_nom": rule("nom")}},
+    "main_nb": "Seq (Onf (NDT_fix), heads.main_, Onf (final))",
+}
+
+
+def test_expand_strategy_qualifies_nested_steps():
+    steps = grew_profile.expand_strategy(DECLS, DECLS["main_nb"])
+
+    assert [step["step"] for step in steps] == [
+        "Onf (NDT_fix)",
+        "Onf (heads.copula)",
+        "Onf (heads.root)",
+        "Onf (final)",
+    ]
+    assert [name for name, _ in steps[0]["rules"]] == [
+        "NDT_fix.fix_a",
+        "NDT_fix.fix_b",
+    ]
+    assert [name for name, _ in steps[1]["rules"]] == ["heads.copula.cop"]
+
+
+@pytest.fixture
+def fake_grew(monkeypatch):
+    class FakeRequest:
+        @staticmethod
+        def from_json(pattern):
+            return pattern
+
+    class FakeCorpus:
+        def __init__(self):
+            self.graphs = ["a", "b", "c"]
+            self.matches = {"a": 3, "b": 1, "cop": 2, "shift": 0, "nom": 0}
+
+        def count(self, request):
+            return self.matches[request]
+
+        def to_conll(self):
+            return "\n\n".join(self.graphs) + "\n\n"
+
+    class FakeGRS:
+        def json(self):
+            return {"decls": DECLS}
+
+        def apply(self, corpus, strat):
+            if strat == "Onf (NDT_fix)":
+                corpus.graphs = ["A", "b", "C"]
+            elif strat == "Onf (heads.copula)":
+                corpus.graphs[1] = "B"
+
+    monkeypatch.setattr(grew_profile, "Request", FakeRequest)
+    return FakeGRS(), FakeCorpus()
+
+
+def test_profile_strategy_counts_changed_graphs_and_matches(fake_grew):
+    grs, corpus = fake_grew
+
+    profile = grew_profile.profile_strategy(grs, corpus, "main_nb")
+
+    assert [step["graphs_changed"] for step in profile] == [2, 1, 0, 0]
+    assert profile[0]["rules"] == [
+        {"rule": "NDT_fix.fix_a", "matches": 3},
+        {"rule": "NDT_fix.fix_b", "matches": 1},
+    ]
+    with pytest.raises(ValueError):
+        grew_profile.profile_strategy(grs, corpus, "main_xx")
+
+
+def test_hot_rules_share_step_time_by_matches():
+    profile = [
+        {
+            "strategy": "main_nb",
+            "step": "Onf (NDT_fix)",
+            "seconds": 4.0,
+            "graphs_changed": 2,
+            "rules": [
+                {"rule": "NDT_fix.fix_a", "matches": 3},
+                {"rule": "NDT_fix.fix_b", "matches": 1},
+                {"rule": "NDT_fix.lexicon", "matches": None},
+            ],
+        },
+        {
+            "strategy": "main_nb",
+            "step": "Onf (final)",
+            "seconds": 2.0,
+            "graphs_changed": 0,
+            "rules": [{"rule": "final.del_nom", "matches": 5}],
+        },
+    ]
+
+    ranked = grew_profile.hot_rules(profile)
+
+    assert [(rule["rule"], rule["seconds"]) for rule in ranked] == [
+        ("NDT_fix.fix_a", 3.0),
+        ("final.del_nom", 2.0),
+        ("NDT_fix.fix_b", 1.0),
+    ]
+    report = grew_profile.format_report(profile, top=2)
+    assert report.splitlines()[1].endswith("main_nb: Onf (NDT_fix)")
+    assert "NDT_fix.fix_b" not in report
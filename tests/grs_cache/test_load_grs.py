@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pytest
+
+from ndt2ud import grs_cache
+
+
+@pytest.fixture
+def grs_dir(tmp_path):
+    (tmp_path / "main.grs").write_text(
+        'import "sub.grs"\n\nstrat main { Onf(sub) }\n', encoding="utf-8"
+    )
+    (tmp_path / "sub.grs").write_text(
+        'import "leaf.grs"\n\npackage sub {}\n', encoding="utf-8"
+    )
+    (tmp_path / "leaf.grs").write_text("package leaf {}\n", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def fake_grs(monkeypatch):
+    loaded = []
+
+    class FakeGRS:
+        def __init__(self, path):
+            loaded.append(path)
+
+        def json(self):
+            return {"decls": {}}
+
+    monkeypatch.setattr(grs_cache, "GRS", FakeGRS)
+    monkeypatch.setattr(grs_cache, "_loaded_grs", {})
+    return loaded
+
+
+def test_grs_files_follows_imports_transitively():
+    rules = Path(__file__).parents[2] / "src" / "rules" / "NDT_to_UD.grs"
+    names = [path.name for path in grs_cache.grs_files(rules)]
+    assert names[0] == "NDT_to_UD.grs"
+    assert len(names) == 9
+    assert "post_udapy_fixes.grs" in names
+
+
+def test_grs_hash_changes_when_an_imported_file_changes(grs_dir):
+    before = grs_cache.grs_hash(grs_dir / "main.grs")
+    (grs_dir / "leaf.grs").write_text("package leaf { }\n", encoding="utf-8")
+    assert grs_cache.grs_hash(grs_dir / "main.grs") != before
+
+
+def test_load_grs_reuses_loaded_rules(grs_dir, fake_grs):
+    first = grs_cache.load_grs(grs_dir / "main.grs", cache_dir=None)
+    second = grs_cache.load_grs(grs_dir / "main.grs", cache_dir=None)
+    assert first is second
+    assert len(fake_grs) == 1
+
+    (grs_dir / "sub.grs").write_text('import "leaf.grs"\n', encoding="utf-8")
+    third = grs_cache.load_grs(grs_dir / "main.grs", cache_dir=None)
+    assert third is not first
+    assert len(fake_grs) == 2
+
+
+def test_load_grs_uses_cache_file_in_new_process(
+    grs_dir, fake_grs, monkeypatch, tmp_path
+):
+    cache_dir = tmp_path / "cache"
+    grs_cache.load_grs(grs_dir / "main.grs", cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+    # A new process starts without any loaded rules
+    monkeypatch.setattr(grs_cache, "_loaded_grs", {})
+    from_json = []
+    monkeypatch.setattr(
+        grs_cache, "load_grs_json", lambda data: from_json.append(data) or "cached"
+    )
+    grs = grs_cache.load_grs(grs_dir / "main.grs", cache_dir=cache_dir)
+    assert grs == "cached"
+    assert from_json == [{"decls": {}}]
+    assert len(fake_grs) == 1
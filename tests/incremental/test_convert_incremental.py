@@ -0,0 +1,147 @@
+import copy
+
+import pytest
+
+import ndt2ud
+from ndt2ud import grew_profile, incremental
+from ndt2ud.parse_conllu import format_conll
+
+
+def rule(word, replacement):
+    return {"request": word, "commands": replacement}
+
+
+RULES = {
+    "lexical": {"decls": {"hund": rule("hund", "bikkje"), "katt": rule("katt", "pus")}},
+    "upper": {"decls": {"sol": rule("sol", "SOL")}},
+    "post": {"decls": {"fisk": rule("fisk", "laks")}},
+    "main_nb": "Seq (Onf (lexical), Onf (upper))",
+    "postprocess": "Seq (Onf (post))",
+}
+
+
+class FakeCorpus:
+    def __init__(self, conll):
+        self.conll = conll.replace("# global.columns = ID FORM\n", "")
+
+    def to_conll(self):
+        return "# global.columns = ID FORM\n" + self.conll
+
+    def count(self, word):
+        return self.conll.count(f"\t{word}\t")
+
+
+class FakeGRS:
+    def __init__(self, grs_json):
+        self.grs_json = copy.deepcopy(grs_json)
+
+    def json(self):
+        return self.grs_json
+
+    def apply(self, corpus, strat):
+        package = strat.split("(")[1].strip(" )")
+        for word in self.grs_json["decls"][package]["decls"].values():
+            corpus.conll = corpus.conll.replace(
+                f"\t{word['request']}\t", f"\t{word['commands']}\t"
+            )
+
+
+class FakeRequest:
+    @staticmethod
+    def from_json(word):
+        return word
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch, tmp_path):
+    converted = []
+    rules = {"decls": copy.deepcopy(RULES)}
+    grs_path = tmp_path / "rules.grs"
+    grs_path.write_text("v1")
+
+    def morphology_stage(conllu_data, language, grs_path):
+        sentences = [s for s in conllu_data["sentences"] if s["tokens"]]
+        converted.append([s["sent_id"] for s in sentences])
+        return format_conll({"sentences": sentences})
+
+    monkeypatch.setattr(ndt2ud, "morphology_stage", morphology_stage)
+    monkeypatch.setattr(ndt2ud, "spaceafter_stage", lambda c, l, g: FakeCorpus(c))
+    monkeypatch.setattr(ndt2ud, "udapi_stage", lambda c, l, g: c)
+    monkeypatch.setattr(ndt2ud, "load_grs", lambda path: FakeGRS(rules))
+    monkeypatch.setattr(incremental, "Corpus", FakeCorpus)
+    monkeypatch.setattr(incremental, "load_grs_json", FakeGRS)
+    monkeypatch.setattr(grew_profile, "Request", FakeRequest)
+
+    words = ["hund", "katt", "sol", "fisk", "hund"]
+    input_file = tmp_path / "ndt.conllu"
+    input_file.write_text(
+        "".join(
+            f"# sent_id = {i}\n1\t{word}\t_\t_\t_\t_\t0\tFINV\t_\t_\n\n"
+            for i, word in enumerate(words)
+        )
+    )
+    return {
+        "input_file": input_file,
+        "grs_path": grs_path,
+        "rules": rules,
+        "converted": converted,
+        "state_dir": tmp_path / "state",
+    }
+
+
+def run(pipeline):
+    return incremental.convert_incremental(
+        pipeline["input_file"], "nb", pipeline["grs_path"], pipeline["state_dir"]
+    )
+
+
+def forms(conll):
+    return [line.split("\t")[1] for line in conll.splitlines() if line[:1] == "1"]
+
+
+def test_only_sentences_affected_by_a_changed_rule_are_reconverted(fake_pipeline):
+    first = run(fake_pipeline)
+    assert forms(first) == ["bikkje", "pus", "SOL", "laks", "bikkje"]
+    assert fake_pipeline["converted"] == [["0", "1", "2", "3", "4"]]
+
+    fake_pipeline["rules"]["decls"]["lexical"]["decls"]["hund"] = rule("hund", "dog")
+    fake_pipeline["grs_path"].write_text("v2")
+    second = run(fake_pipeline)
+
+    assert fake_pipeline["converted"][1] == ["0", "4"]
+    assert forms(second) == ["dog", "pus", "SOL", "laks", "dog"]
+    assert second.startswith("# global.columns = ID FORM\n# sent_id = 0\n")
+
+    assert run(fake_pipeline) == second
+    assert len(fake_pipeline["converted"]) == 2
+
+
+def test_added_rule_in_a_later_step_uses_the_stored_checkpoint(fake_pipeline):
+    run(fake_pipeline)
+    fake_pipeline["rules"]["decls"]["post"]["decls"]["pus"] = rule("pus", "mjau")
+    fake_pipeline["grs_path"].write_text("v2")
+
+    output = run(fake_pipeline)
+
+    assert fake_pipeline["converted"][1] == ["1"]
+    assert forms(output) == ["bikkje", "mjau", "SOL", "laks", "bikkje"]
+
+
+def test_changed_strategy_runs_a_full_conversion(fake_pipeline):
+    run(fake_pipeline)
+    fake_pipeline["rules"]["decls"]["main_nb"] = "Seq (Onf (upper))"
+    fake_pipeline["grs_path"].write_text("v2")
+
+    output = run(fake_pipeline)
+
+    assert fake_pipeline["converted"][1] == ["0", "1", "2", "3", "4"]
+    assert forms(output) == ["hund", "katt", "SOL", "laks", "hund"]
+
+
+def test_rules_diff():
+    new = copy.deepcopy(RULES)
+    new["lexical"]["decls"]["katt"] = rule("katt", "mus")
+    del new["upper"]["decls"]["sol"]
+
+    assert incremental.rules_diff(RULES, new) == {"lexical.katt", "upper.sol"}
+    assert incremental.rules_diff(RULES, {**RULES, "extra": {"decls": {}}}) is None
@@ -0,0 +1,17 @@
+import pytest
+
+from ndt2ud.metrics import count_conll
+
+
+@pytest.mark.parametrize(
+    "conll, expected",
+    [
+        ("", (0, 0)),
+        ("\n", (0, 0)),
+        ("# sent_id = 1\n1\tHan\n2\tsov\n\n", (1, 2)),
+        ("1\tHan\n2\tsov\n\n1\tJa\n", (2, 3)),
+        ("# global.columns = ID FORM\n1-2\tdu\n1\tde\n2\tle\n2.1\tx\n\n", (1, 2)),
+    ],
+)
+def test_count_conll(conll, expected):
+    assert count_conll(conll) == expected
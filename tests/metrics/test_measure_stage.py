@@ -0,0 +1,36 @@
+from ndt2ud import metrics
+from ndt2ud.metrics import measure_stage
+
+CONLL = "# sent_id = 1\n1\tJa\tja\tINTJ\t_\t_\t0\troot\t_\t_\n\n"
+
+
+def stage(data, language, grs_path):
+    return data
+
+
+def test_measure_stage_leaves_peak_rss_alone_by_default(monkeypatch):
+    resets = []
+    monkeypatch.setattr(
+        metrics, "reset_peak_rss", lambda pid="self": resets.append(pid)
+    )
+
+    result, record = measure_stage("01", stage, CONLL, "nb", "rules.grs")
+
+    assert result == CONLL
+    assert resets == []
+    assert record["peak_rss_mb"] is None
+    assert (record["sentences"], record["tokens"]) == (1, 1)
+
+
+def test_measure_stage_measures_memory_on_request(monkeypatch):
+    resets = []
+    monkeypatch.setattr(
+        metrics, "reset_peak_rss", lambda pid="self": resets.append(pid)
+    )
+
+    _, record = measure_stage(
+        "01", stage, CONLL, "nb", "rules.grs", measure_memory=True
+    )
+
+    assert resets[0] == "self"
+    assert record["peak_rss_mb"] > 0
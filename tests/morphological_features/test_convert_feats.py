@@ -0,0 +1,29 @@
+from ndt2ud.morphological_features import convert_feats, feats_cache_info
+
+
+def token(upos, lemma, feats, deprel="DOBJ"):
+    return {"UPOS": upos, "LEMMA": lemma, "FEATS": feats, "DEPREL": deprel}
+
+
+def test_convert_feats_maps_ndt_feats():
+    assert convert_feats(token("NOUN", "hus", "appell|nøyt|ub|ent")) == (
+        "Definite=Ind|Gender=Neut|Number=Sing"
+    )
+    assert convert_feats(token("VERB", "gjere", "_")) == (
+        "Mood=Ind|Tense=Pres|VerbForm=Fin"
+    )
+    assert convert_feats(token("PRON", "seg", "akk|refl")) == (
+        "Case=Acc|PronType=Prs|Reflex=Yes"
+    )
+
+
+def test_convert_feats_only_keys_on_lemmas_and_deprels_that_matter():
+    assert convert_feats(token("DET", "ingen", "_", "DET")) == "Polarity=Neg"
+    assert convert_feats(token("DET", "ingen", "_", "SUBJ")) == "_"
+
+    before = feats_cache_info()
+    convert_feats(token("NOUN", "bil", "appell|mask|be|fl", "SUBJ"))
+    convert_feats(token("NOUN", "båt", "appell|mask|be|fl", "DOBJ"))
+    after = feats_cache_info()
+    assert after.hits - before.hits >= 1
+    assert after.maxsize is not None
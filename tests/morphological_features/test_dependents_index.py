@@ -0,0 +1,44 @@
+from ndt2ud.morphological_features import (
+    convert_pos,
+    convert_sentence_morphology,
+    get_dependents,
+    index_dependents,
+)
+from ndt2ud.parse_conllu import parse_line
+
+SENTENCE = [
+    parse_line(line)
+    for line in [
+        "1\tHan\than\tpron\tpron\tpers|3|ent|mask|nom\t2\tSUBJ\t_\t_",
+        "2\tvil\tville\tverb\tverb\tpres\t0\tFINV\t_\t_",
+        "3\tvære\tvære\tverb\tverb\tinf\t2\tINFV\t_\t_",
+        "4\tglad\tglad\tadj\tadj\tpos\t3\tSPRED\t_\t_",
+    ]
+]
+
+
+def test_index_dependents_matches_sentence_scan():
+    dependents = index_dependents(SENTENCE)
+    for token in SENTENCE:
+        scanned = [t for t in SENTENCE if t["HEAD"] == token["ID"]]
+        assert get_dependents(SENTENCE, token, dependents) == scanned
+        assert get_dependents(SENTENCE, token) == scanned
+
+
+def test_convert_pos_uses_dependents_index():
+    dependents = index_dependents(SENTENCE)
+    assert [convert_pos(t, SENTENCE, dependents) for t in SENTENCE] == [
+        "PRON",
+        "AUX",
+        "AUX",
+        "ADJ",
+    ]
+
+
+def test_convert_sentence_morphology_on_long_sentence():
+    tokens = [
+        parse_line(f"{i}\tsier\tsi\tverb\tverb\tpres\t{i - 1}\tFINV\t_\t_")
+        for i in range(1, 5001)
+    ]
+    converted = convert_sentence_morphology({"tokens": tokens})
+    assert {token["UPOS"] for token in converted["tokens"]} == {"VERB"}
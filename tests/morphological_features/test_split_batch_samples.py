@@ -0,0 +1,60 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from ndt2ud.morphological_features import plan_batches, split_batch_samples
+
+NDT_FILE = (
+    Path(__file__).parents[2] / "data" / "gullkorpus" / "2019_gullkorpus_ndt.conllu"
+)
+
+SENTENCE = "# sent_id = {}\n1\tJa\tja\tinterj\tinterj\t_\t0\tFRAG\t_\t_\n\n"
+
+
+@pytest.fixture
+def conll_file(tmp_path):
+    return Path(shutil.copy(NDT_FILE, tmp_path / NDT_FILE.name))
+
+
+def test_batches_are_whole_sentences_within_line_limit(conll_file):
+    paths = split_batch_samples(conll_file, sample_size=500)
+
+    assert [path.name for path in paths] == [
+        f"sample{i + 1}_{conll_file.name}" for i in range(len(paths))
+    ]
+    batches = [path.read_text(encoding="utf-8") for path in paths]
+    assert all(len(batch.splitlines()) < 500 for batch in batches)
+    assert all(not batch.endswith("\n\n") for batch in batches)
+    assert "\n".join(batches) + "\n" == conll_file.read_text(encoding="utf-8")
+
+
+def test_sentence_and_byte_limits(tmp_path):
+    conll_file = tmp_path / "small.conllu"
+    conll_file.write_text("".join(SENTENCE.format(i) for i in range(5)))
+    sentence_bytes = len(SENTENCE.format(0).encode())
+
+    paths = split_batch_samples(conll_file, sample_size=None, max_sentences=2)
+    assert [path.read_text().count("# sent_id") for path in paths] == [2, 2, 1]
+
+    ranges = plan_batches(conll_file, max_bytes=3 * sentence_bytes)
+    assert ranges == [(0, 3 * sentence_bytes), (3 * sentence_bytes, 5 * sentence_bytes)]
+
+
+def test_long_sentence_is_a_batch_of_its_own(tmp_path):
+    conll_file = tmp_path / "small.conllu"
+    conll_file.write_text(SENTENCE.format(0) + SENTENCE.format(1))
+
+    paths = split_batch_samples(conll_file, sample_size=2)
+    assert [path.read_text() for path in paths] == [
+        SENTENCE.format(0)[:-1],
+        SENTENCE.format(1)[:-1],
+    ]
+
+
+def test_parallel_batches_are_the_same(conll_file, tmp_path):
+    serial = [path.read_bytes() for path in split_batch_samples(conll_file, 300)]
+    parallel = [
+        path.read_bytes() for path in split_batch_samples(conll_file, 300, jobs=3)
+    ]
+    assert parallel == serial
@@ -10,12 +10,16 @@ import ndt2ud
 
 @pytest.fixture
 def mock_dependencies(monkeypatch, tmp_path):
-    # Mock parse_conll_file
-    monkeypatch.setattr(ndt2ud, "parse_conll_file", lambda path: ["dummy_conllu_data"])
+    # Mock iter_conll_sentences
+    monkeypatch.setattr(
+        ndt2ud,
+        "iter_conll_sentences",
+        lambda path, invalid_lines: iter(["dummy_conllu_data"]),
+    )
     # Mock convert_morphology
     monkeypatch.setattr(ndt2ud, "convert_morphology", lambda data: ["morphdata"])
-    # Mock write_conll
-    monkeypatch.setattr(ndt2ud, "write_conll", lambda data, path, drop_comments: None)
+    # Mock format_conll
+    monkeypatch.setattr(ndt2ud, "format_conll", lambda data, drop_comments: "morph")
     # Mock utils.set_spaceafter_from_text
     monkeypatch.setattr(ndt2ud.utils, "set_spaceafter_from_text", lambda x: x)
     # Mock CorpusDraft
@@ -47,9 +51,9 @@ def mock_dependencies(monkeypatch, tmp_path):
         def apply(self, corpus, strat):
             return DummyCorpus(None)
 
-    monkeypatch.setattr(ndt2ud, "GRS", DummyGRS)
-    # Mock utils.udapi_fixes
-    monkeypatch.setattr(ndt2ud.utils, "udapi_fixes", lambda infile, outfile: None)
+    monkeypatch.setattr(ndt2ud, "load_grs", DummyGRS)
+    # Mock utils.udapi_fixes_conll
+    monkeypatch.setattr(ndt2ud.utils, "udapi_fixes_conll", lambda conll: conll)
     # Create a dummy grew rules file
     grs_path = tmp_path / "rules.grs"
     grs_path.write_text("dummy rules")
@@ -83,6 +87,79 @@ def test_convert_ndt_to_ud_creates_output_file(mock_dependencies):
     assert content == "conll"
 
 
+def test_convert_ndt_to_ud_writes_stage_files_to_tmp_dir(mock_dependencies):
+    args = mock_dependencies
+    tmp_dir = args["tmp_path"] / "stages"
+    ndt2ud.convert_ndt_to_ud(
+        args["input_file"],
+        args["language"],
+        args["output_file"],
+        args["grs_path"],
+        tmp_dir=tmp_dir,
+    )
+    stage_files = sorted(path.name for path in tmp_dir.iterdir())
+    assert len(stage_files) == 6
+    assert stage_files[0] == "01_convert_morph_output.conllu"
+    assert (tmp_dir / "01_convert_morph_output.conllu").read_text() == "morph"
+    assert (tmp_dir / "06_replace_newpar.conllu").read_text() == "conll"
+
+
+def test_convert_ndt_to_ud_without_tmp_dir_writes_no_stage_files(
+    mock_dependencies, monkeypatch
+):
+    args = mock_dependencies
+    monkeypatch.chdir(args["tmp_path"])
+    ndt2ud.convert_ndt_to_ud(
+        args["input_file"], args["language"], args["output_file"], args["grs_path"]
+    )
+    assert sorted(path.name for path in args["tmp_path"].iterdir()) == [
+        "input.conllu",
+        "output.conllu",
+        "rules.grs",
+    ]
+
+
+def test_convert_ndt_to_ud_writes_stage_metrics(mock_dependencies):
+    import json
+
+    args = mock_dependencies
+    metrics_file = args["tmp_path"] / "metrics.jsonl"
+    ndt2ud.convert_ndt_to_ud(
+        args["input_file"],
+        args["language"],
+        args["output_file"],
+        args["grs_path"],
+        metrics_file=metrics_file,
+    )
+    records = [json.loads(line) for line in metrics_file.read_text().splitlines()]
+    assert [record["stage"] for record in records] == [
+        name for name, _, _ in ndt2ud.STAGES
+    ] + ["07_write_output", "total"]
+    assert {record["file"] for record in records} == {"input.conllu"}
+    assert records[0]["bytes_out"] == len("morph")
+    assert records[-1]["bytes_in"] == len("dummy input")
+    assert records[-1]["bytes_out"] == len("conll")
+
+
+def test_convert_ndt_to_ud_writes_stage_profiles(mock_dependencies):
+    import pstats
+    import tracemalloc
+
+    args = mock_dependencies
+    profile_dir = args["tmp_path"] / "profile"
+    ndt2ud.convert_ndt_to_ud(
+        args["input_file"],
+        args["language"],
+        args["output_file"],
+        args["grs_path"],
+        profile_dir=profile_dir,
+    )
+    assert len(list(profile_dir.glob("*.prof"))) == 7
+    assert len(list(profile_dir.glob("*.tracemalloc"))) == 7
+    pstats.Stats(str(profile_dir / "01_convert_morph_output.prof"))
+    tracemalloc.Snapshot.load(str(profile_dir / "01_convert_morph_output.tracemalloc"))
+
+
 def test_convert_ndt_to_ud_missing_grs(mock_dependencies, monkeypatch, tmp_path):
     # Setup as above, but the grs file is "missing"
     grs_path = tmp_path / "missing_rules.grs"
@@ -101,3 +178,38 @@ def test_convert_ndt_to_ud_missing_grs(mock_dependencies, monkeypatch, tmp_path)
     )
     assert "not found" in called.get("error", "")
     assert not Path(args["output_file"]).exists()
+
+
+def test_convert_ndt_to_ud_with_shards_merges_in_order(mock_dependencies, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    args = mock_dependencies
+    sentences = [
+        f"# sent_id = {i}\n1\tord{i}\t_\t_\t_\t_\t0\tFINV\t_\t_\n" for i in range(5)
+    ]
+    Path(args["input_file"]).write_text("\n".join(sentences) + "\n")
+
+    def fake_convert_shard(
+        lines, language, grs_path, tmp_dir, profile_dir, measure_memory
+    ):
+        sent_ids = [line for line in lines if line.startswith("# sent_id")]
+        conll = "# global.columns = ID FORM\n" + "".join(f"{s}\n" for s in sent_ids)
+        return conll, [{"stage": "01", "cpu_seconds": 1.0, "sentences": len(sent_ids)}]
+
+    monkeypatch.setattr(ndt2ud, "_convert_shard", fake_convert_shard)
+    monkeypatch.setattr(
+        ndt2ud,
+        "ProcessPoolExecutor",
+        lambda max_workers, mp_context: ThreadPoolExecutor(max_workers),
+    )
+    ndt2ud.convert_ndt_to_ud(
+        args["input_file"],
+        args["language"],
+        args["output_file"],
+        args["grs_path"],
+        shards=3,
+    )
+    output = Path(args["output_file"]).read_text().splitlines()
+    assert output == ["# global.columns = ID FORM"] + [
+        f"# sent_id = {i}" for i in range(5)
+    ]
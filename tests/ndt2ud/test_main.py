@@ -219,3 +219,81 @@ def test_main_input_dir_with_files(mock_convert_ndt_to_ud, temp_workspace):
             ndt2ud_init.main()
         # Should call convert_ndt_to_ud for each file
         assert mock_convert_ndt_to_ud.call_count == 2
+
+
+@mock.patch("ndt2ud.__init__.convert_ndt_to_ud")
+def test_main_input_dir_with_jobs_converts_in_order(
+    mock_convert_ndt_to_ud, monkeypatch, temp_workspace
+):
+    from concurrent.futures import ThreadPoolExecutor
+
+    input_dir = temp_workspace / "input_dir"
+    input_dir.mkdir()
+    for name in ["b.conllu", "a.conllu", "c.conll"]:
+        (input_dir / name).write_text("dummy")
+    monkeypatch.setattr(
+        ndt2ud_init,
+        "ProcessPoolExecutor",
+        lambda max_workers, mp_context: ThreadPoolExecutor(max_workers),
+    )
+    with mock.patch.object(
+        ndt2ud_init, "__file__", str(temp_workspace / "src" / "ndt2ud" / "__init__.py")
+    ):
+        sys_argv = [
+            "ndt2ud",
+            "convert",
+            "-l",
+            "nb",
+            "-i",
+            str(input_dir),
+            "-o",
+            str(temp_workspace / "data" / "UD_output"),
+            "--jobs",
+            "3",
+        ]
+        with mock.patch.object(sys, "argv", sys_argv):
+            ndt2ud_init.main()
+    assert mock_convert_ndt_to_ud.call_count == 3
+    converted = sorted(call.args[0].name for call in mock_convert_ndt_to_ud.mock_calls)
+    assert converted == ["a.conllu", "b.conllu", "c.conll"]
+
+
+@pytest.mark.parametrize(
+    "options", [["--shards", "4"], ["--cache"], ["--metrics", "m.json"]]
+)
+@mock.patch("ndt2ud.__init__.convert_ndt_to_ud")
+def test_main_convert_rejects_options_unused_by_incremental(
+    mock_convert_ndt_to_ud, temp_workspace, fake_conll_file, caplog, options
+):
+    with mock.patch.object(
+        ndt2ud_init, "__file__", str(temp_workspace / "src" / "ndt2ud" / "__init__.py")
+    ):
+        sys_argv = [
+            "ndt2ud",
+            "convert",
+            "-l",
+            "nb",
+            "-i",
+            str(fake_conll_file),
+            "-o",
+            str(temp_workspace / "data" / "UD_output"),
+            "--incremental",
+            *options,
+        ]
+        with mock.patch.object(sys, "argv", sys_argv):
+            ndt2ud_init.main()
+    mock_convert_ndt_to_ud.assert_not_called()
+    assert f"--incremental can't be combined with {options[0]}" in caplog.text
+
+
+def test_run_in_worker_returns_result_and_log_messages():
+    def fake_convert(*args):
+        ndt2ud_init.logging.info("converting %s", args[0])
+        return "converted"
+
+    task = ("in.conllu", "nb", "out.conllu", "rules.grs", None)
+    result, records = ndt2ud_init._run_in_worker(
+        fake_convert, task, ndt2ud_init.logging.INFO
+    )
+    assert result == "converted"
+    assert records == [(ndt2ud_init.logging.INFO, "converting in.conllu")]
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from ndt2ud.parse_conllu import (
+    df_to_conll,
+    format_conll,
+    load_conll_to_df,
+    parse_conll_file,
+    write_df_conll,
+)
+
+NDT_FILE = (
+    Path(__file__).parents[2] / "data" / "gullkorpus" / "2019_gullkorpus_ndt.conllu"
+)
+
+
+@pytest.fixture(scope="module")
+def conll():
+    return parse_conll_file(NDT_FILE)
+
+
+@pytest.mark.parametrize("drop_comments", [False, True])
+def test_df_to_conll_round_trips(conll, drop_comments):
+    df = load_conll_to_df(conll)
+    assert df_to_conll(df, drop_comments) == format_conll(conll, drop_comments)
+
+
+def test_df_to_conll_writes_sentences_in_index_order(conll):
+    df = load_conll_to_df(conll)
+    filtered = pd.concat([df[df["idx"] == 7], df[df["idx"] == 2]])
+
+    expected = format_conll({"sentences": [conll["sentences"][i] for i in (2, 7)]})
+    assert df_to_conll(filtered) == expected
+
+
+def test_write_df_conll_streams_to_file(conll, tmp_path):
+    df = load_conll_to_df(conll)
+    with open(tmp_path / "out.conllu", "w", encoding="utf-8") as fp:
+        write_df_conll(df, fp, batch_size=100)
+    assert (tmp_path / "out.conllu").read_text(encoding="utf-8") == format_conll(conll)
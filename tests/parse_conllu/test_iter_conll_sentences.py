@@ -0,0 +1,29 @@
+import types
+from pathlib import Path
+
+from ndt2ud.morphological_features import convert_morphology
+from ndt2ud.parse_conllu import iter_conll_sentences, parse_conll_file, write_conll
+
+NDT_FILE = (
+    Path(__file__).parents[2] / "data" / "gullkorpus" / "2019_gullkorpus_ndt.conllu"
+)
+
+
+def test_iter_conll_sentences_matches_parse_conll_file():
+    sentences = iter_conll_sentences(NDT_FILE)
+    assert isinstance(sentences, types.GeneratorType)
+    assert list(sentences) == parse_conll_file(NDT_FILE)["sentences"]
+
+
+def test_streamed_morphology_writes_same_output(tmp_path):
+    streamed = {"file": NDT_FILE.name, "sentences": iter_conll_sentences(NDT_FILE)}
+    morphdata = convert_morphology(streamed)
+    assert not isinstance(morphdata["sentences"], list)
+    write_conll(morphdata, tmp_path / "streamed.conllu")
+
+    write_conll(
+        convert_morphology(parse_conll_file(NDT_FILE)), tmp_path / "parsed.conllu"
+    )
+    assert (tmp_path / "streamed.conllu").read_text() == (
+        tmp_path / "parsed.conllu"
+    ).read_text()
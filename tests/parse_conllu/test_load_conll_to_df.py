@@ -0,0 +1,55 @@
+import pandas as pd
+
+from ndt2ud.parse_conllu import (
+    CATEGORICAL_FIELDS,
+    CONLLFIELDS,
+    Sentence,
+    Token,
+    load_conll_to_df,
+    parse_conll_lines,
+)
+
+CONLL_LINES = [
+    "# newpar",
+    "# sent_id = 1",
+    "# text = Han sov .",
+    "1\tHan\than\tPRON\tpron\t_\t2\tnsubj\t_\t_",
+    "2\tsov\tsove\tVERB\tverb\t_\t0\troot\t_\t_",
+    "3\t.\t$.\tPUNCT\tclb\t_\t2\tpunct\t_\t_",
+    "",
+    "# sent_id = 2",
+    "# text = Ja",
+    "1\tJa\tja\tINTJ\tinterj\t_\t0\troot\t_\t_",
+    "",
+]
+
+
+def test_load_conll_to_df_builds_one_row_per_token():
+    df = load_conll_to_df(parse_conll_lines(CONLL_LINES))
+
+    assert list(df.columns) == [*CONLLFIELDS, "newpar", "sent_id", "text", "idx"]
+    assert df["idx"].tolist() == [0, 0, 0, 1]
+    assert df["sent_id"].tolist() == ["1", "1", "1", "2"]
+    assert df["newpar"].tolist() == [True, True, True, False]
+    assert df["HEAD"].tolist() == [2, 0, 2, 0]
+    assert df["UPOS"].tolist() == ["PRON", "VERB", "PUNCT", "INTJ"]
+    for field in CATEGORICAL_FIELDS:
+        assert isinstance(df[field].dtype, pd.CategoricalDtype)
+
+
+def test_load_conll_to_df_fills_missing_metadata_with_false():
+    token = Token([1, "Ja", "ja", "INTJ", "interj", "_", 0, "root", "_", "_"])
+    conll = {
+        "sentences": [
+            Sentence([token], sent_id="1"),
+            Sentence([], sent_id="2", newpar=True),
+            Sentence([token.copy()], sent_id="3", newdoc=True),
+        ]
+    }
+    df = load_conll_to_df(conll)
+
+    assert df["sent_id"].tolist() == ["1", "3"]
+    assert df["idx"].tolist() == [0, 2]
+    assert df["newdoc"].tolist() == [False, True]
+    # the only sentence with newpar has no tokens, but the column is kept
+    assert df["newpar"].tolist() == [False, False]
@@ -0,0 +1,30 @@
+from ndt2ud.parse_conllu import parse_conll_lines, parse_line, read_conll_line
+
+TOKENLINE = "2\tgjer\tgjere\tverb\tverb\tpres\t0\tFINV\t_\t_"
+
+
+def test_read_conll_line_classifies_each_kind():
+    assert read_conll_line("") == ("empty", None)
+    assert read_conll_line("# newpar") == ("newpardoc", "newpar")
+    assert read_conll_line("# sent_id = 1") == ("comment", ("sent_id", "1"))
+    assert read_conll_line("# dialect: trøndersk") == ("dialect", None)
+    assert read_conll_line(TOKENLINE) == ("token", parse_line(TOKENLINE))
+    assert read_conll_line("not a conll line") == ("invalid", None)
+    assert read_conll_line("1\tfor\tfå\tfelt") == ("invalid", None)
+
+
+def test_read_conll_line_fills_empty_fields_like_parse_line():
+    line = "1\tSlik\t\tadv\t\t\t2\tADV\t\t_"
+    kind, token = read_conll_line(line)
+    assert kind == "token"
+    assert token == parse_line(line)
+    assert token["LEMMA"] == "_"
+    assert token["ID"] == 1 and token["HEAD"] == 2
+
+
+def test_parse_conll_lines_returns_invalid_lines_without_printing(capsys):
+    lines = ["# sent_id = 1", TOKENLINE, "ugyldig", ""]
+    parsed = parse_conll_lines(lines)
+    assert len(parsed["sentences"]) == 1
+    assert parsed["invalid_lines"] == ["line: 2, text: ugyldig"]
+    assert capsys.readouterr().out == ""
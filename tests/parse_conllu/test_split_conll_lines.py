@@ -0,0 +1,34 @@
+from ndt2ud.parse_conllu import parse_conll_lines, split_conll_lines
+
+
+def test_split_conll_lines_cuts_at_sentence_boundaries():
+    lines = [
+        "# newdoc",
+        "# sent_id = 1",
+        "1\tEn\t_\t_\t_\t_\t0\troot\t_\t_",
+        "",
+        "# newpar",
+        "# sent_id = 2",
+        "1\tTo\t_\t_\t_\t_\t0\troot\t_\t_",
+        "",
+        "# sent_id = 3",
+        "1\tTre\t_\t_\t_\t_\t0\troot\t_\t_",
+        "",
+    ]
+    shards = split_conll_lines(lines, 2)
+
+    assert len(shards) == 2
+    assert shards[0][-1] == ""
+    assert shards[1][0] == "# newpar"
+    assert sum(shards, []) == lines
+    sent_ids = [
+        sentence["sent_id"]
+        for shard in shards
+        for sentence in parse_conll_lines(shard)["sentences"]
+    ]
+    assert sent_ids == ["1", "2", "3"]
+
+
+def test_split_conll_lines_never_returns_empty_shards():
+    lines = ["# sent_id = 1", "1\tEn\t_\t_\t_\t_\t0\troot\t_\t_", ""]
+    assert split_conll_lines(lines, 8) == [lines]
@@ -0,0 +1,51 @@
+import pickle
+
+import pytest
+
+from ndt2ud.morphological_features import get_field
+from ndt2ud.parse_conllu import CONLLFIELDS, Sentence, Token, parse_line
+
+TOKENLINE = "3\teg\teg\tpron\tpron\tpers|1|eint|hum|nom\t2\tSUBJ\t_\t_"
+
+
+def test_token_behaves_like_a_token_dict():
+    token = parse_line(TOKENLINE)
+    as_dict = dict(zip(CONLLFIELDS, TOKENLINE.split("\t")))
+    as_dict.update(ID=3, HEAD=2)
+
+    assert isinstance(token, Token)
+    assert token == as_dict
+    assert list(token) == CONLLFIELDS
+    assert token.values() == list(as_dict.values())
+    assert token.get("DEPREL") == "SUBJ"
+    assert get_field(token, "lemma") == "eg"
+
+    token["UPOS"] = "PRON"
+    assert token.UPOS == "PRON"
+    assert token.copy() == token and token.copy() is not token
+    assert pickle.loads(pickle.dumps(token)) == token
+
+
+def test_token_only_has_conll_fields():
+    token = Token(ID=1, FORM="Slik")
+    assert len(token) == 2
+    assert "LEMMA" not in token
+    with pytest.raises(KeyError):
+        token["sent_id"] = "1"
+    with pytest.raises(KeyError):
+        token["LEMMA"]
+
+
+def test_sentence_keeps_tokens_first_and_metadata_in_order():
+    sentence = Sentence()
+    sentence["newpar"] = True
+    sentence["sent_id"] = "ndt_nn"
+    sentence.tokens.append(parse_line(TOKENLINE))
+
+    assert list(sentence) == ["tokens", "newpar", "sent_id"]
+    assert sentence == {
+        "tokens": [parse_line(TOKENLINE)],
+        "newpar": True,
+        "sent_id": "ndt_nn",
+    }
+    assert sentence.get("text") is None
@@ -0,0 +1,95 @@
+import pytest
+
+from ndt2ud import sentence_cache
+
+
+def sentence(sent_id, form="ord"):
+    return [f"# sent_id = {sent_id}", f"1\t{form}\t_\t_\t_\t_\t0\tFINV\t_\t_", ""]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    grs_path = tmp_path / "rules.grs"
+    grs_path.write_text("strat main { Id }\n")
+    cache = sentence_cache.SentenceCache(grs_path, "nb", tmp_path / "cache.sqlite")
+    yield cache
+    cache.close()
+
+
+class FakeConvert:
+    """Converts each sentence to a block with its sent_id and forms in upper case."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, lines):
+        self.calls.append(lines)
+        blocks = []
+        for chunk in sentence_cache.split_sentence_chunks(lines)[0]:
+            tokens = [line.split("\t")[1] for line in chunk if line[:1].isdecimal()]
+            if tokens:
+                blocks.append(f"{chunk[0]}\n{' '.join(tokens).upper()}\n\n")
+        return "# global.columns = ID FORM\n" + "".join(blocks)
+
+
+def test_only_changed_sentences_are_converted_again(cache):
+    convert = FakeConvert()
+    lines = sentence(1) + sentence(2) + sentence(3)
+    first = sentence_cache.convert_with_cache(lines, cache, convert)
+    assert first == convert(lines)
+
+    changed = sentence(1) + sentence(2, "endret") + sentence(3)
+    convert.calls = []
+    second = sentence_cache.convert_with_cache(changed, cache, convert)
+
+    assert convert.calls == [sentence(2, "endret")]
+    assert second == (
+        "# global.columns = ID FORM\n"
+        "# sent_id = 1\nORD\n\n# sent_id = 2\nENDRET\n\n# sent_id = 3\nORD\n\n"
+    )
+
+    convert.calls = []
+    assert sentence_cache.convert_with_cache(changed, cache, convert) == second
+    assert convert.calls == []
+
+
+def test_sentences_with_invalid_lines_are_not_cached(cache):
+    convert = FakeConvert()
+    lines = sentence(1) + ["ugyldig linje"] + sentence(2)
+    sentence_cache.convert_with_cache(lines, cache, convert)
+    convert.calls = []
+
+    sentence_cache.convert_with_cache(lines, cache, convert)
+
+    assert convert.calls == [["ugyldig linje"] + sentence(2)]
+
+
+def test_mismatched_output_falls_back_to_converting_everything(cache):
+    lines = sentence(1) + sentence(2)
+    calls = []
+
+    def convert(lines):
+        calls.append(lines)
+        return "# global.columns = ID FORM\n# sent_id = 1\nORD\n\n"
+
+    sentence_cache.convert_with_cache(lines, cache, convert)
+
+    assert calls == [lines, lines]
+
+
+def test_cache_evicts_least_recently_used_sentences(cache):
+    cache.max_bytes = 10
+    cache.put_many({"old": "12345"})
+    cache.put_many({"new": "1234567"})
+
+    assert cache.get_many(["old", "new"]) == {"new": "1234567"}
+
+
+def test_key_depends_on_rules(tmp_path, cache):
+    other_rules = tmp_path / "other.grs"
+    other_rules.write_text("strat main { Onf(x) }\n")
+    other = sentence_cache.SentenceCache(other_rules, "nb", tmp_path / "cache.sqlite")
+
+    assert other.key(sentence(1)) != cache.key(sentence(1))
+    assert cache.key(sentence(1)) == cache.key([line + "\r\n" for line in sentence(1)])
+    other.close()
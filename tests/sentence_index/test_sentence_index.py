@@ -0,0 +1,84 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from ndt2ud.parse_conllu import parse_conll_file
+from ndt2ud.sentence_index import (
+    SentenceIndex,
+    build_sentence_index,
+    index_file_for,
+    read_sentence_index,
+)
+
+UD_FILE = (
+    Path(__file__).parents[2] / "data" / "gullkorpus" / "2019_gullkorpus_ud.conllu"
+)
+
+
+@pytest.fixture
+def conllu_file(tmp_path):
+    return Path(shutil.copy(UD_FILE, tmp_path / UD_FILE.name))
+
+
+def test_sentences_are_found_by_sent_id(conllu_file):
+    sentences = parse_conll_file(conllu_file)["sentences"]
+    with SentenceIndex(conllu_file) as index:
+        assert len(index) == len(sentences)
+        assert list(index) == [sentence["sent_id"] for sentence in sentences]
+        for sentence in sentences[::-1]:
+            assert index.sentence(sentence["sent_id"]) == sentence
+
+
+def test_subcorpus_of_all_ids_is_the_file(conllu_file):
+    with SentenceIndex(conllu_file) as index:
+        assert index.subcorpus(list(index)) == conllu_file.read_text(encoding="utf-8")
+
+
+def test_subcorpus_skips_missing_ids(conllu_file, tmp_path):
+    sentences = parse_conll_file(conllu_file)["sentences"]
+    sent_ids = [sentences[5]["sent_id"], "missing", sentences[1]["sent_id"]]
+    with SentenceIndex(conllu_file) as index:
+        index.write_subcorpus(sent_ids, tmp_path / "sub.conllu")
+    assert parse_conll_file(tmp_path / "sub.conllu")["sentences"] == [
+        sentences[5],
+        sentences[1],
+    ]
+
+
+def test_index_is_stored_and_rebuilt_when_stale(conllu_file):
+    SentenceIndex(conllu_file).close()
+    assert read_sentence_index(conllu_file) == build_sentence_index(conllu_file)
+
+    with open(conllu_file, "a", encoding="utf-8") as f:
+        f.write("# sent_id = new\n1\tJa\tja\tINTJ\t_\t_\t0\troot\t_\t_\n\n")
+    assert read_sentence_index(conllu_file) is None
+    with SentenceIndex(conllu_file) as index:
+        assert index.sentence_text("new").startswith("# sent_id = new\n")
+    assert "new" in read_sentence_index(conllu_file)
+    assert index_file_for(conllu_file).exists()
+
+
+def test_non_unique_sent_id_keeps_first(tmp_path):
+    conllu_file = tmp_path / "dup.conllu"
+    conllu_file.write_text(
+        "# sent_id = a\n1\tJa\tja\tINTJ\t_\t_\t0\troot\t_\t_\n\n"
+        "# sent_id = a\n1\tNei\tnei\tINTJ\t_\t_\t0\troot\t_\t_\n"
+    )
+    assert build_sentence_index(conllu_file) == {"a": (0, 43)}
+
+
+def test_global_columns_header_is_not_part_of_the_first_sentence(conllu_file, tmp_path):
+    text = conllu_file.read_text(encoding="utf-8")
+    header_file = tmp_path / "header.conllu"
+    header_file.write_text(
+        "# global.columns = ID FORM LEMMA UPOS XPOS FEATS HEAD DEPREL DEPS MISC\n"
+        + text,
+        encoding="utf-8",
+    )
+    with SentenceIndex(header_file) as index:
+        first = next(iter(index))
+        assert index.sentence_text(first).startswith(f"# sent_id = {first}\n")
+        assert index.subcorpus(reversed(list(index))).count("global.columns") == 0
+    with SentenceIndex(conllu_file) as index:
+        assert index.sentence_text(first) == text[: len(index.sentence_text(first))]
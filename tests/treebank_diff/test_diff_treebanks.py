@@ -0,0 +1,100 @@
+import types
+from pathlib import Path
+
+import pytest
+
+import ndt2ud.__init__ as ndt2ud_init
+from ndt2ud import treebank_diff
+from ndt2ud.treebank_diff import diff_treebanks, format_report
+
+UD_FILE = (
+    Path(__file__).parents[2] / "data" / "gullkorpus" / "2019_gullkorpus_ud.conllu"
+)
+
+
+@pytest.fixture
+def files(tmp_path):
+    old_text = UD_FILE.read_text(encoding="utf-8")
+    blocks = old_text.split("\n\n")
+    # drop the second sentence, and add a new one at the end
+    new_text = "\n\n".join(blocks[:1] + blocks[2:-1])
+    new_text += (
+        "\n\n# sent_id = new\n# text = Ja\n1\tJa\tja\tINTJ\t_\t_\t0\troot\t_\t_\n\n"
+    )
+    new_text = new_text.replace("\tnsubj\t", "\tobj\t").replace("\tADV\t", "\tADJ\t")
+    (tmp_path / "old.conllu").write_text(old_text, encoding="utf-8")
+    (tmp_path / "new.conllu").write_text(new_text, encoding="utf-8")
+    return tmp_path / "old.conllu", tmp_path / "new.conllu"
+
+
+def test_diff_counts_changes_by_field_and_deprel(files):
+    old_file, new_file = files
+    diff = diff_treebanks(old_file, new_file)
+
+    old_ids = [
+        line[12:]
+        for line in old_file.read_text().splitlines()
+        if line.startswith("# sent_id")
+    ]
+    assert diff["added"] == ["new"]
+    assert diff["removed"] == [old_ids[1]]
+    assert set(diff["fields"]) == {"DEPREL", "UPOS"}
+    assert diff["deprel_transitions"] == {"nsubj -> obj": diff["fields"]["DEPREL"]}
+    assert diff["sentences"] == len(old_ids)
+    assert diff["unchanged"] == len(old_ids) - len(diff["changed"]) - 1
+
+    change = diff["changed"][0]["changes"][0]
+    assert change["field"] in ("DEPREL", "UPOS")
+    assert isinstance(change["id"], int)
+    report = format_report(diff, max_sentences=1)
+    assert "nsubj -> obj" in report
+    assert report.count("# sent_id = ") == 1
+
+
+def test_identical_files_have_no_changes():
+    diff = diff_treebanks(UD_FILE, UD_FILE)
+    assert diff["changed"] == diff["added"] == diff["removed"] == []
+    assert diff["unchanged"] == diff["sentences"]
+
+
+def test_global_columns_header_does_not_change_the_first_sentence(tmp_path):
+    header_file = tmp_path / "header.conllu"
+    header_file.write_text(
+        "# global.columns = ID FORM LEMMA UPOS XPOS FEATS HEAD DEPREL DEPS MISC\n"
+        + UD_FILE.read_text(encoding="utf-8"),
+        encoding="utf-8",
+    )
+    assert diff_treebanks(UD_FILE, header_file)["changed"] == []
+
+
+def test_sharded_diff_is_the_same(files, monkeypatch):
+    monkeypatch.setattr(treebank_diff, "SHARD_SIZE", 10)
+    assert diff_treebanks(*files, jobs=2) == diff_treebanks(*files)
+
+
+def diff_args(old, new, tmp_path):
+    return types.SimpleNamespace(
+        old=old, new=new, jobs=1, show=20, report_file=None, json=tmp_path / "d.json"
+    )
+
+
+def test_diff_cli_pairs_a_new_file_with_the_same_name_in_the_old_folder(
+    files, tmp_path, capsys
+):
+    old_file, new_file = files
+    old_dir = tmp_path / "converted"
+    old_dir.mkdir()
+    old_file.rename(old_dir / new_file.name)
+
+    ndt2ud_init._diff(diff_args(old_dir, new_file, tmp_path))
+
+    assert f"Old: {old_dir / new_file.name}" in capsys.readouterr().out
+    assert (tmp_path / "d.json").exists()
+
+
+def test_diff_cli_exits_if_the_old_folder_has_no_such_file(files, tmp_path):
+    _, new_file = files
+    old_dir = tmp_path / "converted"
+    old_dir.mkdir()
+    with pytest.raises(SystemExit):
+        ndt2ud_init._diff(diff_args(old_dir, new_file, tmp_path))
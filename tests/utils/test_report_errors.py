@@ -9,7 +9,7 @@ def test_report_errors_catches_all_message_pieces(tmp_path):
     report_file.write_text(text)
     assert report_file.read_text() == text
 
-    result = report_errors(report_file)
+    result = report_errors(report_file, dataframe=True)
     row = result.iloc[0]
 
     assert len(result.columns) == 8
@@ -20,3 +20,58 @@ def test_report_errors_catches_all_message_pieces(tmp_path):
     assert row.error_level == "L2"
     assert row.error_class == "Syntax"
     assert row.error_name == "invalid-deprel"
+
+
+REPORT = """[File a.conllu Line 10 Sent 1]: [L3 Syntax obl-should-be-nmod] The parent is a nominal.
+[File a.conllu Line 12 Sent 1]: [L2 Metadata non-unique-sent-id] Non-unique sent_id attribute '1'.
+[File b.conllu Line 3 Sent 7]: [L3 Syntax obl-should-be-nmod] The parent is a nominal.
+This line is an explanation, and not an error.
+Warnings: 1
+"""
+
+
+def test_report_errors_counts_by_type_file_and_sentence(tmp_path):
+    report_file = tmp_path / "report.txt"
+    report_file.write_text(REPORT)
+
+    summary = report_errors(report_file, output_file=tmp_path / "summary.csv")
+
+    assert summary.total == 3
+    assert summary.by_type == {
+        ("L3", "Syntax", "obl-should-be-nmod"): 2,
+        ("L2", "Metadata", "non-unique-sent-id"): 1,
+    }
+    assert summary.by_file == {"a.conllu": 2, "b.conllu": 1}
+    assert summary.by_sentence == {("a.conllu", "1"): 2, ("b.conllu", "7"): 1}
+    assert (tmp_path / "summary.csv").read_text() == (
+        "error_level,error_class,error_name,count\n"
+        "L3,Syntax,obl-should-be-nmod,2\n"
+        "L2,Metadata,non-unique-sent-id,1\n"
+    )
+
+
+def test_report_errors_writes_csv_details(tmp_path):
+    report_file = tmp_path / "report.txt"
+    report_file.write_text(REPORT)
+
+    report_errors(report_file, details_file=tmp_path / "errors.csv")
+
+    rows = (tmp_path / "errors.csv").read_text().splitlines()
+    assert rows[0] == (
+        "file,line,sent,node,error_level,error_class,error_name,error_message"
+    )
+    assert rows[3] == (
+        "b.conllu,3,7,,L3,Syntax,obl-should-be-nmod,The parent is a nominal."
+    )
+
+
+def test_report_errors_writes_parquet_details(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    report_file = tmp_path / "report.txt"
+    report_file.write_text(REPORT)
+
+    report_errors(report_file, details_file=tmp_path / "errors.parquet")
+
+    table = pq.read_table(tmp_path / "errors.parquet")
+    assert table.num_rows == 3
+    assert table.column("error_name").to_pylist()[1] == "non-unique-sent-id"
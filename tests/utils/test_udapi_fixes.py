@@ -0,0 +1,59 @@
+from udapi import Document
+
+from ndt2ud.utils import apply_udapi_fixes, udapi_fixes_conll, udapi_fixes_stream
+
+CONLL = """# global.columns = ID FORM LEMMA UPOS XPOS FEATS HEAD DEPREL DEPS MISC
+# sent_id = 001
+# text = Han kom, og hun gikk.
+1	Han	han	PRON	_	_	2	nsubj	_	_
+2	kom	komme	VERB	_	_	0	root	_	_
+3	,	$,	PUNCT	_	_	2	punct	_	_
+4	og	og	CCONJ	_	_	6	cc	_	_
+5	hun	hun	PRON	_	_	6	nsubj	_	_
+6	gikk	gå	VERB	_	_	2	conj	_	_
+7	.	$.	PUNCT	_	_	6	punct	_	_
+
+# sent_id = 002
+# text = Det er «fint».
+1	Det	det	PRON	_	_	4	nsubj	_	_
+2	er	være	AUX	_	_	4	cop	_	_
+3	«	$«	PUNCT	_	_	2	punct	_	_
+4	fint	fin	ADJ	_	_	0	root	_	_
+5	»	$»	PUNCT	_	_	4	punct	_	_
+6	.	$.	PUNCT	_	_	4	punct	_	_
+
+"""
+
+
+def sequential_fixes(conll: str) -> str:
+    doc = Document()
+    doc.from_conllu_string(conll)
+    apply_udapi_fixes(doc)
+    return doc.to_conllu_string()
+
+
+def test_udapi_fixes_conll_matches_sequential_blocks():
+    expected = sequential_fixes(CONLL)
+    assert expected != CONLL
+
+    assert udapi_fixes_conll(CONLL) == expected
+
+
+def test_udapi_fixes_stream_yields_one_sentence_at_a_time():
+    sentences = [block + "\n" for block in CONLL.strip().split("\n\n")]
+
+    result = list(udapi_fixes_stream(iter(sentences)))
+
+    assert len(result) == 2
+    assert "".join(result) == sequential_fixes(CONLL)
+
+
+def test_udapi_fixes_stream_keeps_the_global_entity_header():
+    conll = CONLL.replace(
+        "# sent_id = 001\n",
+        "# global.Entity = eid-etype-head-other\n# sent_id = 001\n",
+    )
+    expected = sequential_fixes(conll)
+    assert "# global.Entity = eid-etype-head-other\n" in expected
+
+    assert udapi_fixes_conll(conll) == expected
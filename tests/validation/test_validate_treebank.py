@@ -0,0 +1,42 @@
+import pytest
+
+from ndt2ud import validation
+
+udtools = pytest.importorskip("udtools")
+
+
+@pytest.fixture
+def treebank(tmp_path, write_ud_treebank):
+    files = []
+    for name, sent_ids in [("a.conllu", ["1", "2"]), ("b.conllu", ["3", "1"])]:
+        files += write_ud_treebank(tmp_path / name, [(i, "nsubj") for i in sent_ids])
+    return files
+
+
+def test_validate_treebank_reports_non_unique_sent_ids_across_files(
+    validation_script, treebank, tmp_path
+):
+    report_file = tmp_path / "report.txt"
+
+    passed = validation.validate_treebank(treebank, report_file, validation_script)
+
+    report = report_file.read_text()
+    assert not passed
+    assert "[File b.conllu Line 11 Sent 1]: [L2 METADATA non-unique-sent-id]" in report
+    assert report.endswith("*** FAILED *** with 1 errors\n")
+
+
+def test_validate_treebank_in_parallel_writes_the_same_report(
+    validation_script, treebank, tmp_path
+):
+    validation.validate_treebank(treebank, tmp_path / "one.txt", validation_script)
+    validation.validate_treebank(
+        treebank, tmp_path / "two.txt", validation_script, jobs=2
+    )
+
+    assert (tmp_path / "two.txt").read_text() == (tmp_path / "one.txt").read_text()
+
+
+def test_load_validator_needs_the_udtools_package(tmp_path):
+    with pytest.raises(ImportError):
+        validation.load_validator(tmp_path / "validate.py")
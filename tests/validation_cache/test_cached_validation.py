@@ -0,0 +1,63 @@
+import pytest
+
+from ndt2ud import validation
+
+udtools = pytest.importorskip("udtools")
+
+
+def count_validated_sentences(monkeypatch, validation_script) -> list:
+    module = validation.load_validator(validation_script)
+    validated = []
+    validate_sentence = module.Validator.validate_sentence
+
+    def spy(self, lines, state=None):
+        validated.append(lines)
+        return validate_sentence(self, lines, state)
+
+    monkeypatch.setattr(module.Validator, "validate_sentence", spy)
+    return validated
+
+
+def test_cached_validation_writes_the_same_report(
+    validation_script, write_ud_treebank, tmp_path
+):
+    cache_file = tmp_path / "cache.sqlite"
+    files = write_ud_treebank(
+        tmp_path / "ud.conllu",
+        [("1", "nsubj"), ("2", "nsubj:foo"), ("3", "nsubj"), ("2", "nsubj")],
+    )
+    for report in ("cold.txt", "warm.txt"):
+        validation.validate_treebank(
+            files, tmp_path / report, validation_script, cache_file=cache_file
+        )
+    validation.validate_treebank(files, tmp_path / "full.txt", validation_script)
+
+    full_report = (tmp_path / "full.txt").read_text()
+    assert "non-unique-sent-id" in full_report
+    assert "nsubj:foo" in full_report
+    assert (tmp_path / "cold.txt").read_text() == full_report
+    assert (tmp_path / "warm.txt").read_text() == full_report
+
+
+def test_cached_validation_only_validates_changed_sentences(
+    validation_script, write_ud_treebank, tmp_path, monkeypatch
+):
+    cache_file = tmp_path / "cache.sqlite"
+    sentences = [("1", "nsubj"), ("2", "nsubj:foo"), ("3", "nsubj"), ("4", "nsubj")]
+    files = write_ud_treebank(tmp_path / "ud.conllu", sentences)
+    validation.validate_treebank(
+        files, tmp_path / "cold.txt", validation_script, cache_file=cache_file
+    )
+
+    # drop a sentence, so that the line numbers of the others change
+    files = write_ud_treebank(tmp_path / "ud.conllu", [sentences[0]] + sentences[2:])
+    validated = count_validated_sentences(monkeypatch, validation_script)
+    validation.validate_treebank(
+        files, tmp_path / "warm.txt", validation_script, cache_file=cache_file
+    )
+    monkeypatch.undo()
+    validation.validate_treebank(files, tmp_path / "full.txt", validation_script)
+
+    # the first sentence is validated before the first feature is seen
+    assert len(validated) == 1
+    assert (tmp_path / "warm.txt").read_text() == (tmp_path / "full.txt").read_text()
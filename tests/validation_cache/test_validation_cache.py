@@ -0,0 +1,48 @@
+import sqlite3
+
+import pytest
+
+from ndt2ud.validation_cache import ValidationCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ValidationCache("validator", tmp_path / "cache.sqlite")
+    yield cache
+    cache.close()
+
+
+def result(n: int) -> dict:
+    return {"incidents": [], "sent_id_known": False, "spaceafterno": n}
+
+
+def test_cache_evicts_least_recently_used_sentences(cache):
+    cache.max_bytes = 2 * len(
+        '{"incidents": [], "sent_id_known": false, "spaceafterno": 1}'
+    )
+    cache.put_many({"a": result(1), "b": result(2)})
+    assert cache.get("a") == result(1)
+    cache.put_many({"c": result(3)})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == result(1)
+    assert cache.get("c") == result(3)
+
+
+def test_cache_of_other_validator_is_emptied(tmp_path, cache):
+    cache.put_many({"a": result(1)})
+    other = ValidationCache("other validator", tmp_path / "cache.sqlite")
+    assert other.get("a") is None
+    other.close()
+
+
+def test_store_without_eviction_columns_is_replaced(tmp_path):
+    cache_file = tmp_path / "old.sqlite"
+    with sqlite3.connect(cache_file) as connection:
+        connection.execute(
+            "CREATE TABLE sentences (key TEXT PRIMARY KEY, validator TEXT, result TEXT)"
+        )
+    cache = ValidationCache("validator", cache_file)
+    cache.put_many({"a": result(1)})
+    assert cache.get("a") == result(1)
+    cache.close()